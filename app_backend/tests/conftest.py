@@ -0,0 +1,99 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Protocol, TypeVar
+
+import pytest
+from utils.analyst_db import BaseDuckDBHandler, ChatHandler, DatasetHandler
+from utils.connection_manager import DuckDBConnectionManager
+
+H = TypeVar("H", bound=BaseDuckDBHandler)
+
+DatasetHandlerFactory = Callable[..., Awaitable[DatasetHandler]]
+ChatHandlerFactory = Callable[..., Awaitable[ChatHandler]]
+
+
+class HandlerFactory(Protocol):
+    def __call__(
+        self, handler_class: type[H], storage: Any = None, **kwargs: Any
+    ) -> Awaitable[H]: ...
+
+
+@pytest.fixture
+def connections() -> Iterator[DuckDBConnectionManager]:
+    """A connection manager of the test's own, so tests share no databases."""
+    manager = DuckDBConnectionManager()
+    yield manager
+    manager.close_all()
+
+
+@pytest.fixture
+async def handlers(
+    tmp_path: Path, connections: DuckDBConnectionManager
+) -> AsyncIterator[HandlerFactory]:
+    """
+    Create initialized handlers of the given class in `tmp_path`.
+
+    Keyword arguments override the defaults, `storage` stands in for the
+    persistent storage. Every handler is closed after the test.
+    """
+    created: list[BaseDuckDBHandler] = []
+
+    async def make(handler_class: type[H], storage: Any = None, **kwargs: Any) -> H:
+        handler: H = handler_class(
+            **{
+                "user_id": "user",
+                "db_path": tmp_path,
+                "connections": connections,
+                **kwargs,
+            }
+        )
+        if storage is not None:
+            handler._storage = storage
+        await handler._initialize_database()
+        created.append(handler)
+        return handler
+
+    yield make
+    for handler in created:
+        await handler.close()
+
+
+@pytest.fixture
+def make_dataset_handler(handlers: HandlerFactory) -> DatasetHandlerFactory:
+    async def make(**kwargs: Any) -> DatasetHandler:
+        return await handlers(DatasetHandler, **{"name": "data", **kwargs})
+
+    return make
+
+
+@pytest.fixture
+def make_chat_handler(handlers: HandlerFactory) -> ChatHandlerFactory:
+    async def make(**kwargs: Any) -> ChatHandler:
+        return await handlers(ChatHandler, **{"name": "chat", **kwargs})
+
+    return make
+
+
+@pytest.fixture
+async def dataset_handler(
+    make_dataset_handler: DatasetHandlerFactory,
+) -> DatasetHandler:
+    return await make_dataset_handler()
+
+
+@pytest.fixture
+async def chat_handler(make_chat_handler: ChatHandlerFactory) -> ChatHandler:
+    return await make_chat_handler()
@@ -0,0 +1,105 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Iterator
+
+import pytest
+from utils.account_info import AccountInfoCache
+
+ACCOUNT_CALL_SECONDS = 0.3
+
+
+class FakeDataRobot(BaseHTTPRequestHandler):
+    """Answer account/info/ slowly, and only for the token "good"."""
+
+    calls: list[str] = []
+
+    def do_GET(self) -> None:
+        self.calls.append(self.headers["Authorization"])
+        time.sleep(ACCOUNT_CALL_SECONDS)
+        if self.headers["Authorization"] == "Token good":
+            body = json.dumps({"uid": "user-1"}).encode()
+            self.send_response(200)
+        else:
+            body = b"{}"
+            self.send_response(401)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture
+def endpoint() -> Iterator[str]:
+    FakeDataRobot.calls = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeDataRobot)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/api/v2"
+    server.shutdown()
+
+
+async def test_account_lookups_are_cached_and_do_not_block(endpoint: str) -> None:
+    cache = AccountInfoCache()
+
+    ticks = 0
+
+    async def ticker() -> None:
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticking = asyncio.create_task(ticker())
+    # concurrent requests share one lookup, and the loop keeps running
+    replies = await asyncio.gather(*(cache.get("good", endpoint) for _ in range(5)))
+    ticking.cancel()
+    assert replies == [{"uid": "user-1"}] * 5
+    assert ticks > 10
+
+    # later requests no longer pay for the account call
+    start = time.perf_counter()
+    assert await cache.get("good", endpoint) == {"uid": "user-1"}
+    assert time.perf_counter() - start < ACCOUNT_CALL_SECONDS / 10
+
+    # a failing token is cached too instead of being retried per request
+    assert await cache.get("bad", endpoint) == {}
+    start = time.perf_counter()
+    assert await cache.get("bad", endpoint) == {}
+    assert time.perf_counter() - start < ACCOUNT_CALL_SECONDS / 10
+    assert FakeDataRobot.calls == ["Token good", "Token bad"]
+
+
+async def test_negative_entries_expire_sooner() -> None:
+    now = 0.0
+    replies = [{}, {"uid": "user-1"}, {"uid": "user-2"}]
+
+    def fetch(token: str, endpoint: str | None) -> dict[str, Any]:
+        return replies.pop(0)
+
+    cache = AccountInfoCache(ttl=100, negative_ttl=10, fetch=fetch, clock=lambda: now)
+
+    assert await cache.get("token", None) == {}
+    now = 11
+    assert await cache.get("token", None) == {"uid": "user-1"}
+    now = 50
+    assert await cache.get("token", None) == {"uid": "user-1"}
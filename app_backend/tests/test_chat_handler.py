@@ -0,0 +1,153 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import duckdb
+import pytest
+from utils.analyst_db import ChatHandler
+from utils.connection_manager import DuckDBConnectionManager
+from utils.schema import (
+    AnalystChatMessage,
+    ChatJSONEncoder,
+    ComponentStub,
+    GetBusinessAnalysisResult,
+)
+
+
+def _messages(count: int) -> list[AnalystChatMessage]:
+    return [
+        AnalystChatMessage(role="user", content=f"message {i}", components=[])
+        for i in range(count)
+    ]
+
+
+async def test_update_chat_replaces_messages(chat_handler: ChatHandler) -> None:
+    chat_id = await chat_handler.create_chat("chat")
+    await chat_handler.update_chat(chat_id, messages=_messages(3))
+
+    new_messages = _messages(5)
+    await chat_handler.update_chat(chat_id, chat_name="renamed", messages=new_messages)
+    stored = await chat_handler.get_chat_messages(chat_id=chat_id)
+    assert [m.content for m in stored] == [m.content for m in new_messages]
+    assert [m.id for m in stored] == [m.id for m in new_messages]
+    assert all(m.chat_id == chat_id for m in stored)
+    assert await chat_handler.get_chat_names() == ["renamed"]
+
+    await chat_handler.update_chat(chat_id, messages=[])
+    assert await chat_handler.get_chat_messages(chat_id=chat_id) == []
+
+
+async def test_delete_all_chats_removes_messages(chat_handler: ChatHandler) -> None:
+    for name in ("first", "second"):
+        chat_id = await chat_handler.create_chat(name)
+        await chat_handler.update_chat(chat_id, messages=_messages(2))
+
+    await chat_handler.delete_all_chats()
+    assert await chat_handler.get_chat_list() == []
+    async with chat_handler._get_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM chat_messages").fetchone() == (0,)
+
+
+def _business_result() -> GetBusinessAnalysisResult:
+    return GetBusinessAnalysisResult(
+        status="success",
+        bottom_line="bottom line",
+        additional_insights="insights",
+        follow_up_questions=["why?"],
+    )
+
+
+async def test_components_are_loaded_on_demand(chat_handler: ChatHandler) -> None:
+    chat_id = await chat_handler.create_chat("chat")
+    message = AnalystChatMessage(
+        role="assistant",
+        content="answer",
+        components=["enhanced", _business_result()],
+    )
+    message_id = await chat_handler.add_chat_message(chat_id, message)
+
+    (header,) = await chat_handler.get_chat_messages(
+        chat_id=chat_id, include_payloads=False
+    )
+    assert header.content == "answer"
+    stubs = [c for c in header.components if isinstance(c, ComponentStub)]
+    assert stubs == header.components
+    assert [c.component_type for c in stubs] == ["text", "business"]
+
+    component = await chat_handler.get_chat_message_component(chat_id, message_id, 1)
+    assert component == _business_result()
+
+    # writing stubs back keeps the stored payloads
+    header.in_progress = False
+    await chat_handler.update_chat_message(message_id, header)
+    (full,) = await chat_handler.get_chat_messages(chat_id=chat_id)
+    assert full.components == ["enhanced", _business_result()]
+    assert not full.in_progress
+
+
+async def test_legacy_message_blobs_are_readable(chat_handler: ChatHandler) -> None:
+    chat_id = await chat_handler.create_chat("chat")
+    message = AnalystChatMessage(
+        role="assistant", content="answer", components=[_business_result()]
+    )
+    async with chat_handler._get_connection() as conn:
+        conn.execute(
+            "INSERT INTO chat_messages VALUES (?, ?, ?, ?)",
+            [
+                message.id,
+                chat_id,
+                json.dumps(message.model_dump(), cls=ChatJSONEncoder),
+                message.created_at,
+            ],
+        )
+
+    (full,) = await chat_handler.get_chat_messages(chat_id=chat_id)
+    assert full.components == [_business_result()]
+    (header,) = await chat_handler.get_chat_messages(
+        chat_id=chat_id, include_payloads=False
+    )
+    assert isinstance(header.components[0], ComponentStub)
+    assert await chat_handler.get_chat_message_component(chat_id, message.id, 0) == (
+        _business_result()
+    )
+
+
+async def test_message_writes_are_single_transactions(
+    chat_handler: ChatHandler, connections: DuckDBConnectionManager
+) -> None:
+    chat_id = await chat_handler.create_chat("chat")
+    message = AnalystChatMessage(role="assistant", content="draft", components=[])
+
+    def cursors() -> int:
+        stats = connections.stats()
+        return int(stats.opened + stats.reused)
+
+    before = cursors()
+    message_id = await chat_handler.add_chat_message(chat_id, message)
+    message.content = "final"
+    assert await chat_handler.update_chat_message(message_id, message)
+    assert cursors() - before == 2
+
+    # a failing statement rolls back the whole unit of work
+    with pytest.raises(duckdb.ConstraintException):
+        await chat_handler.add_chat_message(chat_id, message)
+    (stored,) = await chat_handler.get_chat_messages(chat_id=chat_id)
+    assert (stored.content, stored.chat_id) == ("final", chat_id)
+
+    assert await chat_handler.add_chat_message("missing", _messages(1)[0]) == ""
+    assert not await chat_handler.update_chat_message("missing", message)
+    assert await chat_handler.delete_chat_message(message_id)
+    assert not await chat_handler.delete_chat_message(message_id)
+    assert await chat_handler.get_chat_messages(chat_id=chat_id) == []
@@ -0,0 +1,187 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import duckdb
+import pytest
+from utils.connection_manager import DuckDBConnectionManager, ResourceGovernor
+
+
+def test_cursors_share_one_database(tmp_path: Path) -> None:
+    manager = DuckDBConnectionManager(idle_timeout=60)
+    db_path = tmp_path / "test.db"
+
+    cursor = manager.acquire(db_path)
+    cursor.execute("CREATE TABLE t AS SELECT 1 AS a")
+    manager.release(db_path, cursor)
+
+    cursor = manager.acquire(db_path)
+    assert cursor.execute("SELECT a FROM t").fetchall() == [(1,)]
+    manager.release(db_path, cursor)
+
+    stats = manager.stats()
+    assert stats.opened == 1
+    assert stats.reused == 1
+    assert stats.open_databases == 1
+    assert stats.active_cursors == 0
+    manager.close_all()
+
+
+def test_idle_database_is_evicted(tmp_path: Path) -> None:
+    manager = DuckDBConnectionManager(idle_timeout=0.05)
+    db_path = tmp_path / "test.db"
+
+    manager.release(db_path, manager.acquire(db_path))
+    time.sleep(0.2)
+
+    stats = manager.stats()
+    assert stats.evicted == 1
+    assert stats.open_databases == 0
+
+    manager.release(db_path, manager.acquire(db_path))
+    assert manager.stats().opened == 2
+    manager.close_all()
+
+
+def test_registered_database_is_not_evicted(tmp_path: Path) -> None:
+    manager = DuckDBConnectionManager(idle_timeout=0.05)
+    db_path = tmp_path / "test.db"
+
+    manager.register(db_path)
+    manager.release(db_path, manager.acquire(db_path))
+    time.sleep(0.2)
+    assert manager.evict_idle() == 0
+
+    stats = manager.stats()
+    assert (stats.opened, stats.reused, stats.evicted) == (1, 1, 0)
+    assert stats.open_databases == 1
+    manager.unregister(db_path)
+    assert manager.stats().open_databases == 0
+
+
+def test_unregister_closes_unused_database(tmp_path: Path) -> None:
+    manager = DuckDBConnectionManager(idle_timeout=60)
+    db_path = tmp_path / "test.db"
+
+    manager.register(db_path)
+    manager.release(db_path, manager.acquire(db_path))
+    assert manager.stats().open_databases == 1
+
+    manager.unregister(db_path)
+    assert manager.stats().open_databases == 0
+
+
+def test_databases_are_opened_outside_the_lock(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    manager = DuckDBConnectionManager(idle_timeout=60)
+    slow, fast = tmp_path / "slow.db", tmp_path / "fast.db"
+    opening, proceed = threading.Event(), threading.Event()
+    connect = duckdb.connect
+
+    def slow_connect(database: str, *args: Any, **kwargs: Any) -> Any:
+        if database == str(slow.absolute()):
+            opening.set()
+            assert proceed.wait(5)
+        return connect(database, *args, **kwargs)
+
+    monkeypatch.setattr(duckdb, "connect", slow_connect)
+    threads = [
+        threading.Thread(target=lambda: manager.release(slow, manager.acquire(slow)))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    assert opening.wait(5)
+
+    # another database is served while the slow one is still opening
+    manager.release(fast, manager.acquire(fast))
+    proceed.set()
+    for thread in threads:
+        thread.join(5)
+
+    stats = manager.stats()
+    # the slow database was opened once for both of its callers
+    assert (stats.opened, stats.reused, stats.open_databases) == (2, 1, 2)
+    manager.close_all()
+
+
+def test_governor_splits_budget_across_busy_databases(tmp_path: Path) -> None:
+    governor = ResourceGovernor(
+        memory_budget_mb=1024,
+        thread_budget=4,
+        min_memory_mb=128,
+        temp_directory=str(tmp_path / "spill"),
+    )
+    manager = DuckDBConnectionManager(idle_timeout=60, governor=governor)
+    first, second = tmp_path / "first.db", tmp_path / "second.db"
+
+    def settings(cursor: duckdb.DuckDBPyConnection) -> tuple[Any, ...]:
+        return (
+            cursor.execute(
+                "SELECT current_setting('memory_limit'), current_setting('threads'),"
+                " current_setting('temp_directory')"
+            ).fetchone()
+            or ()
+        )
+
+    manager.register(first)
+    cursor = manager.acquire(first)
+    memory, threads, temp_directory = settings(cursor)
+    assert (memory, threads) == ("1.0 GiB", 4)
+    assert temp_directory.startswith(str(tmp_path / "spill"))
+
+    # an idle database only keeps a small cache, taken off the busy one's share
+    manager.register(second)
+    assert settings(cursor)[:2] == ("896.0 MiB", 4)
+    assert manager.allocations()[str(second.absolute())].memory_limit_mb == 128
+
+    # a cursor already checked out is held to the new share right away
+    other = manager.acquire(second)
+    assert settings(cursor)[:2] == settings(other)[:2] == ("512.0 MiB", 2)
+    assert len({a.temp_directory for a in manager.allocations().values()}) == 2
+
+    manager.release(second, other)
+    manager.unregister(second)
+    assert settings(cursor)[:2] == ("1.0 GiB", 4)
+    manager.release(first, cursor)
+    manager.close_all()
+
+
+def test_governor_never_hands_out_more_than_the_budget(tmp_path: Path) -> None:
+    governor = ResourceGovernor(
+        memory_budget_mb=1024,
+        thread_budget=4,
+        min_memory_mb=128,
+        temp_directory=str(tmp_path / "spill"),
+    )
+    manager = DuckDBConnectionManager(idle_timeout=60, governor=governor)
+    paths = [tmp_path / f"db{i}.db" for i in range(10)]
+    for path in paths:
+        manager.register(path)
+    cursors = [manager.acquire(path) for path in paths[:3]]
+
+    allocations = manager.allocations()
+    assert sum(a.memory_limit_mb for a in allocations.values()) <= 1024
+    # seven idle databases may keep half the budget between them at most
+    assert allocations[str(paths[-1].absolute())].memory_limit_mb == 73
+    assert allocations[str(paths[0].absolute())].memory_limit_mb == 171
+
+    for path, cursor in zip(paths, cursors):
+        manager.release(path, cursor)
+    manager.close_all()
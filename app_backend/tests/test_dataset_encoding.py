@@ -0,0 +1,92 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import polars as pl
+import pyarrow as pa
+import pytest
+from utils.dataset_encoding import (
+    ARROW_RESPONSE_METADATA_KEY,
+    ResponseFormat,
+    arrow_stream,
+    columnar_json_response,
+    negotiate_format,
+)
+from utils.schema import AnalystDataset, DatasetCleansedResponse
+
+DF = pl.DataFrame(
+    {"id": [1, 2, 3], "city": ["Paris", None, "Oslo"], "amount": [1.5, 2.0, None]}
+)
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, ResponseFormat.JSON),
+        ("*/*", ResponseFormat.JSON),
+        ("application/*", ResponseFormat.JSON),
+        ("application/vnd.columnar+json", ResponseFormat.COLUMNAR_JSON),
+        (
+            "application/json;q=0.5, application/vnd.apache.arrow.stream",
+            ResponseFormat.ARROW_STREAM,
+        ),
+        ("application/vnd.apache.arrow.stream;q=0, */*;q=0.1", ResponseFormat.JSON),
+        ("text/csv", None),
+    ],
+)
+def test_negotiate_format(accept: str | None, expected: ResponseFormat | None) -> None:
+    assert negotiate_format(accept) == expected
+
+
+def test_negotiate_format_only_offers_available_formats() -> None:
+    available = (ResponseFormat.JSON,)
+    assert negotiate_format("application/vnd.apache.arrow.stream", available) is None
+    assert negotiate_format("*/*", available) == ResponseFormat.JSON
+
+
+def _response() -> DatasetCleansedResponse:
+    return DatasetCleansedResponse(
+        dataset_name="sales",
+        cleaning_report=None,
+        dataset=AnalystDataset(name="sales", data=DF),
+    )
+
+
+def test_columnar_json_has_one_array_per_column() -> None:
+    body = json.loads(columnar_json_response(_response()))
+
+    assert body["dataset_name"] == "sales"
+    assert body["cleaning_report"] is None
+    assert body["dataset"]["columns"] == ["id", "city", "amount"]
+    assert body["dataset"]["row_count"] == 3
+    assert body["dataset"]["data"] == DF.to_dict(as_series=False)
+
+
+def test_columnar_json_without_a_dataset() -> None:
+    response = DatasetCleansedResponse(
+        dataset_name="sales", cleaning_report=None, dataset=None
+    )
+    assert json.loads(columnar_json_response(response))["dataset"] is None
+
+
+def test_arrow_stream_round_trips_the_dataset_and_response_fields() -> None:
+    reader = pa.ipc.open_stream(b"".join(arrow_stream(_response())))
+    table = reader.read_all()
+
+    df = pl.from_arrow(table)
+    assert isinstance(df, pl.DataFrame) and df.equals(DF)
+    metadata = json.loads(reader.schema.metadata[ARROW_RESPONSE_METADATA_KEY.encode()])
+    assert metadata["dataset_name"] == "sales"
+    assert "dataset" not in metadata
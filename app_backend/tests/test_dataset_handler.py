@@ -0,0 +1,384 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, cast
+
+import duckdb
+import polars as pl
+import pytest
+from utils import analyst_db
+from utils.analyst_db import (
+    DatasetHandler,
+    DatasetType,
+    DataSourceType,
+    SampleSpec,
+    _dataset_catalogs,
+)
+from utils.connection_manager import DuckDBConnectionManager
+
+
+async def test_catalog_answers_lookups_without_queries(
+    make_dataset_handler: Callable[..., Awaitable[DatasetHandler]],
+    connections: DuckDBConnectionManager,
+) -> None:
+    handler = await make_dataset_handler()
+    other = await make_dataset_handler()
+
+    df = pl.DataFrame({"a": [1, 2, 3]})
+    await handler.register_dataframe(
+        df, "sales", DatasetType.STANDARD, DataSourceType.FILE
+    )
+    await handler.register_dataframe(
+        df,
+        "sales_cleansed",
+        DatasetType.CLEANSED,
+        DataSourceType.FILE,
+        original_name="sales",
+    )
+
+    cursors = connections.stats().reused
+    assert await handler.table_exists("sales")
+    assert await handler.get_dataset_type("sales_cleansed") == DatasetType.CLEANSED
+    assert await handler.get_related_datasets("sales") == {
+        "cleansed": ["sales_cleansed"],
+        "dictionary": [],
+    }
+    metadata = await other.get_dataset_metadata("sales")
+    assert metadata.row_count == 3
+    assert metadata.columns == ["a"]
+    assert connections.stats().reused == cursors
+
+    await other.delete_dataset("sales_cleansed")
+    assert not await handler.table_exists("sales_cleansed")
+    assert [m.name for m in await handler.list_datasets()] == ["sales"]
+    # lookups keep returning the type and creation time as strings
+    assert cast(str, metadata.dataset_type) == "standard"
+    assert isinstance(metadata.created_at, str)
+
+    # the shared catalog is dropped with the last handler of the file
+    key = (str(handler.db_path.absolute()), None)
+    await handler.close()
+    assert key in _dataset_catalogs
+    await other.close()
+    assert key not in _dataset_catalogs
+
+
+async def test_query_dataframe_pages_in_duckdb(dataset_handler: DatasetHandler) -> None:
+    df = pl.DataFrame({"id": range(20_000), "value": [i % 7 for i in range(20_000)]})
+    await dataset_handler.register_dataframe(
+        df, "big", DatasetType.STANDARD, DataSourceType.FILE
+    )
+
+    page = await dataset_handler.query_dataframe("big", offset=15_000, limit=3)
+    assert page["id"].to_list() == [15_000, 15_001, 15_002]
+
+    page = await dataset_handler.query_dataframe(
+        "big", limit=2, columns=["id"], order_by="id", descending=True
+    )
+    assert page.columns == ["id"]
+    assert page["id"].to_list() == [19_999, 19_998]
+
+    with pytest.raises(ValueError):
+        await dataset_handler.query_dataframe("big", columns=["missing"])
+    with pytest.raises(ValueError):
+        await dataset_handler.query_dataframe("big", expected_type=DatasetType.CLEANSED)
+
+
+async def test_get_dataframe_pushes_down_projection_filter_and_sample(
+    dataset_handler: DatasetHandler,
+) -> None:
+    df = pl.DataFrame(
+        {"id": range(1000), "group": [i % 4 for i in range(1000)], "x": 1.0}
+    )
+    await dataset_handler.register_dataframe(
+        df, "points", DatasetType.STANDARD, DataSourceType.FILE
+    )
+
+    filtered = await dataset_handler.get_dataframe(
+        "points", columns=["id", "group"], filter='"group" = 1'
+    )
+    assert filtered.columns == ["id", "group"]
+    assert filtered["group"].unique().to_list() == [1]
+    assert await dataset_handler.count_rows("points") == 1000
+    assert await dataset_handler.count_rows("points", filter='"group" = 1') == 250
+
+    spec = SampleSpec(rows=20, seed=7)
+    sample = await dataset_handler.get_dataframe("points", columns=["id"], sample=spec)
+    assert len(sample) == 20
+    again = await dataset_handler.get_dataframe("points", columns=["id"], sample=spec)
+    assert sample["id"].to_list() == again["id"].to_list()
+
+    with pytest.raises(ValueError):
+        SampleSpec(rows=1, percent=1.0).to_sql()
+
+
+async def test_parquet_storage_tier(
+    tmp_path: Path, make_dataset_handler: Callable[..., Awaitable[DatasetHandler]]
+) -> None:
+    handler = await make_dataset_handler(use_parquet_storage=True)
+    df = pl.DataFrame({"id": range(100), "name": [f"n{i}" for i in range(100)]})
+    await handler.register_dataframe(
+        df, "parquet", DatasetType.STANDARD, DataSourceType.FILE
+    )
+
+    metadata = await handler.get_dataset_metadata("parquet")
+    assert metadata.storage_path
+    parquet_file = handler.parquet_dir / metadata.storage_path
+    assert parquet_file.exists()
+    assert (await handler.get_dataframe("parquet")).equals(df)
+    assert len(await handler.get_dataframe("parquet", max_rows=5)) == 5
+    await handler.close()
+
+    # the views follow the database file to another directory
+    moved_path = tmp_path / "moved"
+    moved_path.mkdir()
+    for path in (handler.db_path, handler.parquet_dir):
+        path.rename(moved_path / path.name)
+    handler = await make_dataset_handler(db_path=moved_path, use_parquet_storage=True)
+    assert (await handler.get_dataframe("parquet")).equals(df)
+
+    parquet_file = handler.parquet_dir / metadata.storage_path
+    await handler.delete_dataset("parquet")
+    assert not parquet_file.exists()
+    assert not await handler.table_exists("parquet")
+
+
+async def test_column_profiles_are_stored_at_registration(
+    dataset_handler: DatasetHandler,
+) -> None:
+    df = pl.DataFrame({"value": [1.0, 2.0, 3.0, None], "city": ["a", "b", "a", None]})
+    await dataset_handler.register_dataframe(
+        df, "sales", DatasetType.STANDARD, DataSourceType.FILE
+    )
+
+    value, city = await dataset_handler.get_column_profiles("sales")
+    assert (value.column, value.null_count, value.distinct_count) == (
+        "value",
+        1,
+        4,
+    )
+    assert (value.min, value.max, value.mean) == (1.0, 3.0, 2.0)
+    assert value.quantiles["50%"] == 2.0
+    assert [(v.value, v.count) for v in city.top_values] == [("a", 2), ("b", 1)]
+    assert city.summary()["top"] == {"a": 2, "b": 1}
+
+    # datasets registered without profiles are profiled on first access
+    async with dataset_handler._get_connection() as conn:
+        conn.execute("DELETE FROM column_profiles")
+    assert await dataset_handler.get_column_profiles("sales") == [value, city]
+
+    await dataset_handler.delete_dataset("sales")
+    async with dataset_handler._get_connection() as conn:
+        assert conn.execute("SELECT count(*) FROM column_profiles").fetchone() == (0,)
+
+
+async def test_bulk_delete_drops_all_targets_in_one_transaction(
+    dataset_handler: DatasetHandler, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(analyst_db, "DELETE_CHECKPOINT_ROWS", 4)
+
+    checkpoints: list[str] = []
+    monkeypatch.setattr(
+        dataset_handler, "_checkpoint", lambda: checkpoints.append("db")
+    )
+    df = pl.DataFrame({"id": [1, 2]})
+    for name in ("sales", "costs"):
+        await dataset_handler.register_dataframe(
+            df, name, DatasetType.STANDARD, DataSourceType.FILE
+        )
+        await dataset_handler.register_dataframe(
+            df,
+            f"{name}_cleansed",
+            DatasetType.CLEANSED,
+            DataSourceType.GENERATED,
+            original_name=name,
+        )
+    await dataset_handler.register_dataframe(
+        df.clear(), "empty", DatasetType.STANDARD, DataSourceType.FILE
+    )
+
+    await dataset_handler.delete_empty_datasets()
+    await dataset_handler.delete_related_datasets("sales")
+    assert sorted(d.name for d in await dataset_handler.list_datasets()) == [
+        "costs",
+        "costs_cleansed",
+        "sales",
+    ]
+    assert await dataset_handler.delete_datasets(["sales", "missing"]) == ["sales"]
+    assert checkpoints == []
+    # only the delete freeing four rows is large enough to checkpoint
+    await dataset_handler.delete_all_datasets()
+    assert await dataset_handler.list_datasets() == []
+    assert checkpoints == ["db"]
+
+    async with dataset_handler._get_connection() as conn:
+        tables = conn.execute(
+            "SELECT table_name FROM information_schema.tables ORDER BY 1"
+        ).fetchall()
+        profiles = conn.execute("SELECT count(*) FROM column_profiles").fetchone()
+    assert [t[0] for t in tables] == [
+        "cleansing_reports",
+        "column_profiles",
+        "dataset_metadata",
+        "db_version",
+        "stale_artifacts",
+    ]
+    assert profiles == (0,)
+
+
+@pytest.mark.parametrize("use_parquet_storage", [False, True])
+async def test_failed_registrations_leave_nothing_behind(
+    make_dataset_handler: Callable[..., Awaitable[DatasetHandler]],
+    monkeypatch: pytest.MonkeyPatch,
+    use_parquet_storage: bool,
+) -> None:
+    def fail(*args: object) -> None:
+        raise duckdb.ConstraintException("profiles rejected")
+
+    handler = await make_dataset_handler(use_parquet_storage=use_parquet_storage)
+    monkeypatch.setattr(analyst_db, "_store_column_profiles", fail)
+    with pytest.raises(duckdb.ConstraintException):
+        await handler.register_dataframe(
+            pl.DataFrame({"id": [1]}),
+            "sales",
+            DatasetType.STANDARD,
+            DataSourceType.FILE,
+        )
+
+    # the table or view and the catalog row were rolled back with the profiles
+    assert await handler.list_datasets() == []
+    async with handler._get_connection() as conn:
+        assert conn.execute(
+            "SELECT count(*) FROM duckdb_tables() WHERE table_name = 'sales'"
+            " UNION ALL"
+            " SELECT count(*) FROM duckdb_views() WHERE view_name = 'sales'"
+        ).fetchall() == [(0,), (0,)]
+    assert not list(handler.parquet_dir.glob("*.parquet"))
+    assert not handler._pending_uploads
+
+
+@pytest.mark.parametrize("use_parquet_storage", [False, True])
+async def test_register_csv_streams_the_file_into_duckdb(
+    tmp_path: Path,
+    make_dataset_handler: Callable[..., Awaitable[DatasetHandler]],
+    use_parquet_storage: bool,
+) -> None:
+    csv_path = tmp_path / "it's sales.csv"
+    csv_path.write_text("id,city\n1,Paris\n2,\n3,Oslo\n")
+
+    handler = await make_dataset_handler(use_parquet_storage=use_parquet_storage)
+    await handler.register_csv(
+        csv_path, "it's sales", DataSourceType.FILE, file_size=42
+    )
+    with pytest.raises(ValueError):
+        await handler.register_csv(csv_path, "it's sales", DataSourceType.FILE)
+
+    metadata = await handler.get_dataset_metadata("it's sales")
+    assert (metadata.columns, metadata.row_count, metadata.file_size) == (
+        ["id", "city"],
+        3,
+        42,
+    )
+    assert (metadata.storage_path is not None) == use_parquet_storage
+    df = await handler.get_dataframe("it's sales", DatasetType.STANDARD)
+    assert df.to_dict(as_series=False) == {
+        "id": [1, 2, 3],
+        "city": ["Paris", None, "Oslo"],
+    }
+    # profiled by DuckDB while loading, never in Python
+    async with handler._get_connection() as conn:
+        assert conn.execute("SELECT count(*) FROM column_profiles").fetchone() == (2,)
+    _, city = await handler.get_column_profiles("it's sales")
+    assert city.null_count == 1
+    assert [(v.value, v.count) for v in city.top_values] == [
+        ("Oslo", 1),
+        ("Paris", 1),
+    ]
+
+
+@pytest.mark.parametrize("use_parquet_storage", [False, True])
+async def test_register_csv_profiles_a_header_only_file(
+    tmp_path: Path,
+    make_dataset_handler: Callable[..., Awaitable[DatasetHandler]],
+    use_parquet_storage: bool,
+) -> None:
+    csv_path = tmp_path / "empty.csv"
+    csv_path.write_text("id,city\n")
+
+    handler = await make_dataset_handler(use_parquet_storage=use_parquet_storage)
+    await handler.register_csv(csv_path, "empty", DataSourceType.FILE)
+
+    profiles = await handler.get_column_profiles("empty")
+    assert [(p.column, p.count, p.null_count, p.distinct_count) for p in profiles] == [
+        ("id", 0, 0, 0),
+        ("city", 0, 0, 0),
+    ]
+    assert [p.top_values for p in profiles] == [[], []]
+
+
+async def test_cancelled_queries_are_interrupted(
+    dataset_handler: DatasetHandler,
+) -> None:
+    async with dataset_handler._get_connection() as conn:
+        started = time.monotonic()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                dataset_handler.execute_query(
+                    conn, "SELECT sum(range) FROM range(1_000_000_000_000)"
+                ),
+                0.1,
+            )
+        # the query was stopped rather than left running on the cursor
+        assert time.monotonic() - started < 10
+        result = await dataset_handler.execute_query(conn, "SELECT 42")
+        assert result.fetchone() == (42,)
+
+
+async def test_conflicting_transactions_are_retried(
+    dataset_handler: DatasetHandler, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(analyst_db, "TRANSACTION_RETRY_DELAY", 0)
+
+    attempts: list[int] = []
+
+    def work(conn: duckdb.DuckDBPyConnection) -> int:
+        attempts.append(len(attempts) + 1)
+        conn.execute("CREATE OR REPLACE TABLE counter AS SELECT 1 AS n")
+        if len(attempts) < 2:
+            raise duckdb.TransactionException("Conflict on update!")
+        return len(attempts)
+
+    assert await dataset_handler.run_transaction(work) == 2
+
+    def conflict(conn: duckdb.DuckDBPyConnection) -> None:
+        attempts.append(len(attempts) + 1)
+        raise duckdb.TransactionException("Conflict on update!")
+
+    attempts.clear()
+    with pytest.raises(duckdb.TransactionException):
+        await dataset_handler.run_transaction(conflict)
+    assert len(attempts) == analyst_db.TRANSACTION_MAX_ATTEMPTS
+
+    # other errors are not retried
+    def fail(conn: duckdb.DuckDBPyConnection) -> None:
+        attempts.append(len(attempts) + 1)
+        raise ValueError("invalid")
+
+    attempts.clear()
+    with pytest.raises(ValueError):
+        await dataset_handler.run_transaction(fail)
+    assert attempts == [1]
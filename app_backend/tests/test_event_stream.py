@@ -0,0 +1,294 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import json
+from types import SimpleNamespace
+from typing import Any, AsyncGenerator, cast
+
+import pytest
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from utils import rest_api
+from utils.analyst_db import AnalystDB
+from utils.api import AnalysisGenerationError
+from utils.event_stream import EventBroker, ServerSentEvent
+from utils.job_scheduler import JobPriority, JobScheduler, JobState
+from utils.schema import AnalystChatMessage, ChatRequest
+
+
+async def test_subscribers_resume_after_their_last_event() -> None:
+    broker = EventBroker()
+    with broker.publisher("topic") as channel:
+        first = channel.publish("progress", '"one"')
+        channel.publish("progress", '"two"')
+
+        received: list[str] = []
+
+        async def listen() -> None:
+            async for message in channel.subscribe(first.id, heartbeat=60):
+                assert message is not None
+                received.append(message.data)
+
+        listener = asyncio.create_task(listen())
+        await asyncio.sleep(0)
+        channel.publish("progress", '"three"')
+        await asyncio.sleep(0)
+    # closing the channel ends the subscription once it is drained
+    await asyncio.wait_for(listener, 1)
+    assert received == ['"two"', '"three"']
+
+
+async def test_idle_subscriptions_get_heartbeats() -> None:
+    channel = EventBroker().open("topic")
+    subscription = channel.subscribe(heartbeat=0.01)
+    assert await subscription.__anext__() is None
+    channel.publish("progress", "{}")
+    message = await subscription.__anext__()
+    assert isinstance(message, ServerSentEvent)
+    assert (
+        message.encode()
+        == f"id: {message.id}\nevent: progress\ndata: {{}}\n\n".encode()
+    )
+    await subscription.aclose()
+    assert channel.subscribers == 0
+
+
+async def test_finished_channels_are_kept_for_the_retention_period() -> None:
+    broker = EventBroker(retention=60)
+    with broker.publisher("kept"):
+        pass
+    assert broker.get("kept") is not None
+
+    broker = EventBroker(retention=0)
+    with broker.publisher("held", close=False) as channel:
+        assert broker.get("held") is channel
+    with broker.publisher("dropped"):
+        pass
+    assert broker.get("held") is None
+    assert broker.get("dropped") is None
+    # ids keep increasing across channels
+    earlier = channel.publish("e", "{}")
+    assert broker.open("next").publish("e", "{}").id > earlier.id
+
+
+def _request(last_event_id: int | None = None) -> Request:
+    headers = [(b"last-event-id", str(last_event_id).encode())] if last_event_id else []
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+async def _read(response: Any) -> list[tuple[str, Any]]:
+    assert isinstance(response, StreamingResponse)
+    events = []
+    async for chunk in response.body_iterator:
+        assert isinstance(chunk, bytes)
+        fields: dict[str, str] = {}
+        for line in chunk.decode().strip().splitlines():
+            key, _, value = line.partition(": ")
+            fields[key] = value
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+async def test_analysis_components_are_streamed_as_they_are_produced(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    async def run_complete_analysis(
+        **kwargs: Any,
+    ) -> AsyncGenerator[Any, None]:
+        yield "rephrased question"
+        yield AnalysisGenerationError("analysis failed")
+
+    async def list_analyst_datasets(*args: Any) -> list[str]:
+        return []
+
+    monkeypatch.setattr(rest_api, "run_complete_analysis", run_complete_analysis)
+    analyst_db = cast(
+        AnalystDB,
+        SimpleNamespace(user_id="user", list_analyst_datasets=list_analyst_datasets),
+    )
+
+    with pytest.raises(rest_api.HTTPException):
+        await rest_api.stream_analysis_events(
+            _request(), "chat", "message", analyst_db=analyst_db
+        )
+    rest_api.events.open(rest_api._analysis_events_key("user", "chat", "message"))
+    response = await rest_api.stream_analysis_events(
+        _request(), "chat", "message", analyst_db=analyst_db
+    )
+    await rest_api.run_complete_analysis_task(
+        ChatRequest(messages=[{"role": "user", "content": "question"}]),
+        "file",
+        analyst_db,
+        "chat",
+        "message",
+        True,
+        True,
+        _request(),
+    )
+    assert await _read(response) == [
+        (
+            "component",
+            {"type": "enhanced_question", "message_id": "message"},
+        ),
+        ("failed", {"message": "analysis failed"}),
+        ("done", {}),
+    ]
+
+    # a client that saw everything is told not to reconnect
+    channel = rest_api.events.get(
+        rest_api._analysis_events_key("user", "chat", "message")
+    )
+    assert channel is not None
+    finished = await rest_api.stream_analysis_events(
+        _request(channel.last_event_id), "chat", "message", analyst_db=analyst_db
+    )
+    assert finished.status_code == 204
+
+
+async def test_processing_subscribers_start_at_the_tail() -> None:
+    analyst_db = cast(AnalystDB, SimpleNamespace(user_id="tail"))
+
+    channel = rest_api.events.open(rest_api._processing_events_key("tail"))
+    earlier = channel.publish("progress", '{"message": "earlier batch"}')
+    channel.publish("complete", "{}")
+
+    response = await rest_api.stream_processing_events(
+        _request(), analyst_db=analyst_db
+    )
+    resumed = await rest_api.stream_processing_events(
+        _request(earlier.id), analyst_db=analyst_db
+    )
+    channel.publish("progress", '{"message": "new batch"}')
+    channel.close()
+    assert await _read(response) == [("progress", {"message": "new batch"})]
+    assert await _read(resumed) == [
+        ("complete", {}),
+        ("progress", {"message": "new batch"}),
+    ]
+
+
+async def test_cancelling_an_analysis_stops_its_pipeline(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    started = asyncio.Event()
+
+    async def run_complete_analysis(
+        **kwargs: Any,
+    ) -> AsyncGenerator[Any, None]:
+        yield "rephrased question"
+        started.set()
+        # stands in for an LLM call that never returns
+        await asyncio.Event().wait()
+        yield "unreachable"
+
+    async def list_analyst_datasets(*args: Any) -> list[str]:
+        return []
+
+    monkeypatch.setattr(rest_api, "run_complete_analysis", run_complete_analysis)
+    monkeypatch.setattr(rest_api, "jobs", JobScheduler())
+    analyst_db = cast(
+        AnalystDB,
+        SimpleNamespace(user_id="user", list_analyst_datasets=list_analyst_datasets),
+    )
+
+    key = rest_api._analysis_events_key("user", "chat", "cancelled")
+    rest_api.events.open(key)
+    response = await rest_api.stream_analysis_events(
+        _request(), "chat", "cancelled", analyst_db=analyst_db
+    )
+    job = rest_api.jobs.submit(
+        "user",
+        "analysis",
+        JobPriority.INTERACTIVE,
+        lambda: rest_api.run_complete_analysis_task(
+            ChatRequest(messages=[{"role": "user", "content": "question"}]),
+            "file",
+            analyst_db,
+            "chat",
+            "cancelled",
+            True,
+            True,
+            _request(),
+        ),
+        key=("chat", "cancelled"),
+    )
+    await started.wait()
+
+    cancelled = await rest_api.cancel_chat_message_analysis(
+        "chat", "cancelled", analyst_db=analyst_db
+    )
+    assert cancelled["id"] == job.id
+    assert job.state == JobState.CANCELLED
+    assert await _read(response) == [
+        ("component", {"type": "enhanced_question", "message_id": "cancelled"}),
+        ("failed", {"message": "Analysis cancelled"}),
+        ("done", {}),
+    ]
+    with pytest.raises(rest_api.HTTPException):
+        await rest_api.cancel_chat_message_analysis(
+            "chat", "cancelled", analyst_db=analyst_db
+        )
+
+
+async def test_cancelling_a_queued_analysis_job_ends_its_message_and_stream(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(rest_api, "jobs", JobScheduler(max_concurrent=1))
+    message = AnalystChatMessage(
+        role="user", content="question", components=[], id="queued", chat_id="chat"
+    )
+    updated: list[AnalystChatMessage] = []
+
+    async def get_chat_message(message_id: str) -> AnalystChatMessage | None:
+        return message if message_id == message.id else None
+
+    async def update_chat_message(message_id: str, message: AnalystChatMessage) -> None:
+        updated.append(message)
+
+    analyst_db = cast(
+        AnalystDB,
+        SimpleNamespace(
+            user_id="user",
+            get_chat_message=get_chat_message,
+            update_chat_message=update_chat_message,
+        ),
+    )
+
+    # the only slot is taken, so the analysis stays queued
+    blocker = rest_api.jobs.submit(
+        "user", "cleansing", JobPriority.BULK, asyncio.Event().wait
+    )
+    job = rest_api.jobs.submit(
+        "user",
+        "analysis",
+        JobPriority.INTERACTIVE,
+        asyncio.Event().wait,
+        key=("chat", "queued"),
+    )
+    rest_api.events.open(rest_api._analysis_events_key("user", "chat", "queued"))
+    response = await rest_api.stream_analysis_events(
+        _request(), "chat", "queued", analyst_db=analyst_db
+    )
+
+    cancelled = await rest_api.cancel_job(job.id, analyst_db=analyst_db)
+    assert cancelled["state"] == JobState.CANCELLED.value
+    assert [(m.in_progress, m.error) for m in updated] == [
+        (False, "Analysis cancelled")
+    ]
+    assert await _read(response) == [
+        ("failed", {"message": "Analysis cancelled"}),
+        ("done", {}),
+    ]
+    await rest_api.jobs.stop(blocker.id)
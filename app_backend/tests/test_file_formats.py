@@ -0,0 +1,80 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+from pathlib import Path
+
+import duckdb
+import polars as pl
+import pytest
+from utils.analyst_db import AnalystDB, DataSourceType
+from utils.file_formats import read_columnar, split_extension
+from utils.schema import AnalystDataset
+
+DF = pl.DataFrame({"id": [1, 2, 3], "city": ["Paris", None, "Oslo"]})
+
+
+def test_split_extension_keeps_compression_suffixes() -> None:
+    assert split_extension("Sales.2024.CSV.GZ") == ("Sales.2024", ".csv.gz")
+    assert split_extension("sales.csv.zst") == ("sales", ".csv.zst")
+    assert split_extension("sales.feather") == ("sales", ".feather")
+    assert split_extension("sales.json") == ("sales", ".json")
+    assert split_extension("sales") == ("sales", "")
+
+
+@pytest.mark.parametrize("extension", [".parquet", ".arrow", ".feather"])
+def test_columnar_files_are_read_from_paths_and_buffers(
+    tmp_path: Path, extension: str
+) -> None:
+    path = tmp_path / f"sales{extension}"
+    if extension == ".parquet":
+        DF.write_parquet(path)
+    else:
+        DF.write_ipc(path)
+    assert read_columnar(path, extension).equals(DF)
+    with path.open("rb") as f:
+        assert read_columnar(f, extension).equals(DF)
+
+
+@pytest.mark.parametrize("extension", [".csv.gz", ".csv.zst"])
+async def test_compressed_csv_files_are_registered(
+    tmp_path: Path, extension: str
+) -> None:
+    path = tmp_path / f"sales{extension}"
+    if extension == ".csv.gz":
+        path.write_bytes(gzip.compress(DF.write_csv().encode()))
+    else:
+        with duckdb.connect() as conn:
+            conn.register("df", DF.to_arrow())
+            conn.execute(f"COPY df TO '{path}' (HEADER, COMPRESSION zstd)")
+
+    db = await AnalystDB.create(
+        user_id="user", db_path=tmp_path, use_parquet_storage=False
+    )
+    size = path.stat().st_size
+    await db.register_csv(path, "sales", DataSourceType.FILE, file_size=size)
+    assert (await db.get_dataset("sales")).to_df().equals(DF)
+    metadata = await db.dataset_handler.get_dataset_metadata("sales")
+    assert metadata.file_size == size
+
+    # columnar files go through register_dataframe
+    parquet = tmp_path / "costs.parquet"
+    DF.write_parquet(parquet)
+    await db.register_dataset(
+        AnalystDataset(name="costs", data=read_columnar(parquet, ".parquet")),
+        DataSourceType.FILE,
+        file_size=parquet.stat().st_size,
+    )
+    assert (await db.get_dataset("costs")).to_df().equals(DF)
+    await db.close()
@@ -0,0 +1,249 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+from pathlib import Path
+from typing import Iterator
+
+import polars as pl
+import pyarrow as pa
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from utils import rest_api
+from utils.analyst_db import AnalystDB, DataSourceType
+from utils.http_encoding import (
+    CompressionMiddleware,
+    choose_encoding,
+    etag_matches,
+    make_etag,
+)
+from utils.schema import AnalystChatMessage, AnalystDataset
+
+BODY = b'{"data": "' + b"x" * 4096 + b'"}'
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get("/body")
+    def body() -> Response:
+        return Response(BODY, media_type="application/json", headers={"ETag": '"abc"'})
+
+    @app.get("/small")
+    def small() -> Response:
+        return Response(b"{}", media_type="application/json")
+
+    @app.get("/stream")
+    def stream() -> StreamingResponse:
+        def chunks() -> Iterator[bytes]:
+            yield BODY
+            yield BODY
+
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        (None, None),
+        ("identity", None),
+        ("gzip, deflate", "gzip"),
+        ("gzip, deflate, br", "br"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("*", "br"),
+        ("br;q=0, *", "gzip"),
+    ],
+)
+def test_choose_encoding(accept_encoding: str | None, expected: str | None) -> None:
+    assert choose_encoding(accept_encoding) == expected
+
+
+def test_etag_matches_ignores_weakness_and_encoding_suffixes() -> None:
+    etag = make_etag("chat", 1)
+    assert etag != make_etag("chat", 2)
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches(f'{etag[:-1]}-br"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches(make_etag("chat", 2), etag)
+
+
+@pytest.mark.parametrize("encoding", ["br", "gzip"])
+def test_responses_are_compressed_with_the_preferred_encoding(encoding: str) -> None:
+    client = _client()
+    response = client.get("/body", headers={"Accept-Encoding": encoding})
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == f'"abc-{encoding}"'
+    assert int(response.headers["content-length"]) < len(BODY)
+    # the client decodes both encodings transparently
+    assert response.content == BODY
+
+    streamed = client.get("/stream", headers={"Accept-Encoding": encoding})
+    assert streamed.headers["content-encoding"] == encoding
+    assert "content-length" not in streamed.headers
+    assert streamed.content == BODY * 2
+
+
+def test_small_and_unaccepted_responses_are_not_compressed() -> None:
+    client = _client()
+    small = client.get("/small", headers={"Accept-Encoding": "br"})
+    assert "content-encoding" not in small.headers
+    identity = client.get("/body", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.headers["etag"] == '"abc"'
+
+
+def _request(if_none_match: str | None = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+async def test_chat_reads_are_conditional_on_the_last_update(tmp_path: Path) -> None:
+    db = await AnalystDB.create(
+        user_id="user", db_path=tmp_path, use_parquet_storage=False
+    )
+    chat_id = await db.create_chat("chat")
+    await db.add_chat_message(
+        chat_id, AnalystChatMessage(role="user", content="hi", components=[])
+    )
+
+    response = Response()
+    messages = await rest_api.get_chat_messages(
+        _request(), response, chat_id, analyst_db=db
+    )
+    assert isinstance(messages, list) and len(messages) == 1
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, no-cache"
+
+    # an unchanged chat is answered without loading its messages
+    not_modified = await rest_api.get_chat_messages(
+        _request(f'{etag[:-1]}-gzip"'), Response(), chat_id, analyst_db=db
+    )
+    assert isinstance(not_modified, Response)
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+
+    # the stubbed listing is a representation of its own
+    stubs = Response()
+    await rest_api.get_chat(
+        _request(etag), stubs, chat_id, include_payloads=False, analyst_db=db
+    )
+    assert stubs.headers["etag"] != etag
+
+    # any write to the chat changes the version
+    await db.add_chat_message(
+        chat_id,
+        AnalystChatMessage(role="assistant", content="hello", components=[]),
+    )
+    response = Response()
+    messages = await rest_api.get_chat_messages(
+        _request(etag), response, chat_id, analyst_db=db
+    )
+    assert isinstance(messages, list) and len(messages) == 2
+    assert response.headers["etag"] != etag
+    await db.close()
+
+
+async def test_dataset_pages_are_conditional_on_the_stored_dataset(
+    tmp_path: Path,
+) -> None:
+    async def get_page(db: AnalystDB, if_none_match: str | None = None) -> Response:
+        response = Response()
+        page = await rest_api.get_cleansed_dataset(
+            _request(if_none_match), response, "sales", columns=None, analyst_db=db
+        )
+        return page if isinstance(page, Response) else response
+
+    async def open_db() -> AnalystDB:
+        return await AnalystDB.create(
+            user_id="user", db_path=tmp_path, use_parquet_storage=False
+        )
+
+    db = await open_db()
+    df = pl.DataFrame({"id": [1, 2, 3]})
+    await db.register_dataset(
+        AnalystDataset(name="sales", data=df), DataSourceType.FILE
+    )
+    etag = (await get_page(db)).headers["etag"]
+    assert (await get_page(db, etag)).status_code == 304
+    # other datasets leave the page as it is
+    await db.register_dataset(
+        AnalystDataset(name="other", data=df), DataSourceType.FILE
+    )
+    assert (await get_page(db, etag)).status_code == 304
+    await db.close()
+
+    # the version outlives the in-memory catalog
+    db = await open_db()
+    assert (await get_page(db, etag)).status_code == 304
+    await db.delete_table("sales")
+    await db.register_dataset(
+        AnalystDataset(name="sales", data=df.head(2)), DataSourceType.FILE
+    )
+    await db.close()
+
+    db = await open_db()
+    assert (await get_page(db, etag)).headers["etag"] != etag
+    await db.close()
+
+
+async def test_arrow_pages_are_streamed_from_duckdb(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(rest_api, "ARROW_BATCH_ROWS", 2)
+    db = await AnalystDB.create(
+        user_id="user", db_path=tmp_path, use_parquet_storage=False
+    )
+    await db.register_dataset(
+        AnalystDataset(name="sales", data=pl.DataFrame({"id": [1, 2, 3, 4, 5]})),
+        DataSourceType.FILE,
+    )
+    request = Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "headers": [(b"accept", rest_api.ARROW_STREAM_MEDIA_TYPE.encode())],
+        }
+    )
+    response = await rest_api.get_cleansed_dataset(
+        request,
+        Response(),
+        "sales",
+        skip=1,
+        limit=3,
+        columns=None,
+        order_by="id",
+        descending=True,
+        analyst_db=db,
+    )
+    assert isinstance(response, StreamingResponse)
+    body = b""
+    async for chunk in response.body_iterator:
+        assert isinstance(chunk, bytes)
+        body += chunk
+
+    reader = pa.ipc.open_stream(body)
+    batches = list(reader)
+    assert [batch.num_rows for batch in batches] == [2, 1]
+    assert pa.Table.from_batches(batches)["id"].to_pylist() == [4, 3, 2]
+    metadata = json.loads(reader.schema.metadata[b"response"])
+    assert (metadata["dataset_name"], metadata["total_rows"]) == ("sales", 5)
+    await db.close()
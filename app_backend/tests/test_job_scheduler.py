@@ -0,0 +1,161 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+from typing import Awaitable, Callable
+
+from utils.job_scheduler import JobPriority, JobScheduler, JobState
+
+
+def _blocked() -> tuple[asyncio.Event, Callable[[], Awaitable[None]]]:
+    release = asyncio.Event()
+
+    async def work() -> None:
+        await release.wait()
+
+    return release, work
+
+
+async def test_jobs_respect_global_and_per_user_limits() -> None:
+    scheduler = JobScheduler(max_concurrent=2, max_per_user=1, interactive_reserved=0)
+    release, work = _blocked()
+    first = scheduler.submit("alice", "processing", JobPriority.BULK, work)
+    second = scheduler.submit("alice", "processing", JobPriority.BULK, work)
+    other = scheduler.submit("bob", "processing", JobPriority.BULK, work)
+    third = scheduler.submit("carol", "processing", JobPriority.BULK, work)
+
+    # alice's second job waits for her first, bob's starts in the free slot
+    assert [job.state for job in (first, second, other, third)] == [
+        JobState.RUNNING,
+        JobState.QUEUED,
+        JobState.RUNNING,
+        JobState.QUEUED,
+    ]
+    stats = scheduler.stats()
+    assert (stats.running, stats.queued_bulk) == (2, 2)
+
+    release.set()
+    while scheduler.stats().running:
+        await asyncio.sleep(0)
+    assert all(job.state == JobState.SUCCEEDED for job in (first, second, other, third))
+    assert scheduler.stats().succeeded == 4
+
+
+async def test_interactive_jobs_skip_the_bulk_queue() -> None:
+    scheduler = JobScheduler(max_concurrent=2, max_per_user=5)
+    release, work = _blocked()
+    bulk = [
+        scheduler.submit("alice", "processing", JobPriority.BULK, work)
+        for _ in range(3)
+    ]
+    # one slot is kept free of bulk jobs
+    assert [job.state for job in bulk] == [
+        JobState.RUNNING,
+        JobState.QUEUED,
+        JobState.QUEUED,
+    ]
+    analysis = scheduler.submit("bob", "analysis", JobPriority.INTERACTIVE, work)
+    assert analysis.state == JobState.RUNNING
+
+    release.set()
+    while scheduler.stats().running:
+        await asyncio.sleep(0)
+    assert all(job.state == JobState.SUCCEEDED for job in bulk)
+
+
+async def test_jobs_can_be_cancelled_and_failures_are_recorded() -> None:
+    scheduler = JobScheduler(max_concurrent=1, max_per_user=1, max_queued=1)
+    _, work = _blocked()
+
+    async def fail() -> None:
+        raise ValueError("broken dataset")
+
+    running = scheduler.submit("alice", "analysis", JobPriority.INTERACTIVE, work)
+    queued = scheduler.submit("alice", "processing", JobPriority.BULK, work)
+    assert not scheduler.admit()
+
+    assert scheduler.cancel(queued.id)
+    assert queued.state == JobState.CANCELLED
+    assert scheduler.admit()
+    failing = scheduler.submit("alice", "processing", JobPriority.BULK, fail)
+
+    assert scheduler.cancel(running.id)
+    while scheduler.stats().running:
+        await asyncio.sleep(0)
+    assert running.state == JobState.CANCELLED
+    assert failing.state == JobState.FAILED
+    assert failing.error == "broken dataset"
+    assert not scheduler.cancel(failing.id)
+
+    assert [job.id for job in scheduler.jobs("alice")] == [
+        running.id,
+        queued.id,
+        failing.id,
+    ]
+    stats = scheduler.stats()
+    assert (stats.cancelled, stats.failed, stats.rejected) == (2, 1, 1)
+
+
+async def test_jobs_are_found_by_key_and_stopped() -> None:
+    scheduler = JobScheduler(max_concurrent=1, max_per_user=1)
+    stopped: list[str] = []
+
+    async def work() -> None:
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            await asyncio.sleep(0)
+            stopped.append("cleaned up")
+            raise
+
+    running = scheduler.submit(
+        "alice", "analysis", JobPriority.INTERACTIVE, work, key=("chat", "one")
+    )
+    queued = scheduler.submit(
+        "alice", "analysis", JobPriority.INTERACTIVE, work, key=("chat", "two")
+    )
+    await asyncio.sleep(0)
+    assert scheduler.find("alice", "chat") == [running, queued]
+    assert scheduler.find("alice", "chat", "one") == [running]
+    assert scheduler.find("bob", "chat") == []
+
+    # stop returns only once the job has run its cleanup
+    assert await scheduler.stop(running.id)
+    assert stopped == ["cleaned up"]
+    assert running.state == JobState.CANCELLED
+    assert scheduler.find("alice", "chat", "one") == []
+    assert not await scheduler.stop(running.id)
+    await scheduler.shutdown()
+
+
+async def test_waiting_for_the_jobs_of_a_user() -> None:
+    scheduler = JobScheduler(max_concurrent=1, max_per_user=1)
+    release = asyncio.Event()
+
+    async def work() -> None:
+        await release.wait()
+
+    first = scheduler.submit("alice", "cleansing", JobPriority.BULK, work)
+    second = scheduler.submit(
+        "alice", "analysis", JobPriority.INTERACTIVE, work, key=("chat", "one")
+    )
+    assert scheduler.find("alice") == [first, second]
+
+    waiter = asyncio.create_task(scheduler.wait("alice"))
+    await asyncio.sleep(0)
+    assert not waiter.done()
+    release.set()
+    await asyncio.wait_for(waiter, 1)
+    assert first.done and second.done
+    assert scheduler.find("alice") == []
@@ -30,3 +30,9 @@ def test_favicon_file() -> None:
     assert response.status_code == 200
     assert response.headers["content-type"] == "image/png"
     assert response.content.startswith(b"\x89PNG\r\n\x1a\n")
+
+
+def test_api_routes_are_mounted() -> None:
+    response = client.get("/api/v1/diagnostics/jobs")
+    assert response.status_code == 200
+    assert response.json()["running"] == 0
@@ -0,0 +1,279 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import duckdb
+import polars as pl
+import pytest
+from utils import analyst_db
+from utils.analyst_db import (
+    ANALYST_DATABASE_VERSION,
+    AnalystDB,
+    ChatHandler,
+    DatasetHandler,
+    DatasetType,
+    DataSourceType,
+    Migration,
+)
+from utils.schema import (
+    AnalystChatMessage,
+    AnalystDataset,
+    ChatJSONEncoder,
+    CleansedDataset,
+    ComponentStub,
+    GetBusinessAnalysisResult,
+)
+
+
+def _business_result() -> GetBusinessAnalysisResult:
+    return GetBusinessAnalysisResult(
+        status="success",
+        bottom_line="bottom line",
+        additional_insights="insights",
+        follow_up_questions=["why?"],
+    )
+
+
+def _create_v4_dataset_db(path: Path) -> None:
+    """Write a dataset database with the version 4 schema."""
+    with duckdb.connect(str(path)) as conn:
+        conn.execute("CREATE TABLE db_version (version INTEGER PRIMARY KEY)")
+        conn.execute("INSERT INTO db_version VALUES (4)")
+        conn.execute(
+            """
+            CREATE TABLE dataset_metadata (
+                table_name VARCHAR PRIMARY KEY,
+                dataset_type VARCHAR,
+                original_name VARCHAR,
+                created_at TIMESTAMP,
+                columns JSON,
+                row_count INTEGER,
+                data_source VARCHAR
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE cleansing_reports (
+                dataset_name VARCHAR,
+                report JSON,
+                PRIMARY KEY (dataset_name)
+            )
+            """
+        )
+        for name, dataset_type, data_source in [
+            ("sales", "standard", "file"),
+            ("sales_cleansed", "cleansed", "generated"),
+        ]:
+            conn.execute(f'CREATE TABLE "{name}" AS SELECT range AS id FROM range(3)')
+            conn.execute(
+                "INSERT INTO dataset_metadata VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [name, dataset_type, "sales", datetime.now(), '["id"]', 3, data_source],
+            )
+
+
+def _create_v4_chat_db(path: Path) -> AnalystChatMessage:
+    """Write a chat database with the version 4 schema holding one message."""
+    message = AnalystChatMessage(
+        role="assistant",
+        content="answer",
+        components=["note", _business_result()],
+        chat_id="chat-1",
+    )
+    with duckdb.connect(str(path)) as conn:
+        conn.execute("CREATE TABLE db_version (version INTEGER PRIMARY KEY)")
+        conn.execute("INSERT INTO db_version VALUES (4)")
+        conn.execute(
+            """
+            CREATE TABLE chat_history (
+                id VARCHAR PRIMARY KEY,
+                user_id VARCHAR NOT NULL,
+                chat_name VARCHAR NOT NULL,
+                data_source VARCHAR DEFAULT 'catalog',
+                created_at TIMESTAMP,
+                updated_at TIMESTAMP
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE chat_messages (
+                id VARCHAR PRIMARY KEY,
+                chat_id VARCHAR NOT NULL,
+                message JSON NOT NULL,
+                created_at TIMESTAMP,
+            )
+            """
+        )
+        conn.execute(
+            "INSERT INTO chat_history VALUES (?, ?, ?, ?, ?, ?)",
+            ["chat-1", "user", "chat", "file", datetime.now(), datetime.now()],
+        )
+        conn.execute(
+            "INSERT INTO chat_messages VALUES (?, ?, ?, ?)",
+            [
+                message.id,
+                "chat-1",
+                json.dumps(message.model_dump(), cls=ChatJSONEncoder),
+                message.created_at,
+            ],
+        )
+    return message
+
+
+def _stored_version(path: Path) -> int:
+    with duckdb.connect(str(path)) as conn:
+        row = conn.execute("SELECT version FROM db_version").fetchone()
+    assert row
+    return int(row[0])
+
+
+async def test_v4_database_is_migrated_in_place(
+    tmp_path: Path,
+    make_dataset_handler: Callable[..., Awaitable[DatasetHandler]],
+    make_chat_handler: Callable[..., Awaitable[ChatHandler]],
+) -> None:
+    dataset_path = tmp_path / "dataset_db_user.db"
+    chat_path = tmp_path / "chat_db_user.db"
+    _create_v4_dataset_db(dataset_path)
+    message = _create_v4_chat_db(chat_path)
+
+    datasets = await make_dataset_handler(
+        name="dataset", db_version=ANALYST_DATABASE_VERSION
+    )
+    chats = await make_chat_handler(db_version=ANALYST_DATABASE_VERSION)
+
+    assert [d.name for d in await datasets.list_datasets()] == [
+        "sales",
+        "sales_cleansed",
+    ]
+    metadata = await datasets.get_dataset_metadata("sales")
+    assert (metadata.file_size, metadata.storage_path) == (0, None)
+    df = await datasets.get_dataframe("sales", DatasetType.STANDARD)
+    assert df["id"].to_list() == [0, 1, 2]
+
+    (header,) = await chats.get_chat_messages(chat_id="chat-1", include_payloads=False)
+    assert header.id == message.id
+    assert [
+        c.component_type if isinstance(c, ComponentStub) else None
+        for c in header.components
+    ] == ["text", "business"]
+    (full,) = await chats.get_chat_messages(chat_id="chat-1")
+    assert full.components == message.components
+
+    async with chats._get_connection() as conn:
+        rows = conn.execute("SELECT count(*) FROM chat_message_components").fetchone()
+        stored = conn.execute("SELECT message FROM chat_messages").fetchone()
+    assert rows == (2,)
+    assert stored and json.loads(stored[0])["components"] == []
+
+    await datasets.close()
+    await chats.close()
+    assert _stored_version(dataset_path) == ANALYST_DATABASE_VERSION
+    assert _stored_version(chat_path) == ANALYST_DATABASE_VERSION
+
+
+async def test_stale_artifacts_are_rebuilt_on_first_access(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    rebuilt: list[str] = []
+
+    async def rebuild_cleansed(db: AnalystDB, name: str) -> None:
+        rebuilt.append(name)
+        dataset = await db.get_dataset(name)
+        await db.dataset_handler.delete_dataset(f"{name}_cleansed")
+        await db.register_dataset(
+            CleansedDataset(
+                dataset=AnalystDataset(
+                    name=name, data=dataset.to_df().with_columns(pl.col("id") * 10)
+                ),
+                cleaning_report=[],
+            ),
+            data_source=DataSourceType.GENERATED,
+        )
+
+    monkeypatch.setattr(
+        analyst_db,
+        "_artifact_rebuilders",
+        {DatasetType.CLEANSED: rebuild_cleansed},
+    )
+
+    db = await AnalystDB.create(
+        user_id="user", db_path=tmp_path, db_version=ANALYST_DATABASE_VERSION
+    )
+    await db.register_dataset(
+        AnalystDataset(name="sales", data=pl.DataFrame({"id": [1, 2]})),
+        data_source=DataSourceType.FILE,
+    )
+    await db.register_dataset(
+        CleansedDataset(
+            dataset=AnalystDataset(name="sales", data=pl.DataFrame({"id": [1, 2]})),
+            cleaning_report=[],
+        ),
+        data_source=DataSourceType.GENERATED,
+    )
+    await db.close()
+
+    monkeypatch.setattr(
+        DatasetHandler,
+        "migrations",
+        {
+            **DatasetHandler.migrations,
+            ANALYST_DATABASE_VERSION: Migration(
+                "change cleansing",
+                lambda conn: None,
+                stale_artifacts=(DatasetType.CLEANSED,),
+            ),
+        },
+    )
+    db = await AnalystDB.create(
+        user_id="user",
+        db_path=tmp_path,
+        db_version=ANALYST_DATABASE_VERSION + 1,
+    )
+    # the original dataset is untouched and nothing is rebuilt eagerly
+    assert (await db.get_dataset("sales")).to_df()["id"].to_list() == [1, 2]
+    assert rebuilt == []
+
+    cleansed = await db.get_cleansed_dataset("sales")
+    assert cleansed.to_df()["id"].to_list() == [10, 20]
+    await db.get_cleansed_dataset("sales")
+    assert rebuilt == ["sales"]
+
+    # once nothing is stale, the check is answered without a query
+    connections = db.dataset_handler._connections
+    cursors = connections.stats().reused
+    assert not await db.dataset_handler.claim_rebuild("sales", DatasetType.CLEANSED)
+    assert connections.stats().reused == cursors
+    await db.close()
+
+
+async def test_versions_without_a_migration_path_are_reset(
+    tmp_path: Path, make_dataset_handler: Callable[..., Awaitable[DatasetHandler]]
+) -> None:
+    dataset_path = tmp_path / "dataset_db_user.db"
+    _create_v4_dataset_db(dataset_path)
+    with duckdb.connect(str(dataset_path)) as conn:
+        conn.execute("UPDATE db_version SET version = 3")
+
+    datasets = await make_dataset_handler(
+        name="dataset", db_version=ANALYST_DATABASE_VERSION
+    )
+    assert await datasets.list_datasets() == []
+    await datasets.close()
+    assert _stored_version(dataset_path) == ANALYST_DATABASE_VERSION
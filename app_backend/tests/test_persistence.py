@@ -0,0 +1,92 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import shutil
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import duckdb
+import polars as pl
+from utils.analyst_db import ChatHandler, DatasetHandler, DatasetType, DataSourceType
+
+
+class RecordingStorage:
+    def __init__(self) -> None:
+        self.saved: list[str] = []
+        self.deleted: list[str] = []
+
+    def save_to_storage(self, file_name: str, local_path: str) -> None:
+        self.saved.append(file_name)
+
+    def fetch_from_storage(self, file_name: str, local_path: str) -> None:
+        pass
+
+    def delete_file(self, file_name: str) -> None:
+        self.deleted.append(file_name)
+
+
+async def test_only_writes_are_saved_to_storage(
+    make_chat_handler: Callable[..., Awaitable[ChatHandler]],
+) -> None:
+    storage = RecordingStorage()
+    handler = await make_chat_handler(storage=storage)
+    await handler.get_chat_list()
+    await handler.flush()
+    assert storage.saved == []
+
+    await handler.create_chat("chat")
+    await handler.get_chat_list()
+    await handler.flush()
+    await handler.flush()
+    assert storage.saved == ["chat_db_user.db"]
+
+
+async def test_uploads_are_consistent_snapshots(
+    tmp_path: Path, make_chat_handler: Callable[..., Awaitable[ChatHandler]]
+) -> None:
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+
+    class CopyingStorage(RecordingStorage):
+        def save_to_storage(self, file_name: str, local_path: str) -> None:
+            super().save_to_storage(file_name, local_path)
+            shutil.copyfile(local_path, uploads / file_name)
+
+    handler = await make_chat_handler(storage=CopyingStorage())
+    chat_id = await handler.create_chat("chat")
+    await handler.flush()
+    await handler.close()
+    # the upload is a complete database of its own, written without a WAL
+    with duckdb.connect(str(uploads / "chat_db_user.db"), read_only=True) as conn:
+        assert conn.execute("SELECT id FROM chat_history").fetchall() == [(chat_id,)]
+    assert [path.name for path in tmp_path.glob("*.snapshot*")] == []
+
+
+async def test_parquet_files_are_synced_individually(
+    make_dataset_handler: Callable[..., Awaitable[DatasetHandler]],
+) -> None:
+    storage = RecordingStorage()
+    handler = await make_dataset_handler(storage=storage, use_parquet_storage=True)
+    await handler.register_dataframe(
+        pl.DataFrame({"a": [1]}), "sales", DatasetType.STANDARD, DataSourceType.FILE
+    )
+    await handler.flush()
+    await handler.delete_dataset("sales")
+    await handler.flush()
+    parquet_name = storage.saved[0]
+    assert parquet_name.startswith("data_db_user_") and parquet_name.endswith(
+        ".parquet"
+    )
+    assert storage.saved[1:] == ["data_db_user.db", "data_db_user.db"]
+    assert storage.deleted == [parquet_name]
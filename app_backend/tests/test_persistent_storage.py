@@ -0,0 +1,53 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+from pathlib import Path
+
+from utils.persistent_storage import (
+    ChunkedFileSync,
+    ChunkManifest,
+    LocalDirectoryFileStore,
+)
+
+
+def test_chunked_sync_uploads_only_changed_chunks(tmp_path: Path) -> None:
+    store = LocalDirectoryFileStore(tmp_path / "store")
+    sync = ChunkedFileSync(store, chunk_size=1024, workers=4)
+
+    source = tmp_path / "source.db"
+    content = bytearray(os.urandom(10 * 1024 + 100))
+    source.write_bytes(content)
+
+    manifest, uploaded = sync.upload(str(source))
+    assert len(manifest.chunks) == 11
+    assert len(uploaded) == 11
+
+    content[5 * 1024 + 10] ^= 0xFF
+    source.write_bytes(content)
+    updated, uploaded = sync.upload(str(source), manifest)
+    assert len(uploaded) == 1
+    assert manifest.file_ids() - updated.file_ids() == {
+        manifest.chunk_ids[manifest.chunks[5]]
+    }
+
+    restored = tmp_path / "restored.db"
+    round_tripped = ChunkManifest.from_dict(updated.to_dict())
+    assert round_tripped is not None
+    sync.download(round_tripped, str(restored))
+    assert restored.read_bytes() == bytes(content)
+
+
+def test_legacy_storage_link_is_not_a_manifest() -> None:
+    assert ChunkManifest.from_dict({"catalogId": "abc", "timestamp": 1}) is None
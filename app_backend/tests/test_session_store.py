@@ -0,0 +1,180 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import polars as pl
+import pytest
+from utils import rest_api
+from utils.analyst_db import AnalystDB, DataSourceType
+from utils.job_scheduler import JobPriority, JobScheduler, JobState
+from utils.schema import AnalystDataset
+from utils.session_store import SessionStore
+
+
+async def test_sessions_are_evicted_by_size_and_ttl() -> None:
+    now = 0.0
+    evicted: list[str] = []
+
+    async def on_evict(session: str) -> None:
+        evicted.append(session)
+
+    store: SessionStore[str] = SessionStore(
+        max_sessions=2, ttl=60, on_evict=on_evict, clock=lambda: now
+    )
+    assert await store.get_or_create("a", lambda: "session a") == "session a"
+    await store.get_or_create("b", lambda: "session b")
+    # a hit refreshes "a", so "b" is the least recently used
+    assert await store.get_or_create("a", lambda: "new a") == "session a"
+    await store.get_or_create("c", lambda: "session c")
+    await store.drain()
+    assert evicted == ["session b"]
+
+    now = 30
+    await store.get_or_create("c", lambda: "new c")
+    now = 70
+    # "a" was last used at 0 and expired, "c" at 30 is still fresh
+    await store.get_or_create("c", lambda: "new c")
+    await store.drain()
+    assert evicted == ["session b", "session a"]
+    assert await store.get_or_create("a", lambda: "new a") == "new a"
+
+    stats = store.stats()
+    assert (stats.hits, stats.misses, stats.evictions) == (3, 4, 2)
+    assert (stats.resident_sessions, stats.max_sessions) == (2, 2)
+
+
+async def test_evicted_sessions_are_closed_after_their_last_lease() -> None:
+    closing = asyncio.Event()
+    closed: list[str] = []
+
+    async def on_evict(session: str) -> None:
+        await closing.wait()
+        closed.append(session)
+
+    store: SessionStore[str] = SessionStore(max_sessions=1, on_evict=on_evict)
+    a = await store.acquire("a", lambda: "session a")
+    assert await store.acquire("a", lambda: "new a") is a
+    # evicting "a" neither waits for the close nor closes it while leased
+    b = await asyncio.wait_for(store.acquire("b", lambda: "session b"), 1)
+    store.release(a)
+    store.release(b)
+    closing.set()
+    await store.drain()
+    assert closed == []
+
+    store.release(a)
+    await store.drain()
+    assert closed == ["session a"]
+
+
+async def test_evicted_session_databases_are_closed_and_reopened(
+    tmp_path: Path,
+) -> None:
+    async def close(db: AnalystDB) -> None:
+        await db.close()
+
+    store: SessionStore[AnalystDB] = SessionStore(max_sessions=1, on_evict=close)
+    db = await AnalystDB.create(
+        user_id="user", db_path=tmp_path, use_parquet_storage=False
+    )
+    await db.register_dataset(
+        AnalystDataset(name="sales", data=pl.DataFrame({"id": [1]})),
+        data_source=DataSourceType.FILE,
+    )
+    await store.get_or_create("user", lambda: db)
+    await store.get_or_create("other", lambda: db)
+    await store.drain()
+    assert not db.dataset_handler._registered
+
+    db = await AnalystDB.create(
+        user_id="user", db_path=tmp_path, use_parquet_storage=False
+    )
+    assert await db.list_analyst_datasets() == ["sales"]
+    await store.clear()
+    assert len(store) == 0
+
+
+async def test_sessions_are_closed_after_their_jobs(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    closed: list[str] = []
+
+    async def close() -> None:
+        closed.append("user")
+
+    monkeypatch.setattr(rest_api, "jobs", JobScheduler())
+    session = rest_api.SessionState(
+        {"analyst_db": SimpleNamespace(user_id="user", close=close)}
+    )
+
+    release = asyncio.Event()
+    job = rest_api.jobs.submit(
+        "user", "analysis", JobPriority.INTERACTIVE, release.wait
+    )
+    await rest_api._close_session(session)
+    await asyncio.sleep(0)
+    # the running job keeps the databases open
+    assert closed == []
+    assert len(rest_api.deferred_closes) == 1
+
+    release.set()
+    await asyncio.gather(*rest_api.deferred_closes)
+    assert job.state == JobState.SUCCEEDED
+    assert closed == ["user"]
+
+    await rest_api._close_session(session)
+    assert closed == ["user", "user"]
+
+
+async def test_cold_starts_of_other_users_are_not_serialized(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    started: list[str] = []
+    release_alice = asyncio.Event()
+
+    async def get_database(user_id: str) -> Any:
+        started.append(user_id)
+        if user_id == "alice":
+            await release_alice.wait()
+        return f"db of {user_id}"
+
+    monkeypatch.setattr(rest_api, "get_database", get_database)
+
+    def request() -> Any:
+        return SimpleNamespace(
+            state=SimpleNamespace(session=rest_api.SessionState({"analyst_db": None}))
+        )
+
+    alice_requests = [request() for _ in range(3)]
+    alice = [
+        asyncio.create_task(rest_api._initialize_database(r, "alice"))
+        for r in alice_requests
+    ]
+    await asyncio.sleep(0)
+    # bob's cold start completes while alice's is still blocked
+    bob = request()
+    await asyncio.wait_for(rest_api._initialize_database(bob, "bob"), timeout=1)
+    assert bob.state.session.analyst_db == "db of bob"
+    assert not any(task.done() for task in alice)
+
+    release_alice.set()
+    await asyncio.gather(*alice)
+    # the three concurrent requests of alice shared one initialization
+    assert started == ["alice", "bob"]
+    assert {r.state.session.analyst_db for r in alice_requests} == {"db of alice"}
+    assert len(rest_api.database_initializations) == 0
@@ -0,0 +1,69 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from pathlib import Path
+
+import polars as pl
+import pytest
+from utils.analyst_db import AnalystDB, DatasetHandler, DataSourceType
+from utils.schema import AnalystChatMessage, AnalystDataset
+
+
+async def _create(tmp_path: Path, user_id: str) -> AnalystDB:
+    return await AnalystDB.create(
+        user_id=user_id, db_path=tmp_path, use_parquet_storage=False, shared=True
+    )
+
+
+async def test_users_share_one_file_with_separate_schemas(tmp_path: Path) -> None:
+    alice = await _create(tmp_path, "alice@example.com")
+    bob = await _create(tmp_path, "bob@example.com")
+    for db, values in ((alice, [1, 2]), (bob, [3])):
+        await db.register_dataset(
+            AnalystDataset(name="sales", data=pl.DataFrame({"value": values})),
+            data_source=DataSourceType.FILE,
+        )
+        chat_id = await db.create_chat("chat", data_source="file")
+        await db.add_chat_message(
+            chat_id,
+            AnalystChatMessage(role="user", content=db.user_id, components=[]),
+        )
+
+    assert (await alice.get_dataset("sales")).to_df()["value"].to_list() == [1, 2]
+    assert (await bob.get_dataset("sales")).to_df()["value"].to_list() == [3]
+    (chat,) = await bob.get_chat_list()
+    (message,) = await bob.get_chat_messages(chat_id=chat["id"])
+    assert message.content == "bob@example.com"
+    await bob.delete_all_tables()
+    assert await bob.list_analyst_datasets() == []
+    assert await alice.list_analyst_datasets() == ["sales"]
+
+    assert sorted(path.name for path in tmp_path.glob("*.db")) == [
+        "chat_db.db",
+        "dataset_db.db",
+    ]
+    await alice.close()
+    await bob.close()
+
+    # a new session finds the data without initializing the schema again
+    alice = await _create(tmp_path, "alice@example.com")
+    assert await alice.list_analyst_datasets() == ["sales"]
+    await alice.close()
+
+
+def test_shared_database_rejects_persistent_storage(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        DatasetHandler(
+            user_id="user", db_path=tmp_path, shared=True, use_persistent_storage=True
+        )
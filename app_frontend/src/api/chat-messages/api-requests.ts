@@ -1,5 +1,5 @@
 import apiClient from '../apiClient';
-import { IChat, IChatMessage } from './types';
+import { IChat, IChatMessage, IMessageComponentPayload } from './types';
 import { getChatName } from './utils';
 
 export interface IGetMessagesParams {
@@ -12,9 +12,32 @@ export const getChatMessages = async ({
   signal,
   chatId,
 }: IGetMessagesParams): Promise<IChatMessage[]> => {
-  const { data } = await apiClient.get<IChatMessage[]>(`/v1/chats/${chatId}/messages`, {
-    signal,
-  });
+  // components come as stubs, their payloads are loaded with getMessageComponent
+  const { data } = await apiClient.get<IChatMessage[]>(
+    `/v1/chats/${chatId}/messages?include_payloads=false`,
+    { signal }
+  );
+
+  return data;
+};
+
+export interface IGetMessageComponentParams {
+  chatId: string;
+  messageId: string;
+  position: number;
+  signal?: AbortSignal;
+}
+
+export const getMessageComponent = async ({
+  chatId,
+  messageId,
+  position,
+  signal,
+}: IGetMessageComponentParams): Promise<IMessageComponentPayload> => {
+  const { data } = await apiClient.get<IMessageComponentPayload>(
+    `/v1/chats/${chatId}/messages/${messageId}/components/${position}`,
+    { signal }
+  );
 
   return data;
 };
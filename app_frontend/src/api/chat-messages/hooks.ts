@@ -1,19 +1,28 @@
-import { useMutation, useQuery, useQueryClient } from '@tanstack/react-query';
+import { useMutation, useQueries, useQuery, useQueryClient } from '@tanstack/react-query';
 import {
   createChat,
   deleteChat,
   deleteMessage,
   getChatMessages,
   getChats,
+  getMessageComponent,
   IChatCreated,
   postMessage,
   renameChat,
   updateChat,
 } from './api-requests';
 import { messageKeys } from './keys';
-import { IChat, IChatMessage, IPostMessageContext, IUserMessage } from './types';
+import {
+  IChat,
+  IChatMessage,
+  IComponentStub,
+  IMessageComponentPayload,
+  IPostMessageContext,
+  IUserMessage,
+} from './types';
 import { useNavigate } from 'react-router-dom';
 import { generateChatRoute } from '@/pages/routes';
+import { useServerEvents } from '../events';
 
 export interface IFetchMessagesParams {
   limit?: number;
@@ -21,21 +30,72 @@ export interface IFetchMessagesParams {
 }
 
 export const useFetchAllMessages = ({ chatId, limit = 100 }: IFetchMessagesParams) => {
+  const queryClient = useQueryClient();
   const queryResult = useQuery<IChatMessage[]>({
     queryKey: messageKeys.messages(chatId),
     queryFn: ({ signal }) =>
       chatId ? getChatMessages({ signal, limit, chatId }) : Promise.resolve([]),
+    // the analysis event stream drives refreshes, polling is only a fallback
     refetchInterval: query =>
       !query ||
       // query.state?.data?.length === 0 ||
       query.state?.data?.some(d => d.in_progress)
-        ? 5000
+        ? 30000
         : false,
   });
 
+  // the analysis stream is keyed by the user message that started it
+  const messages = queryResult.data;
+  const analyzedMessageId = messages?.some(m => m.in_progress)
+    ? [...messages].reverse().find(m => m.role === 'user' && m.id)?.id
+    : undefined;
+  useServerEvents(
+    chatId && analyzedMessageId
+      ? `/v1/chats/${chatId}/messages/${analyzedMessageId}/events`
+      : undefined,
+    () => queryClient.invalidateQueries({ queryKey: messageKeys.messages(chatId) })
+  );
+
   return queryResult;
 };
 
+const isComponentStub = (component: unknown): component is IComponentStub =>
+  !!component &&
+  typeof component === 'object' &&
+  (component as { type?: string }).type === 'stub';
+
+/**
+ * Load the payloads of a message's component stubs. A stored component does
+ * not change, so each payload is fetched once however often the chat refreshes.
+ */
+export const useMessageComponents = (chatId?: string, message?: IChatMessage) => {
+  const messageId = message?.id;
+  const stubs = message?.components?.filter(isComponentStub) ?? [];
+  return useQueries({
+    queries: stubs.map(stub => ({
+      queryKey: messageKeys.component(messageId ?? '', stub.position, stub.size),
+      queryFn: ({ signal }: { signal: AbortSignal }) =>
+        getMessageComponent({
+          chatId: chatId ?? '',
+          messageId: messageId ?? '',
+          position: stub.position,
+          signal,
+        }),
+      enabled: !!chatId && !!messageId,
+      staleTime: Infinity,
+    })),
+    combine: results => {
+      const payloads = new Map(stubs.map((stub, i) => [stub.position, results[i]?.data]));
+      const components = (message?.components ?? [])
+        .map(component =>
+          isComponentStub(component) ? payloads.get(component.position) : component
+        )
+        .filter((component): component is IMessageComponentPayload => !!component);
+      return { components, isLoading: results.some(result => result.isLoading) };
+    },
+  });
+};
+
 export const usePostMessage = () => {
   const queryClient = useQueryClient();
   const navigate = useNavigate();
@@ -2,4 +2,11 @@ export const messageKeys = {
   all: ['messages', 'chats'],
   chats: ['chats'],
   messages: (chatId?: string) => ['messages', ...(chatId ? [chatId] : [])],
+  // kept apart from the messages, so refreshing a chat does not reload payloads
+  component: (messageId: string, position: number, size: number) => [
+    'message-components',
+    messageId,
+    position,
+    size,
+  ],
 };
@@ -55,10 +55,24 @@ export interface IComponent {
   metadata?: IMetadata;
 }
 
+// A component whose payload is loaded separately, when its message is shown
+export interface IComponentStub {
+  type: 'stub';
+  component_type: string;
+  position: number;
+  size: number;
+}
+
+export type IMessageComponentPayload =
+  | IMessageComponent
+  | IAnalysisComponent
+  | IChartsComponent
+  | IBusinessComponent;
+
 export interface IChatMessage {
   role: 'user' | 'assistant';
   content: string;
-  components: (IMessageComponent | IAnalysisComponent | IChartsComponent | IBusinessComponent)[];
+  components: (IMessageComponentPayload | IComponentStub)[];
   in_progress?: boolean;
   created_at?: string; // ISO timestamp for message creation time
   chat_id?: string; // ID of the chat this message belongs to
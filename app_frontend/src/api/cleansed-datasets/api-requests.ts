@@ -17,8 +17,28 @@ export type CleansedDataset = {
   };
   cleaning_report: CleansedColumnReport[];
   name: string;
+  total_rows?: number | null;
 };
 
+// The page as sent with `Accept: application/vnd.columnar+json`: one array per column
+type ColumnarDataset = {
+  name: string;
+  columns: string[];
+  row_count: number;
+  data: Record<string, never[]>;
+};
+
+type ColumnarCleansedDataset = Omit<CleansedDataset, 'dataset'> & {
+  dataset: ColumnarDataset | null;
+};
+
+const COLUMNAR_JSON = 'application/vnd.columnar+json';
+
+const toRecords = ({ columns, row_count, data }: ColumnarDataset) =>
+  Array.from({ length: row_count }, (_, row) =>
+    Object.fromEntries(columns.map(column => [column, data[column][row]]))
+  ) as Record<string, never>[];
+
 export type DatasetMetadata = {
   name: string;
   dataset_type: string;
@@ -42,11 +62,18 @@ export const getCleansedDataset = async ({
   signal?: AbortSignal;
 }): Promise<CleansedDataset> => {
   const encodedName = encodeURIComponent(name);
-  const { data } = await apiClient.get<CleansedDataset>(
+  const { data } = await apiClient.get<ColumnarCleansedDataset>(
     `/v1/datasets/${encodedName}/cleansed?skip=${skip}&limit=${limit}`,
-    { signal }
+    { signal, headers: { Accept: COLUMNAR_JSON } }
   );
-  return data;
+  const { dataset } = data;
+  return {
+    ...data,
+    dataset: {
+      name: dataset?.name ?? name,
+      data_records: dataset ? toRecords(dataset) : [],
+    },
+  };
 };
 
 export const getDatasetMetadata = async ({
@@ -7,16 +7,31 @@ import {
   downloadDictionary,
 } from './api-requests';
 import { DictionaryRow, DictionaryTable } from './types';
+import { useServerEvents } from '../events';
 
 export const useGeneratedDictionaries = <TData = DictionaryTable[]>(options = {}) => {
+  const queryClient = useQueryClient();
   const queryResult = useQuery<DictionaryTable[], unknown, TData>({
     queryKey: dictionaryKeys.all,
     queryFn: ({ signal }) => getGeneratedDictionaries({ signal }),
+    // the processing event stream drives refreshes, polling is only a fallback
     refetchInterval: query =>
-      !query || query.state?.data?.some(d => d.in_progress) ? 5000 : false,
+      !query || query.state?.data?.some(d => d.in_progress) ? 30000 : false,
     ...options,
   });
 
+  const inProgress = queryClient
+    .getQueryData<DictionaryTable[]>(dictionaryKeys.all)
+    ?.some(d => d.in_progress);
+  // the server starts new subscribers at the tail, the query above has the earlier state
+  useServerEvents(inProgress ? '/v1/datasets/processing/events' : undefined, event => {
+    // refresh once a dictionary is ready rather than on every cleansing step
+    const { message } = JSON.parse(event.data);
+    if (event.type !== 'progress' || message?.startsWith('Registered data dictionary')) {
+      queryClient.invalidateQueries({ queryKey: dictionaryKeys.all });
+    }
+  });
+
   return queryResult;
 };
 
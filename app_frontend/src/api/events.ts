@@ -0,0 +1,55 @@
+import { useEffect, useRef } from 'react';
+import { getApiUrl } from './apiClient';
+
+type Listener = (event: MessageEvent<string>) => void;
+
+// Events sent by the backend streams; 'done' ends a stream for good
+const EVENT_TYPES = ['component', 'progress', 'complete', 'failed', 'done'];
+
+// One EventSource per stream, shared by every component listening to it
+const sources = new Map<string, { eventSource: EventSource; listeners: Set<Listener> }>();
+
+const close = (path: string) => {
+  sources.get(path)?.eventSource.close();
+  sources.delete(path);
+};
+
+const subscribe = (path: string, listener: Listener) => {
+  let source = sources.get(path);
+  if (!source) {
+    // EventSource reconnects on its own and sends Last-Event-ID to resume
+    const eventSource = new EventSource(`${getApiUrl()}${path}`, { withCredentials: true });
+    const listeners = new Set<Listener>();
+    EVENT_TYPES.forEach(type =>
+      eventSource.addEventListener(type, event =>
+        listeners.forEach(l => l(event as MessageEvent<string>))
+      )
+    );
+    eventSource.addEventListener('done', () => close(path));
+    eventSource.addEventListener('error', () => {
+      // the stream was refused or has ended; callers fall back to polling
+      if (eventSource.readyState === EventSource.CLOSED) close(path);
+    });
+    source = { eventSource, listeners };
+    sources.set(path, source);
+  }
+  const { listeners } = source;
+  listeners.add(listener);
+  return () => {
+    listeners.delete(listener);
+    if (!listeners.size && sources.get(path) === source) close(path);
+  };
+};
+
+/**
+ * Listen to a server-sent event stream of the API while `path` is set.
+ */
+export const useServerEvents = (path: string | undefined, onEvent: Listener) => {
+  const onEventRef = useRef(onEvent);
+  onEventRef.current = onEvent;
+
+  useEffect(() => {
+    if (!path) return;
+    return subscribe(path, event => onEventRef.current(event));
+  }, [path]);
+};
@@ -98,7 +98,7 @@ export const AddDataModal = ({ highlight }: { highlight?: boolean }) => {
                 {t('Local files')}
               </div>
               <div className="text-muted-foreground text-sm font-normal leading-normal">
-                {t('Select one or more CSV, XLSX, XLS files, up to 200MB.')}
+                {t('Select one or more CSV, CSV.GZ, CSV.ZST, Parquet, Arrow, XLSX, XLS files, up to 200MB.')}
               </div>
             </div>
             <FileUploader onFilesChange={setFiles} progress={progress} />
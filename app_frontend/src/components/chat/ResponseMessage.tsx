@@ -18,6 +18,7 @@ import { ErrorPanel } from './ErrorPanel';
 import { RESPONSE_TABS } from './constants';
 import { formatMessageDate } from './utils';
 import { useTranslation } from '@/i18n';
+import { useMessageComponents } from '@/api/chat-messages/hooks';
 interface ResponseMessageProps {
   chatId?: string;
   date?: string;
@@ -64,6 +65,7 @@ export const ResponseMessage: React.FC<ResponseMessageProps> = ({
 }) => {
   const [activeTab, setActiveTab] = useState(RESPONSE_TABS.SUMMARY);
   const { t } = useTranslation();
+  const { components, isLoading: componentsLoading } = useMessageComponents(chatId, message);
 
   const displayDate = message?.created_at ? formatMessageDate(message.created_at) : date || '';
 
@@ -82,10 +84,10 @@ export const ResponseMessage: React.FC<ResponseMessageProps> = ({
     businessErrors,
     analysisAttempts,
   } = useMemo(() => {
-    const messageComponent = message?.components?.find(isMessageComponent);
-    const businessComponent = message?.components?.find(isBusinessComponent);
-    const chartsComponent = message?.components?.find(isChartsComponent);
-    const analysisComponent = message?.components?.find(isAnalysisComponent);
+    const messageComponent = components.find(isMessageComponent);
+    const businessComponent = components.find(isBusinessComponent);
+    const chartsComponent = components.find(isChartsComponent);
+    const analysisComponent = components.find(isAnalysisComponent);
 
     const enhancedUserMessage = messageComponent?.enhanced_user_message || '';
     const bottomLine = businessComponent?.bottom_line || '';
@@ -148,13 +150,13 @@ export const ResponseMessage: React.FC<ResponseMessageProps> = ({
       businessErrors,
       analysisAttempts,
     };
-  }, [message, date]);
+  }, [message, components, date]);
 
   return (
     <MessageContainer>
       <MessageHeader avatar={DataRobotAvatar} name={t('DataRobot')} date={displayDate} />
 
-      {isLoading ? (
+      {isLoading || (componentsLoading && !message?.in_progress) ? (
         <Loading />
       ) : (
         <div className="self-stretch text-sm font-normal leading-tight">
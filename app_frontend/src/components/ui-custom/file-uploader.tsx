@@ -14,7 +14,12 @@ interface FileUploaderProps {
 
 export const FileUploader: React.FC<FileUploaderProps> = ({
   maxSize = 1024 * 1024 * 200,
-  accept = { 'file/csv': ['.csv'], 'file/xlsx': ['.xlsx', '.xls'] },
+  accept = {
+    'file/csv': ['.csv', '.csv.gz', '.csv.zst'],
+    'file/parquet': ['.parquet'],
+    'file/arrow': ['.arrow', '.feather'],
+    'file/xlsx': ['.xlsx', '.xls'],
+  },
   progress = 0,
   onFilesChange,
 }) => {
@@ -0,0 +1,147 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Statement count and wall time of replacing the messages of a chat.
+
+Compares `ChatHandler.update_chat` with the previous implementation, which
+deleted the messages and inserted them one statement (and one executor hop)
+at a time, and does the same for `delete_all_chats`.
+
+    python -m benchmarks.chat_bulk_write --messages 500 --chats 20
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncGenerator
+
+import duckdb
+
+from utils.analyst_db import ChatHandler
+from utils.schema import AnalystChatMessage, ChatJSONEncoder
+
+
+class CountingConnection:
+    def __init__(self, conn: duckdb.DuckDBPyConnection, counter: list[int]) -> None:
+        self._conn = conn
+        self._counter = counter
+
+    def execute(self, *args: Any) -> duckdb.DuckDBPyConnection:
+        self._counter[0] += 1
+        return self._conn.execute(*args)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+
+class CountingChatHandler(ChatHandler):
+    statements = [0]
+
+    @asynccontextmanager
+    async def _get_connection(self) -> AsyncGenerator[Any, Any]:
+        async with super()._get_connection() as conn:
+            yield CountingConnection(conn, self.statements)
+
+
+async def legacy_update_chat(
+    handler: ChatHandler, chat_id: str, messages: list[AnalystChatMessage]
+) -> None:
+    async with handler._get_connection() as conn:
+        await handler.execute_query(
+            conn, "DELETE FROM chat_messages WHERE chat_id = ?", [chat_id]
+        )
+        for message in messages:
+            message.chat_id = chat_id
+            await handler.execute_query(
+                conn,
+                "INSERT INTO chat_messages (id, chat_id, message, created_at) VALUES (?, ?, ?, ?)",
+                [
+                    message.id,
+                    chat_id,
+                    json.dumps(message.model_dump(), cls=ChatJSONEncoder),
+                    message.created_at,
+                ],
+            )
+
+
+async def legacy_delete_all_chats(handler: ChatHandler) -> None:
+    async with handler._get_connection() as conn:
+        result = await handler.execute_query(
+            conn, "SELECT id FROM chat_history WHERE user_id = ?", [handler.user_id]
+        )
+        for (chat_id,) in result.fetchall():
+            await handler.execute_query(
+                conn, "DELETE FROM chat_messages WHERE chat_id = ?", [chat_id]
+            )
+        await handler.execute_query(
+            conn, "DELETE FROM chat_history WHERE user_id = ?", [handler.user_id]
+        )
+
+
+async def run(messages_per_chat: int, chats: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        handler = CountingChatHandler(user_id="benchmark", db_path=Path(tmp))
+        await handler._initialize_database()
+
+        def messages() -> list[AnalystChatMessage]:
+            return [
+                AnalystChatMessage(
+                    role="user", content=f"message {i} " * 20, components=[]
+                )
+                for i in range(messages_per_chat)
+            ]
+
+        for label, legacy in (("per-row", True), ("bulk", False)):
+            chat_ids = [await handler.create_chat(f"chat {i}") for i in range(chats)]
+            handler.statements[0] = 0
+            start = time.perf_counter()
+            for chat_id in chat_ids:
+                if legacy:
+                    await legacy_update_chat(handler, chat_id, messages())
+                else:
+                    await handler.update_chat(chat_id, messages=messages())
+            elapsed = time.perf_counter() - start
+            print(
+                f"update_chat {label:8} {handler.statements[0] / chats:8.0f} statements/chat "
+                f"{elapsed / chats * 1000:9.1f} ms/chat"
+            )
+
+            handler.statements[0] = 0
+            start = time.perf_counter()
+            if legacy:
+                await legacy_delete_all_chats(handler)
+            else:
+                await handler.delete_all_chats()
+            elapsed = time.perf_counter() - start
+            print(
+                f"delete_all  {label:8} {handler.statements[0]:8d} statements      "
+                f"{elapsed * 1000:9.1f} ms"
+            )
+        await handler.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--chats", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.messages, args.chats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Time to open a chat with large analysis results, with and without payloads.
+
+Every assistant turn carries an analysis dataset and a business analysis, like
+the messages produced by `run_complete_analysis`.
+
+    python -m benchmarks.chat_open --turns 30 --rows 5000
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import polars as pl
+
+from utils.analyst_db import ChatHandler
+from utils.schema import (
+    AnalystChatMessage,
+    AnalystDataset,
+    GetBusinessAnalysisResult,
+    RunAnalysisResult,
+    RunAnalysisResultMetadata,
+)
+
+
+def _assistant_message(rows: int) -> AnalystChatMessage:
+    df = pl.DataFrame(
+        {
+            "id": range(rows),
+            "category": [f"category {i % 50}" for i in range(rows)],
+            "value": [i * 0.25 for i in range(rows)],
+        }
+    )
+    return AnalystChatMessage(
+        role="assistant",
+        content="question",
+        in_progress=False,
+        components=[
+            RunAnalysisResult(
+                status="success",
+                metadata=RunAnalysisResultMetadata(duration=1.0, attempts=1),
+                dataset=AnalystDataset(data=df),
+                code="result = df",
+            ),
+            GetBusinessAnalysisResult(
+                status="success",
+                bottom_line="bottom line",
+                additional_insights="insights",
+                follow_up_questions=["why?"],
+            ),
+        ],
+    )
+
+
+async def run(turns: int, rows: int, iterations: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        handler = ChatHandler(user_id="benchmark", db_path=Path(tmp))
+        await handler._initialize_database()
+        chat_id = await handler.create_chat("chat")
+        messages = []
+        for _ in range(turns):
+            messages.append(
+                AnalystChatMessage(role="user", content="question", components=[])
+            )
+            messages.append(_assistant_message(rows))
+        await handler.update_chat(chat_id, messages=messages)
+
+        for include_payloads in (True, False):
+            timings = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                await handler.get_chat_messages(
+                    chat_id=chat_id, include_payloads=include_payloads
+                )
+                timings.append(time.perf_counter() - start)
+            print(
+                f"include_payloads={include_payloads!s:5} "
+                f"median {statistics.median(timings) * 1000:9.1f} ms"
+            )
+        await handler.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.turns, args.rows, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
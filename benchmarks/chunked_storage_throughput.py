@@ -0,0 +1,98 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Upload and fetch throughput of the chunked persistent storage.
+
+The DataRobot files API is replaced by a local directory with an optional
+per-request latency, so the numbers show how many bytes a small change costs
+and how much parallel fetching hides request latency.
+
+    python -m benchmarks.chunked_storage_throughput --size-mb 512 --latency-ms 50
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from utils.persistent_storage import ChunkedFileSync, LocalDirectoryFileStore
+
+
+class SlowDirectoryFileStore(LocalDirectoryFileStore):
+    def __init__(self, directory: Path, latency: float) -> None:
+        super().__init__(directory)
+        self.latency = latency
+        self.uploaded_bytes = 0
+
+    def upload(self, local_path: str) -> str:
+        time.sleep(self.latency)
+        self.uploaded_bytes += os.path.getsize(local_path)
+        return super().upload(local_path)
+
+    def download(self, file_id: str, local_path: str) -> None:
+        time.sleep(self.latency)
+        super().download(file_id, local_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--chunk-mb", type=float, default=4)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        source = tmp_dir / "source.db"
+        with open(source, "wb") as f:
+            f.write(os.urandom(args.size_mb * 1024 * 1024))
+        size = source.stat().st_size
+
+        for workers in args.workers:
+            store = SlowDirectoryFileStore(
+                tmp_dir / f"store_{workers}", args.latency_ms / 1000
+            )
+            sync = ChunkedFileSync(store, int(args.chunk_mb * 1024 * 1024), workers)
+
+            start = time.perf_counter()
+            manifest, _ = sync.upload(str(source))
+            full_upload = time.perf_counter() - start
+
+            # touch one page in the middle of the file, like a small DuckDB write
+            with open(source, "r+b") as f:
+                f.seek(size // 2)
+                f.write(os.urandom(256 * 1024))
+            store.uploaded_bytes = 0
+            start = time.perf_counter()
+            manifest, _ = sync.upload(str(source), manifest)
+            delta_upload = time.perf_counter() - start
+
+            start = time.perf_counter()
+            sync.download(manifest, str(tmp_dir / "restored.db"))
+            fetch = time.perf_counter() - start
+
+            mb = size / 1024 / 1024
+            print(f"workers={workers} chunks={len(manifest.chunks)}")
+            print(f"  full upload  {full_upload:7.2f}s  {mb / full_upload:8.1f} MB/s")
+            print(
+                f"  delta upload {delta_upload:7.2f}s  "
+                f"{store.uploaded_bytes / 1024 / 1024:8.1f} MB sent of {mb:.0f} MB"
+            )
+            print(f"  fetch        {fetch:7.2f}s  {mb / fetch:8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
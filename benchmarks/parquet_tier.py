@@ -0,0 +1,129 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Ingest and read latency of the Parquet dataset tier against in-database tables.
+
+A CSV of roughly `--size-mb` is generated once, then read with Polars and
+registered through `DatasetHandler.register_dataframe` for each tier.
+
+    python -m benchmarks.parquet_tier --size-mb 1024
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import polars as pl
+
+from utils.analyst_db import DatasetHandler, DatasetType, DataSourceType
+
+# approximate size of one generated CSV row in bytes
+_ROW_BYTES = 75
+
+
+def _write_csv(path: Path, size_mb: int) -> None:
+    rows = size_mb * 1024 * 1024 // _ROW_BYTES
+    batch = 1_000_000
+    with open(path, "wb") as f:
+        for start in range(0, rows, batch):
+            n = min(batch, rows - start)
+            ids = pl.int_range(start, start + n, eager=True)
+            pl.DataFrame(
+                {
+                    "id": ids,
+                    "category": (ids % 1000).cast(pl.String).str.pad_start(12, "c"),
+                    "amount": ids * 0.37,
+                    "quantity": ids % 97,
+                    "description": "lorem ipsum dolor sit amet consectetur",
+                }
+            ).write_csv(f, include_header=start == 0)
+
+
+def _disk_usage(paths: list[Path]) -> float:
+    total = 0
+    for path in paths:
+        if path.is_dir():
+            total += sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+        elif path.exists():
+            total += path.stat().st_size
+    return total / 1024 / 1024
+
+
+async def _run_tier(csv_path: Path, db_dir: Path, parquet: bool) -> None:
+    handler = DatasetHandler(
+        user_id="benchmark",
+        db_path=db_dir,
+        name="datasets",
+        use_parquet_storage=parquet,
+    )
+    await handler._initialize_database()
+
+    start = time.perf_counter()
+    df = pl.read_csv(csv_path)
+    await handler.register_dataframe(
+        df, "data", DatasetType.STANDARD, DataSourceType.FILE
+    )
+    async with handler._get_connection() as conn:
+        conn.execute("CHECKPOINT")
+    ingest = time.perf_counter() - start
+    del df
+
+    start = time.perf_counter()
+    await handler.count_rows("data", filter="amount >= 0")
+    scan = time.perf_counter() - start
+
+    start = time.perf_counter()
+    full = await handler.get_dataframe("data")
+    materialize = time.perf_counter() - start
+    del full
+
+    start = time.perf_counter()
+    await handler.get_dataframe("data", max_rows=100)
+    limit = time.perf_counter() - start
+
+    db_size = _disk_usage([handler.db_path])
+    total_size = _disk_usage([handler.db_path, handler.parquet_dir])
+    await handler.close()
+
+    print(
+        f"{'parquet' if parquet else 'table':8} ingest {ingest:7.2f}s  "
+        f"scan {scan * 1000:8.1f} ms  full read {materialize:6.2f}s  "
+        f"LIMIT 100 {limit * 1000:7.1f} ms  "
+        f"db file {db_size:7.1f} MB  on disk {total_size:7.1f} MB"
+    )
+
+
+async def run(size_mb: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        csv_path = tmp_dir / "data.csv"
+        _write_csv(csv_path, size_mb)
+        print(f"CSV size {csv_path.stat().st_size / 1024 / 1024:.0f} MB")
+        for parquet in (False, True):
+            db_dir = tmp_dir / ("parquet" if parquet else "table")
+            db_dir.mkdir()
+            await _run_tier(csv_path, db_dir, parquet)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=1024)
+    args = parser.parse_args()
+    asyncio.run(run(args.size_mb))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Read-path latency of AnalystDB with persistent storage enabled versus disabled.
+
+Persistent storage is replaced by an in-process stub that only counts uploads,
+so the numbers show the overhead the handlers add on top of DuckDB.
+
+    python -m benchmarks.persistence_read_path --rows 2000000 --iterations 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+import polars as pl
+
+from utils.analyst_db import AnalystDB, DataSourceType
+from utils.schema import AnalystChatMessage, AnalystDataset
+
+
+class CountingStorage:
+    def __init__(self) -> None:
+        self.saves = 0
+
+    def save_to_storage(self, file_name: str, local_path: str) -> None:
+        self.saves += 1
+
+    def fetch_from_storage(self, file_name: str, local_path: str) -> None:
+        pass
+
+
+async def _create_db(db_path: Path, rows: int, persistent: bool) -> AnalystDB:
+    analyst_db = await AnalystDB.create(
+        user_id="benchmark",
+        db_path=db_path,
+        dataset_db_name="datasets.db",
+        chat_db_name="chat.db",
+    )
+    if persistent:
+        for handler in (analyst_db.dataset_handler, analyst_db.chat_handler):
+            handler._storage = CountingStorage()  # type: ignore[assignment]
+
+    df = pl.DataFrame({"id": range(rows), "value": [i * 0.5 for i in range(rows)]})
+    await analyst_db.register_dataset(
+        AnalystDataset(name="numbers", data=df), DataSourceType.FILE
+    )
+    chat_id = await analyst_db.create_chat("benchmark")
+    for i in range(20):
+        await analyst_db.add_chat_message(
+            chat_id,
+            AnalystChatMessage(role="user", content=f"message {i}", components=[]),
+        )
+    await analyst_db.dataset_handler.flush()
+    await analyst_db.chat_handler.flush()
+    return analyst_db
+
+
+async def _time(
+    iterations: int, call: Callable[[], Awaitable[Any]]
+) -> tuple[float, float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+async def main(rows: int, iterations: int) -> None:
+    for persistent in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            analyst_db = await _create_db(Path(tmp), rows, persistent)
+            chat_id = (await analyst_db.get_chat_list())[0]["id"]
+            db_size = analyst_db.dataset_handler.db_path.stat().st_size / 1e6
+            saves_before = sum(
+                getattr(h._storage, "saves", 0)
+                for h in (analyst_db.dataset_handler, analyst_db.chat_handler)
+            )
+            reads: dict[str, Callable[[], Awaitable[Any]]] = {
+                "list_analyst_datasets": analyst_db.list_analyst_datasets,
+                "get_chat_messages": lambda: analyst_db.get_chat_messages(
+                    chat_id=chat_id
+                ),
+                "get_dataset(max_rows=100)": lambda: analyst_db.get_dataset(
+                    "numbers", max_rows=100
+                ),
+            }
+            label = "on " if persistent else "off"
+            for name, call in reads.items():
+                p50, p95 = await _time(iterations, call)
+                print(
+                    f"persistence {label} | db {db_size:8.1f} MB | {name:26} "
+                    f"p50 {p50:7.2f} ms | p95 {p95:7.2f} ms"
+                )
+            saves_after = sum(
+                getattr(h._storage, "saves", 0)
+                for h in (analyst_db.dataset_handler, analyst_db.chat_handler)
+            )
+            if persistent:
+                print(f"uploads triggered by reads: {saves_after - saves_before}")
+            await analyst_db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.iterations))
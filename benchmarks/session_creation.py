@@ -0,0 +1,98 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Session-creation latency and memory with one database file pair per user vs
+a shared database with a schema per user.
+
+Every user gets a session that stays open, like the sessions of the REST API,
+and then a second session, like a returning user or a Streamlit rerun.
+
+    python -m benchmarks.session_creation --users 1000
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import psutil
+
+from utils.analyst_db import AnalystDB
+from utils.connection_manager import connection_manager
+
+
+def _summary(timings: list[float]) -> str:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    return (
+        f"median {statistics.median(timings) * 1000:7.2f} ms, p95 {p95 * 1000:7.2f} ms"
+    )
+
+
+async def _create(db_path: Path, user_id: str, shared: bool) -> AnalystDB:
+    return await AnalystDB.create(
+        user_id=user_id, db_path=db_path, use_parquet_storage=False, shared=shared
+    )
+
+
+async def run(users: int, shared: bool) -> None:
+    process = psutil.Process()
+    with tempfile.TemporaryDirectory() as tmp:
+        rss_before = process.memory_info().rss
+        sessions = []
+        first = []
+        for i in range(users):
+            start = time.perf_counter()
+            sessions.append(await _create(Path(tmp), f"user-{i}", shared))
+            first.append(time.perf_counter() - start)
+        rss_open = process.memory_info().rss
+
+        returning = []
+        for i in range(users):
+            start = time.perf_counter()
+            sessions.append(await _create(Path(tmp), f"user-{i}", shared))
+            returning.append(time.perf_counter() - start)
+
+        stats = connection_manager.stats()
+        files = len(list(Path(tmp).glob("*.db")))
+        for session in sessions:
+            await session.close()
+
+    mode = "shared  " if shared else "per-user"
+    print(f"{mode} new session       {_summary(first)}")
+    print(f"{mode} returning session {_summary(returning)}")
+    print(
+        f"{mode} {stats.open_databases} open databases, {files} files, "
+        f"RSS +{(rss_open - rss_before) / 2**20:.0f} MiB with {users} sessions"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument(
+        "--mode", choices=["per-user", "shared", "both"], default="both"
+    )
+    args = parser.parse_args()
+    # run each mode in a fresh process for comparable memory numbers
+    if args.mode in ("per-user", "both"):
+        asyncio.run(run(args.users, shared=False))
+    if args.mode in ("shared", "both"):
+        asyncio.run(run(args.users, shared=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Peak RSS and throughput of CSV upload ingest: reading the whole upload into
+memory for Polars vs spooling it to disk and loading it with DuckDB.
+
+Each mode runs in a fresh process so peak RSS is not shared between them.
+
+    python -m benchmarks.upload_ingest --size-mb 100 1000
+"""
+
+import argparse
+import asyncio
+import io
+import multiprocessing
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+import polars as pl
+import psutil
+from fastapi import UploadFile
+
+from utils.analyst_db import AnalystDB, DataSourceType
+from utils.rest_api import _spool_upload
+from utils.schema import AnalystDataset
+
+
+def _write_csv(path: Path, size_mb: int) -> None:
+    """Write a synthetic CSV of about `size_mb` MB."""
+    rows_per_mb = 12_000
+    with duckdb.connect() as conn:
+        conn.execute(
+            f"""
+            COPY (
+                SELECT
+                    range AS id,
+                    TIMESTAMP '2024-01-01' + INTERVAL (range) SECOND AS created_at,
+                    'category_' || (range % 50) AS category,
+                    round(random() * 1000, 3) AS amount,
+                    md5(range::VARCHAR) AS note
+                FROM range({size_mb * rows_per_mb})
+            ) TO '{path}' (HEADER)
+            """
+        )
+
+
+async def _ingest(csv_path: Path, db_path: Path, mode: str) -> None:
+    db = await AnalystDB.create(
+        user_id="bench", db_path=db_path, use_parquet_storage=False
+    )
+    with csv_path.open("rb") as f:
+        file = UploadFile(f, filename=csv_path.name)
+        if mode == "in-memory":
+            # the previous upload path
+            contents = await file.read()
+            df = pl.read_csv(
+                io.StringIO(contents.decode("utf-8")),
+                infer_schema_length=10000,
+                low_memory=True,
+            )
+            await db.register_dataset(
+                AnalystDataset(name="upload", data=df), DataSourceType.FILE
+            )
+        else:
+            async with _spool_upload(file, ".csv") as (path, size):
+                await db.register_csv(path, "upload", DataSourceType.FILE, size)
+    await db.close()
+
+
+def _run(csv_path: Path, mode: str, queue: "multiprocessing.Queue[str]") -> None:
+    baseline = psutil.Process().memory_info().rss
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        asyncio.run(_ingest(csv_path, Path(tmp), mode))
+        elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    size_mb = csv_path.stat().st_size / 2**20
+    queue.put(
+        f"{mode:9} {size_mb:7.0f} MiB  {elapsed:7.2f} s  "
+        f"{size_mb / elapsed:7.1f} MiB/s  peak RSS {peak / 2**20:7.0f} MiB "
+        f"(+{(peak - baseline) / 2**20:.0f} MiB over imports)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument(
+        "--mode", choices=["in-memory", "spooled", "both"], default="both"
+    )
+    args = parser.parse_args()
+    modes = ["in-memory", "spooled"] if args.mode == "both" else [args.mode]
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size_mb in args.size_mb:
+            csv_path = Path(tmp) / f"synthetic_{size_mb}mb.csv"
+            _write_csv(csv_path, size_mb)
+            for mode in modes:
+                queue: "multiprocessing.Queue[str]" = context.Queue()
+                process = context.Process(target=_run, args=(csv_path, mode, queue))
+                process.start()
+                process.join()
+                print(
+                    queue.get()
+                    if process.exitcode == 0
+                    else f"{mode:9} failed with exit code {process.exitcode}"
+                )
+            csv_path.unlink()
+
+
+if __name__ == "__main__":
+    main()
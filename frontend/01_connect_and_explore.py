@@ -39,6 +39,14 @@ from utils.api import (
     process_data_and_update_state,
 )
 from utils.database_helpers import get_external_database, load_app_infra
+from utils.file_formats import (
+    COLUMNAR_EXTENSIONS,
+    CSV_EXTENSIONS,
+    EXCEL_EXTENSIONS,
+    UPLOAD_EXTENSIONS,
+    read_columnar,
+    split_extension,
+)
 from utils.logging_helper import get_logger
 from utils.schema import (
     AnalystDataset,
@@ -63,24 +71,30 @@ async def process_uploaded_file(file: UploadedFile) -> list[str]:
     """
     try:
         logger.info(f"Processing uploaded file: {file.name}")
-        file_extension = os.path.splitext(file.name)[1].lower()
+        base_name, file_extension = split_extension(file.name)
         results = []
 
-        if file_extension == ".csv":
+        if file_extension in CSV_EXTENSIONS:
             logger.info(f"Loading CSV: {file.name}")
             log_memory()
+            # Polars decompresses .csv.gz and .csv.zst transparently
             df = pl.read_csv(file, infer_schema_length=10000, low_memory=True)
             log_memory()
-            dataset_name = os.path.splitext(file.name)[0]
+            dataset_name = base_name
             results.append(AnalystDataset(name=dataset_name, data=df))
             logger.info(
                 f"Loaded CSV {dataset_name}: {len(df)} rows, {len(df.columns)} columns"
             )
 
-        elif file_extension in [".xlsx", ".xls"]:
-            # Read all sheets
+        elif file_extension in COLUMNAR_EXTENSIONS:
+            df = read_columnar(file, file_extension)
+            results.append(AnalystDataset(name=base_name, data=df))
+            logger.info(
+                f"Loaded {file_extension} {base_name}: {len(df)} rows, {len(df.columns)} columns"
+            )
 
-            base_name = os.path.splitext(file.name)[0]
+        elif file_extension in EXCEL_EXTENSIONS:
+            # Read all sheets
             excel_sheets = pl.read_excel(file, sheet_id=0)
             for sheet_name, data in excel_sheets.items():
                 # Use sheet name as dataset name if multiple sheets, otherwise use file name
@@ -95,7 +109,9 @@ async def process_uploaded_file(file: UploadedFile) -> list[str]:
         analyst_db: AnalystDB = st.session_state.analyst_db
         names = []
         for result in results:
-            await analyst_db.register_dataset(result, DataSourceType.FILE)
+            await analyst_db.register_dataset(
+                result, DataSourceType.FILE, file_size=file.size
+            )
             names.append(result.name)
             del result
         del results
@@ -228,7 +244,7 @@ async def main() -> None:
                 st.write("**Load Data Files**")
             uploaded_files = st.file_uploader(
                 "Select 1 or multiple files",
-                type=["csv", "xlsx", "xls"],
+                type=[extension.lstrip(".") for extension in UPLOAD_EXTENSIONS],
                 accept_multiple_files=True,
                 key=st.session_state.file_uploader_key,
             )
@@ -27,7 +27,7 @@ from typing import (
 import streamlit as st
 
 sys.path.append(os.path.dirname(os.path.realpath(__file__)))
-from utils.analyst_db import AnalystDB, DataSourceType
+from utils.analyst_db import SHARED_DATABASE, AnalystDB, DataSourceType
 
 logger = logging.getLogger("DataAnalyst")
 
@@ -96,7 +96,9 @@ async def state_init() -> None:
             db_path=Path("/tmp"),
             dataset_db_name="datasets.db",
             chat_db_name="chat.db",
-            use_persistent_storage=bool(os.environ.get("APPLICATION_ID")),
+            # a shared database is one file for all users and is not uploaded
+            use_persistent_storage=bool(os.environ.get("APPLICATION_ID"))
+            and not SHARED_DATABASE,
         )
 
         st.session_state.analyst_db = analyst_db
@@ -0,0 +1,109 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+import datarobot as dr
+from datarobot.rest import RESTClientObject
+
+from utils.logging_helper import get_logger
+from utils.session_store import SingleFlight
+
+logger = get_logger("AccountInfo")
+
+# seconds a successful account lookup is reused
+ACCOUNT_INFO_TTL_SECONDS = float(os.environ.get("ACCOUNT_INFO_TTL_SECONDS", 900))
+
+# seconds a failed or empty account lookup is reused before it is retried
+ACCOUNT_INFO_NEGATIVE_TTL_SECONDS = float(
+    os.environ.get("ACCOUNT_INFO_NEGATIVE_TTL_SECONDS", 60)
+)
+
+# maximum number of tokens with a cached lookup
+ACCOUNT_INFO_MAX_ENTRIES = int(os.environ.get("ACCOUNT_INFO_MAX_ENTRIES", 10000))
+
+AccountInfoFetcher = Callable[[str, str | None], dict[str, Any]]
+
+
+def fetch_account_info(token: str, endpoint: str | None) -> dict[str, Any]:
+    """Fetch the DataRobot account of `token` with a client of its own."""
+    client = RESTClientObject(
+        auth=token, endpoint=endpoint or dr.client.get_client().endpoint
+    )
+    reply: dict[str, Any] = client.get("account/info/").json()
+    return reply
+
+
+class AccountInfoCache:
+    """
+    An async cache of DataRobot account lookups keyed by API token.
+
+    Lookups run on the default executor, so the blocking HTTP call never stalls
+    the event loop, and concurrent requests with the same token share one
+    in-flight lookup. Successful replies are kept for `ttl` seconds, failed or
+    empty ones for `negative_ttl` seconds, so a broken token is not retried on
+    every request.
+    """
+
+    def __init__(
+        self,
+        ttl: float = ACCOUNT_INFO_TTL_SECONDS,
+        negative_ttl: float = ACCOUNT_INFO_NEGATIVE_TTL_SECONDS,
+        max_entries: int = ACCOUNT_INFO_MAX_ENTRIES,
+        fetch: AccountInfoFetcher = fetch_account_info,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._fetch = fetch
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[dict[str, Any], float]] = OrderedDict()
+        self._lookups: SingleFlight[dict[str, Any]] = SingleFlight()
+
+    async def get(self, token: str, endpoint: str | None) -> dict[str, Any]:
+        """Return the account info of `token`, or an empty dict if it is unknown."""
+        # key on a digest so the cache does not hold on to raw tokens
+        key = hashlib.sha256(f"{endpoint}\0{token}".encode()).hexdigest()
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > self._clock():
+            return entry[0]
+        return await self._lookups.run(key, lambda: self._lookup(key, token, endpoint))
+
+    async def _lookup(
+        self, key: str, token: str, endpoint: str | None
+    ) -> dict[str, Any]:
+        try:
+            account_info = await asyncio.get_running_loop().run_in_executor(
+                None, self._fetch, token, endpoint
+            )
+        except Exception as e:
+            logger.info(f"Error fetching account info: {e}")
+            account_info = {}
+        ttl = self.ttl if account_info else self.negative_ttl
+        self._entries.pop(key, None)
+        self._entries[key] = (account_info, self._clock() + ttl)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return account_info
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -12,20 +12,39 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import asyncio
+import atexit
 import hashlib
 import json
+import os
+import re
+import threading
+import time
 import uuid
+import weakref
 from abc import ABC
-from contextlib import asynccontextmanager
-from dataclasses import dataclass
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from dataclasses import dataclass, replace
 from datetime import datetime, timezone
 from enum import Enum
 from pathlib import Path
-from typing import Any, AsyncGenerator, List, Optional, cast
+from typing import (
+    Any,
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    List,
+    Optional,
+    TypeVar,
+    cast,
+)
 
 import duckdb
 import polars as pl
+import pyarrow as pa
+from pydantic import BaseModel
 
+from utils.column_profiles import profile_dataframe, profile_relation
+from utils.connection_manager import DuckDBConnectionManager, connection_manager
 from utils.logging_helper import get_logger
 from utils.persistent_storage import PersistentStorage
 from utils.schema import (
@@ -34,14 +53,85 @@ from utils.schema import (
     ChatJSONEncoder,
     CleansedColumnReport,
     CleansedDataset,
+    ColumnProfile,
+    Component,
+    ComponentStub,
     DataDictionary,
+    EnhancedQuestionGeneration,
+    GetBusinessAnalysisResult,
+    RunAnalysisResult,
+    RunChartsResult,
+    RunDatabaseAnalysisResult,
 )
 
 logger = get_logger("ApplicationDB")
 
-# increment this number if the database schema has changed to prevent conflicts with existing deployments
-# this will force reinitialisation - all tables will be dropped
-ANALYST_DATABASE_VERSION = 5
+T = TypeVar("T")
+
+# increment this number if the database schema has changed and register a Migration
+# from the previous version in the `migrations` of the affected handlers
+ANALYST_DATABASE_VERSION = 6
+
+# databases older than this have no migration path and are reinitialised - all tables are dropped
+OLDEST_MIGRATABLE_DATABASE_VERSION = 4
+
+# seconds to wait after the last write before uploading a database to persistent storage
+PERSISTENT_STORAGE_FLUSH_DELAY = float(
+    os.environ.get("PERSISTENT_STORAGE_FLUSH_DELAY", 5)
+)
+
+# keep all users in one shared database file per handler, each in a schema of its own
+SHARED_DATABASE = os.environ.get("ANALYST_SHARED_DATABASE", "").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# store datasets as Parquet files exposed as views instead of tables inside the database file
+PARQUET_DATASET_STORAGE = os.environ.get("PARQUET_DATASET_STORAGE", "").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+# rows per Parquet row group, a multiple of DuckDB's 2048-row vectors sized for scans
+PARQUET_ROW_GROUP_SIZE = int(os.environ.get("PARQUET_ROW_GROUP_SIZE", 122_880))
+
+# attempts of a transaction that conflicts with a concurrent write to the same rows
+TRANSACTION_MAX_ATTEMPTS = int(os.environ.get("TRANSACTION_MAX_ATTEMPTS", 3))
+# seconds to wait before retrying a conflicting transaction, doubled on each retry
+TRANSACTION_RETRY_DELAY = float(os.environ.get("TRANSACTION_RETRY_DELAY", 0.05))
+
+# rows DuckDB samples to detect the dialect and column types of an uploaded CSV
+CSV_SNIFF_ROWS = int(os.environ.get("CSV_SNIFF_ROWS", 20_480))
+
+# rows of table-backed datasets a delete must free before it checkpoints right away
+DELETE_CHECKPOINT_ROWS = int(os.environ.get("DELETE_CHECKPOINT_ROWS", 1_000_000))
+
+_MUTATING_STATEMENT = re.compile(
+    r"^\s*(INSERT|UPDATE|DELETE|CREATE|DROP|ALTER|COPY|TRUNCATE)\b", re.IGNORECASE
+)
+
+
+async def _run_interruptible(
+    conn: duckdb.DuckDBPyConnection, work: Callable[[], T]
+) -> T:
+    """
+    Run `work` on `conn` in the executor, interrupting it if the caller is cancelled.
+
+    A cancelled await would otherwise leave the query running on its thread
+    while the cursor goes back to the pool, so the query is interrupted and
+    waited for before the cancellation is passed on.
+    """
+    future = asyncio.get_running_loop().run_in_executor(None, work)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        conn.interrupt()
+        try:
+            await future
+        except Exception:
+            pass
+        raise
 
 
 class DatasetType(Enum):
@@ -69,11 +159,58 @@ class DatasetMetadata:
     row_count: int
     data_source: DataSourceType
     file_size: int = 0  # Size of the file in bytes
+    storage_path: str | None = None  # Parquet file backing the dataset, if any
+
+
+@dataclass
+class SampleSpec:
+    """
+    Random sample pushed into DuckDB as `USING SAMPLE`.
+
+    Exactly one of `rows` (reservoir sample of n rows) or `percent`
+    (bernoulli sample) must be set; `seed` makes the sample repeatable.
+    """
+
+    rows: int | None = None
+    percent: float | None = None
+    seed: int | None = None
+
+    def to_sql(self) -> str:
+        if (self.rows is None) == (self.percent is None):
+            raise ValueError("SampleSpec needs exactly one of rows or percent")
+        if self.rows is not None:
+            clause = f"USING SAMPLE reservoir({max(int(self.rows), 0)} ROWS)"
+        else:
+            clause = (
+                f"USING SAMPLE bernoulli({float(cast(float, self.percent))} PERCENT)"
+            )
+        if self.seed is not None:
+            clause += f" REPEATABLE ({int(self.seed)})"
+        return clause
+
+
+@dataclass(frozen=True)
+class Migration:
+    """
+    Schema change taking a handler's database from one version to the next.
+
+    `apply` runs inside the migration transaction. Derived datasets of the
+    types in `stale_artifacts` are rebuilt lazily the next time they are read,
+    see `register_artifact_rebuilder`.
+    """
+
+    description: str
+    apply: Callable[[duckdb.DuckDBPyConnection], None]
+    stale_artifacts: tuple[DatasetType, ...] = ()
 
 
 class BaseDuckDBHandler(ABC):
     """Abstract base class defining the common async DuckDB interface."""
 
+    # schema changes keyed by the version they migrate from, a missing version
+    # means the step does not change this handler's tables
+    migrations: dict[int, Migration] = {}
+
     def __init__(
         self,
         *,
@@ -84,12 +221,33 @@ class BaseDuckDBHandler(ABC):
             int | None
         ) = 1,  # should be updated after updating db tables structure
         use_persistent_storage: bool = False,
+        connections: DuckDBConnectionManager | None = None,
+        shared: bool = False,
     ) -> None:
-        """Initialize database path and create tables."""
+        """
+        Initialize database path and create tables.
+
+        With `shared`, the database file is shared by all users and the
+        handler's tables live in a schema named after `user_id`.
+        """
+        if shared and not user_id:
+            raise ValueError("user_id is required for a shared database")
+        if shared and use_persistent_storage:
+            raise ValueError("Persistent storage is not supported for shared databases")
         self.db_version = db_version
         self.user_id = user_id
-        self.db_path = self.get_db_path(user_id=user_id, db_path=db_path, name=name)
+        self.schema = _tenant_schema(user_id) if shared and user_id else None
+        self.db_path = self.get_db_path(
+            user_id=None if shared else user_id, db_path=db_path, name=name
+        )
         self._storage = PersistentStorage(user_id) if use_persistent_storage else None
+        self._connections = connections or connection_manager
+        self._registered = False
+        self._dirty = False
+        self._flush_lock = threading.Lock()
+        self._flush_timer: threading.Timer | None = None
+        if self._storage:
+            _persistent_handlers.add(self)
 
     async def _create_db_version_table(
         self,
@@ -103,28 +261,69 @@ class BaseDuckDBHandler(ABC):
                 version INTEGER PRIMARY KEY
             )
             """,
+            track_writes=False,
         )
         # insert new version
         await self.execute_query(
-            conn, "INSERT OR IGNORE INTO db_version VALUES (?)", [self.db_version]
+            conn,
+            "INSERT OR IGNORE INTO db_version VALUES (?)",
+            [self.db_version],
+            track_writes=False,
         )
 
+    async def initialize(self) -> None:
+        """
+        Prepare the database for use.
+
+        The schema of a shared database is initialized once per process, later
+        sessions of the same user only register with the connection manager.
+        """
+        key = (
+            (type(self), str(self.db_path.absolute()), self.schema, self.db_version)
+            if self.schema
+            else None
+        )
+        if key and key in _initialized_tenants:
+            await self._register()
+            return
+        await self._initialize_database()
+        if key:
+            _initialized_tenants.add(key)
+
+    async def _register(self) -> None:
+        if not self._registered:
+            # keep the database open for the lifetime of the handler
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._connections.register, self.db_path
+            )
+            self._registered = True
+
     async def _initialize_database(self) -> None:
         """Initialize database tables and extensions."""
         if self._storage and not self.db_path.exists():
             self._storage.fetch_from_storage(
                 self.db_path.name, str(self.db_path.absolute())
             )
+        await self._register()
+        schema = self.schema
+        if schema:
+
+            def create_schema() -> None:
+                conn = self._connections.acquire(self.db_path)
+                try:
+                    conn.execute(
+                        f"CREATE SCHEMA IF NOT EXISTS {_quote_identifier(schema)}"
+                    )
+                finally:
+                    self._connections.release(self.db_path, conn)
+
+            await asyncio.get_running_loop().run_in_executor(None, create_schema)
         async with self._get_connection() as conn:
             # check if db_version table exist
-            db_version_result = await self.execute_query(
-                conn,
-                "SELECT EXISTS (SELECT 1 FROM information_schema.tables WHERE table_schema = 'main' AND table_name = 'db_version');",
-            )
             old_db_version_table = await asyncio.get_running_loop().run_in_executor(
-                None, db_version_result.fetchone
+                None, _table_exists, conn, "db_version"
             )
-            if old_db_version_table and old_db_version_table[0]:
+            if old_db_version_table:
                 # get db version
                 db_version_result = await self.execute_query(
                     conn, "SELECT version FROM db_version"
@@ -134,67 +333,237 @@ class BaseDuckDBHandler(ABC):
                 )
                 if db_version_row:
                     db_version = db_version_row[0]
-                    if db_version != self.db_version:
-                        # drop all tables
-                        tables_result = await self.execute_query(
-                            conn,
-                            "SELECT table_name FROM information_schema.tables WHERE table_schema = 'main';",
+                    if db_version == self.db_version:
+                        return
+                    if (
+                        self.db_version is not None
+                        and OLDEST_MIGRATABLE_DATABASE_VERSION
+                        <= db_version
+                        < self.db_version
+                    ):
+                        await asyncio.get_running_loop().run_in_executor(
+                            None, self._migrate, conn, db_version
                         )
-                        table_rows = await asyncio.get_running_loop().run_in_executor(
-                            None, tables_result.fetchall
+                        self._mark_dirty()
+                        return
+
+                    logger.warning(
+                        f"Cannot migrate {self.db_path.name} from version "
+                        f"{db_version} to {self.db_version}, dropping all tables"
+                    )
+                    # drop all tables
+                    tables_result = await self.execute_query(
+                        conn,
+                        "SELECT table_name, table_type FROM information_schema.tables WHERE table_schema = current_schema();",
+                    )
+                    table_rows = await asyncio.get_running_loop().run_in_executor(
+                        None, tables_result.fetchall
+                    )
+                    for table_name, table_type in table_rows:
+                        kind = "VIEW" if table_type == "VIEW" else "TABLE"
+                        await self.execute_query(
+                            conn, f'DROP {kind} IF EXISTS "{table_name}";'
                         )
-                        for (table_name,) in table_rows:
-                            await self.execute_query(
-                                conn, f'DROP TABLE IF EXISTS "{table_name}";'
-                            )
 
-                        await self._create_db_version_table(conn)
+                    await self._create_db_version_table(conn)
             else:
                 await self._create_db_version_table(conn)
 
+    def _migrate(self, conn: duckdb.DuckDBPyConnection, from_version: int) -> None:
+        """Apply the registered migrations from `from_version` to `db_version`."""
+        for version in range(from_version, cast(int, self.db_version)):
+            migration = self.migrations.get(version)
+            logger.info(
+                f"Migrating {self.db_path.name} from version {version} to "
+                f"{version + 1}" + (f": {migration.description}" if migration else "")
+            )
+            conn.execute("BEGIN TRANSACTION")
+            try:
+                if migration:
+                    migration.apply(conn)
+                    if migration.stale_artifacts:
+                        _mark_artifacts_stale(conn, migration.stale_artifacts)
+                conn.execute("DELETE FROM db_version")
+                conn.execute("INSERT INTO db_version VALUES (?)", [version + 1])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    async def close(self) -> None:
+        """Flush pending writes and release the shared database instance."""
+        await self.flush()
+        if self._registered:
+            self._registered = False
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._connections.unregister, self.db_path
+            )
+
+    def _acquire(self) -> duckdb.DuckDBPyConnection:
+        """Acquire a cursor that resolves table names in the handler's schema."""
+        conn = self._connections.acquire(self.db_path)
+        if self.schema:
+            try:
+                conn.execute(f"SET schema = '{self.schema}'")
+            except Exception:
+                self._connections.release(self.db_path, conn)
+                raise
+        return conn
+
     @asynccontextmanager
     async def _get_connection(self) -> AsyncGenerator[duckdb.DuckDBPyConnection, Any]:
-        """Async context manager for database connections."""
+        """Async context manager handing out a cursor on the shared database."""
         loop = asyncio.get_running_loop()
-        conn = await loop.run_in_executor(None, duckdb.connect, self.db_path)
-        async with self._save_to_storage():
+        conn = await loop.run_in_executor(None, self._acquire)
+        try:
+            yield conn
+        finally:
+            await loop.run_in_executor(
+                None, self._connections.release, self.db_path, conn
+            )
+
+    async def run_transaction(
+        self,
+        work: Callable[[duckdb.DuckDBPyConnection], T],
+        track_writes: bool = True,
+    ) -> T:
+        """
+        Run the statements in `work` as one unit of work.
+
+        A cursor is acquired, `work` runs between BEGIN and COMMIT and the cursor
+        is released on a single executor call, so a multi-statement write costs
+        one thread-pool round trip. The transaction is rolled back if `work`
+        raises. Use RETURNING clauses inside `work` instead of separate
+        existence checks.
+
+        A write-write conflict with a concurrent transaction is retried up to
+        `TRANSACTION_MAX_ATTEMPTS` times, so `work` must be safe to run again.
+        """
+
+        def run() -> T:
+            conn = self._acquire()
             try:
-                yield conn
+                attempt = 1
+                while True:
+                    conn.execute("BEGIN TRANSACTION")
+                    try:
+                        result = work(conn)
+                        conn.execute("COMMIT")
+                        return result
+                    except duckdb.TransactionException as e:
+                        try:
+                            conn.execute("ROLLBACK")
+                        except duckdb.Error:
+                            # a failed COMMIT has already ended the transaction
+                            pass
+                        if attempt >= TRANSACTION_MAX_ATTEMPTS:
+                            raise
+                        logger.debug(
+                            f"Retrying transaction on {self.db_path.name} "
+                            f"after a conflict: {e}"
+                        )
+                        time.sleep(TRANSACTION_RETRY_DELAY * 2 ** (attempt - 1))
+                        attempt += 1
+                    except Exception:
+                        conn.execute("ROLLBACK")
+                        raise
             finally:
-                await loop.run_in_executor(None, conn.close)
+                self._connections.release(self.db_path, conn)
 
-    @asynccontextmanager
-    async def _save_to_storage(self) -> AsyncGenerator[None, None]:
-        # if we have storage, check DB hashsum before and after connection
-        # and save if file changed
-        if self._storage:
-            before = hashlib.sha256()
-            with self.db_path.open("rb") as db_file:
-                while chunk := db_file.read(8192):
-                    before.update(chunk)
-            yield
-            after = hashlib.sha256()
-            with self.db_path.open("rb") as db_file:
-                while chunk := db_file.read(8192):
-                    after.update(chunk)
-            if before.digest() != after.digest():
-                self._storage.save_to_storage(
-                    self.db_path.name, str(self.db_path.absolute())
+        result = await asyncio.get_running_loop().run_in_executor(None, run)
+        if track_writes:
+            self._mark_dirty()
+        return result
+
+    def _mark_dirty(self) -> None:
+        """Record a write and schedule a debounced flush to persistent storage."""
+        if not self._storage:
+            return
+        with self._flush_lock:
+            self._dirty = True
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+            self._flush_timer = threading.Timer(
+                PERSISTENT_STORAGE_FLUSH_DELAY, self._flush_to_storage
+            )
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _flush_to_storage(self) -> None:
+        """Snapshot the database and upload it if there are unsaved writes."""
+        if not self._storage:
+            return
+        with self._flush_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+        # unique per flush, as other handlers of the same file flush on their own
+        snapshot_id = uuid.uuid4().hex
+        snapshot_path = self.db_path.with_name(
+            f"{self.db_path.name}.{snapshot_id}.snapshot"
+        )
+        try:
+            conn = self._connections.acquire(self.db_path)
+            try:
+                # other cursors keep committing to the shared instance, so the
+                # file itself is never copied; DuckDB writes the snapshot from
+                # a single transaction instead, which makes it consistent
+                alias = _quote_identifier(f"snapshot_{snapshot_id}")
+                conn.execute(
+                    f"ATTACH {_sql_string(str(snapshot_path.absolute()))} AS {alias}"
                 )
-        else:
-            yield
+                try:
+                    conn.execute(
+                        "COPY FROM DATABASE "
+                        f"{_quote_identifier(_current_database(conn))} TO {alias}"
+                    )
+                    # the upload is the database file alone, without a WAL
+                    conn.execute(f"CHECKPOINT {alias}")
+                finally:
+                    conn.execute(f"DETACH {alias}")
+            finally:
+                self._connections.release(self.db_path, conn)
+            # files first, so the uploaded catalog never references a missing file
+            self._sync_files_to_storage()
+            self._storage.save_to_storage(self.db_path.name, str(snapshot_path))
+        except Exception as e:
+            logger.warning(f"Failed to save {self.db_path.name} to storage: {e}")
+            self._mark_dirty()
+        finally:
+            snapshot_path.unlink(missing_ok=True)
+            snapshot_path.with_name(f"{snapshot_path.name}.wal").unlink(missing_ok=True)
+
+    def _sync_files_to_storage(self) -> None:
+        """Upload or delete files kept next to the database, see DatasetHandler."""
+
+    async def flush(self) -> None:
+        """Save pending writes to persistent storage now instead of after the delay."""
+        await asyncio.get_running_loop().run_in_executor(None, self._flush_to_storage)
 
     async def execute_query(
         self,
         conn: duckdb.DuckDBPyConnection,
         query: str,
         params: list[Any] | None = None,
+        track_writes: bool = True,
     ) -> duckdb.DuckDBPyConnection:
-        """Execute a query asynchronously."""
-        loop = asyncio.get_running_loop()
+        """
+        Execute a query asynchronously.
+
+        Mutating statements mark the handler dirty so the database is saved to
+        persistent storage; pass `track_writes=False` for idempotent schema setup.
+        Cancelling the caller interrupts the query.
+        """
         if params:
-            return await loop.run_in_executor(None, lambda: conn.execute(query, params))
-        return await loop.run_in_executor(None, lambda: conn.execute(query))
+            result = await _run_interruptible(conn, lambda: conn.execute(query, params))
+        else:
+            result = await _run_interruptible(conn, lambda: conn.execute(query))
+        if track_writes and _MUTATING_STATEMENT.match(query):
+            self._mark_dirty()
+        return result
 
     @staticmethod
     def get_db_path(
@@ -206,10 +575,391 @@ class BaseDuckDBHandler(ABC):
         return path / name
 
 
+_persistent_handlers: "weakref.WeakSet[BaseDuckDBHandler]" = weakref.WeakSet()
+
+# (handler type, database path, schema, version) of shared schemas initialized by this process
+_initialized_tenants: set[tuple[type, str, str, int | None]] = set()
+
+
+def _tenant_schema(user_id: str) -> str:
+    """Name of the schema holding a user's tables in a shared database."""
+    return f"user_{hashlib.sha256(user_id.encode()).hexdigest()[:16]}"
+
+
+def flush_persistent_storage() -> None:
+    """Upload every handler's pending writes, e.g. on application shutdown."""
+    for handler in list(_persistent_handlers):
+        handler._flush_to_storage()
+
+
+atexit.register(flush_persistent_storage)
+
+
+def _quote_identifier(name: str) -> str:
+    """Quote a table or column name for use in a DuckDB statement."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_string(value: str) -> str:
+    """Quote a string literal, such as a file path, for a DuckDB statement."""
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _current_database(conn: duckdb.DuckDBPyConnection) -> str:
+    row = conn.execute("SELECT current_database()").fetchone()
+    return str(row[0]) if row else ""
+
+
+def _table_exists(conn: duckdb.DuckDBPyConnection, name: str) -> bool:
+    """
+    Check whether a table exists in the cursor's schema.
+
+    Binding a query is constant time, while information_schema lists the
+    tables of every schema in a shared database. A binder error does not abort
+    an open transaction.
+    """
+    try:
+        conn.execute(f"SELECT 1 FROM {_quote_identifier(name)} LIMIT 0")
+    except duckdb.CatalogException:
+        return False
+    return True
+
+
+def _check_columns(metadata: DatasetMetadata, columns: list[str]) -> None:
+    unknown = [column for column in columns if column not in metadata.columns]
+    if unknown:
+        raise ValueError(f"Dataset '{metadata.name}' has no columns {unknown}")
+
+
+def _select_query(
+    metadata: DatasetMetadata,
+    columns: list[str] | None = None,
+    filter: str | None = None,
+) -> str:
+    """Build the SELECT for a projection and filter of a registered table."""
+    if columns:
+        _check_columns(metadata, columns)
+    query = (
+        f"SELECT {', '.join(map(_quote_identifier, columns)) if columns else '*'}"
+        f" FROM {_quote_identifier(metadata.name)}"
+    )
+    if filter:
+        query += f" WHERE ({filter})"
+    return query
+
+
+class DatasetCatalog:
+    """
+    In-process copy of the `dataset_metadata` rows of one database file.
+
+    Existence, type and related-dataset lookups run on every dataset access, so
+    they are answered from memory. The catalog is loaded once and kept current
+    by the handler's writes. It is shared by all handlers of a file so that
+    sessions of the same user do not see stale entries.
+
+    The `stale_artifacts` markers are loaded with it, so the check for a
+    pending rebuild on every read of a derived dataset needs no query.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[str, DatasetMetadata] | None = None
+        self._stale: set[tuple[str, DatasetType]] = set()
+        self._generation = 0
+        # handlers using the catalog, it is dropped when the last one closes
+        self.handlers = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def snapshot(self) -> dict[str, DatasetMetadata] | None:
+        """Return the cached entries, or None if the catalog is not loaded."""
+        with self._lock:
+            return None if self._entries is None else dict(self._entries)
+
+    def load(
+        self,
+        generation: int,
+        entries: dict[str, DatasetMetadata],
+        stale: set[tuple[str, DatasetType]],
+    ) -> None:
+        """Install entries read from DuckDB unless a write happened meanwhile."""
+        with self._lock:
+            if generation == self._generation:
+                self._entries = entries
+                self._stale = stale
+
+    def mark_stale(self, name: str, dataset_type: DatasetType) -> None:
+        with self._lock:
+            self._generation += 1
+            self._stale.add((name, dataset_type))
+
+    def claim_stale(self, name: str, dataset_type: DatasetType) -> bool | None:
+        """
+        Remove a stale marker, returning whether it was set, or None if the
+        catalog is not loaded and DuckDB has to be asked.
+        """
+        with self._lock:
+            if self._entries is None:
+                return None
+            if (name, dataset_type) not in self._stale:
+                return False
+            self._generation += 1
+            self._stale.discard((name, dataset_type))
+            return True
+
+    def discard_stale(self, name: str, dataset_type: DatasetType) -> None:
+        """Drop the markers of a deleted dataset; all of them for an original."""
+        with self._lock:
+            self._generation += 1
+            self._stale = {
+                (stale_name, stale_type)
+                for stale_name, stale_type in self._stale
+                if stale_name != name
+                or (dataset_type != DatasetType.STANDARD and stale_type != dataset_type)
+            }
+
+    def put(self, metadata: DatasetMetadata) -> None:
+        with self._lock:
+            self._generation += 1
+            if self._entries is not None:
+                self._entries[metadata.name] = metadata
+
+    def remove(self, name: str) -> None:
+        with self._lock:
+            self._generation += 1
+            if self._entries is not None:
+                self._entries.pop(name, None)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries = None
+            self._stale = set()
+
+
+_dataset_catalogs: dict[tuple[str, str | None], DatasetCatalog] = {}
+_dataset_catalogs_lock = threading.Lock()
+
+
+def _add_dataset_file_size(conn: duckdb.DuckDBPyConnection) -> None:
+    conn.execute(
+        "ALTER TABLE IF EXISTS dataset_metadata "
+        "ADD COLUMN IF NOT EXISTS file_size INTEGER DEFAULT 0"
+    )
+
+
+def _add_dataset_storage_path(conn: duckdb.DuckDBPyConnection) -> None:
+    conn.execute(
+        "ALTER TABLE IF EXISTS dataset_metadata "
+        "ADD COLUMN IF NOT EXISTS storage_path VARCHAR"
+    )
+
+
+_STALE_ARTIFACTS_TABLE = """
+CREATE TABLE IF NOT EXISTS stale_artifacts (
+    dataset_name VARCHAR,
+    dataset_type VARCHAR,
+    PRIMARY KEY (dataset_name, dataset_type)
+)
+"""
+
+
+def _mark_artifacts_stale(
+    conn: duckdb.DuckDBPyConnection, dataset_types: tuple[DatasetType, ...]
+) -> None:
+    """Queue every existing dataset of `dataset_types` for a lazy rebuild."""
+    conn.execute(_STALE_ARTIFACTS_TABLE)
+    if not _table_exists(conn, "dataset_metadata"):
+        return
+    placeholders = ", ".join("?" for _ in dataset_types)
+    conn.execute(
+        f"""
+        INSERT OR IGNORE INTO stale_artifacts
+        SELECT DISTINCT original_name, dataset_type FROM dataset_metadata
+        WHERE dataset_type IN ({placeholders})
+        """,
+        [dataset_type.value for dataset_type in dataset_types],
+    )
+
+
+ArtifactRebuilder = Callable[["AnalystDB", str], Awaitable[None]]
+
+_artifact_rebuilders: dict[DatasetType, ArtifactRebuilder] = {}
+
+
+def register_artifact_rebuilder(
+    dataset_type: DatasetType, rebuilder: ArtifactRebuilder
+) -> None:
+    """
+    Register how to recreate the derived dataset of `dataset_type` for a
+    dataset after a migration marked it stale. The rebuilder is called with the
+    database and the original dataset name on first access.
+    """
+    _artifact_rebuilders[dataset_type] = rebuilder
+
+
+def _store_column_profiles(
+    conn: duckdb.DuckDBPyConnection, name: str, profiles: list[ColumnProfile]
+) -> None:
+    if not profiles:
+        return
+    conn.executemany(
+        "INSERT OR REPLACE INTO column_profiles VALUES (?, ?, ?)",
+        [
+            [name, position, profile.model_dump_json()]
+            for position, profile in enumerate(profiles)
+        ],
+    )
+
+
+def _insert_dataset_metadata(
+    conn: duckdb.DuckDBPyConnection, metadata: DatasetMetadata
+) -> DatasetMetadata:
+    """
+    Insert a catalog row and return `metadata` as it was stored, which is what
+    the catalog holds once it is reloaded from DuckDB.
+    """
+    result = conn.execute(
+        """
+        INSERT INTO dataset_metadata
+        (table_name, dataset_type, original_name, created_at, columns, row_count, data_source, file_size, storage_path)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        RETURNING created_at
+        """,
+        [
+            metadata.name,
+            metadata.dataset_type.value,
+            metadata.original_name,
+            metadata.created_at,
+            json.dumps(metadata.columns),
+            metadata.row_count,
+            metadata.data_source.value,
+            metadata.file_size,
+            metadata.storage_path,
+        ],
+    )
+    (created_at,) = result.fetchone() or (metadata.created_at,)
+    return replace(metadata, created_at=created_at)
+
+
+def _acquire_dataset_catalog(key: tuple[str, str | None]) -> DatasetCatalog:
+    with _dataset_catalogs_lock:
+        catalog = _dataset_catalogs.setdefault(key, DatasetCatalog())
+        catalog.handlers += 1
+        return catalog
+
+
+def _release_dataset_catalog(key: tuple[str, str | None]) -> None:
+    with _dataset_catalogs_lock:
+        catalog = _dataset_catalogs.get(key)
+        if catalog is None:
+            return
+        catalog.handlers -= 1
+        if catalog.handlers <= 0:
+            del _dataset_catalogs[key]
+
+
 class DatasetHandler(BaseDuckDBHandler):
+    migrations = {
+        4: Migration("track source file sizes", _add_dataset_file_size),
+        5: Migration("store datasets as Parquet files", _add_dataset_storage_path),
+    }
+
+    def __init__(
+        self, *, use_parquet_storage: bool = PARQUET_DATASET_STORAGE, **kwargs: Any
+    ) -> None:
+        super().__init__(**kwargs)
+        catalog_key = (str(self.db_path.absolute()), self.schema)
+        self._catalog = _acquire_dataset_catalog(catalog_key)
+        # released on close, or when a handler that was never closed is collected
+        self._release_catalog = weakref.finalize(
+            self, _release_dataset_catalog, catalog_key
+        )
+        self.use_parquet_storage = use_parquet_storage
+        self.parquet_dir = self.db_path.with_name(f"{self.db_path.stem}_parquet")
+        # Parquet files waiting to be uploaded to / deleted from persistent storage
+        self._pending_uploads: set[str] = set()
+        self._pending_deletes: set[str] = set()
+
+    async def close(self) -> None:
+        await super().close()
+        self._release_catalog()
+
+    def _parquet_storage_name(self, storage_path: str) -> str:
+        return f"{self.db_path.stem}_{storage_path}"
+
+    def _parquet_path(self, storage_path: str) -> str:
+        """The Parquet file of a dataset as a SQL string literal."""
+        return _sql_string(str((self.parquet_dir / storage_path).absolute()))
+
+    def _parquet_view(self, name: str, storage_path: str) -> str:
+        return (
+            f"CREATE OR REPLACE VIEW {_quote_identifier(name)} AS "
+            f"SELECT * FROM read_parquet({self._parquet_path(storage_path)})"
+        )
+
+    def _relocate_parquet_views(self, conn: duckdb.DuckDBPyConnection) -> None:
+        """
+        Point the views of Parquet-backed datasets at this handler's
+        `parquet_dir`. Views hold absolute paths, which no longer match once
+        the database file is fetched from storage or moved to another directory.
+        """
+        rows = conn.execute(
+            """
+            SELECT m.table_name, m.storage_path, v.sql
+            FROM dataset_metadata m
+            LEFT JOIN duckdb_views() v
+                ON v.view_name = m.table_name AND v.schema_name = current_schema()
+            WHERE m.storage_path IS NOT NULL
+            """
+        ).fetchall()
+        for name, storage_path, sql in rows:
+            if sql is None or self._parquet_path(storage_path) not in sql:
+                conn.execute(self._parquet_view(name, storage_path))
+
+    def _sync_files_to_storage(self) -> None:
+        if not self._storage:
+            return
+        with self._flush_lock:
+            uploads, self._pending_uploads = self._pending_uploads, set()
+            deletes, self._pending_deletes = self._pending_deletes, set()
+        try:
+            for storage_path in uploads:
+                local_path = self.parquet_dir / storage_path
+                if local_path.exists():
+                    self._storage.save_to_storage(
+                        self._parquet_storage_name(storage_path), str(local_path)
+                    )
+            for storage_path in deletes:
+                self._storage.delete_file(self._parquet_storage_name(storage_path))
+        except Exception:
+            with self._flush_lock:
+                self._pending_uploads |= uploads - self._pending_deletes
+                self._pending_deletes |= deletes
+            raise
+
+    async def _ensure_local_file(self, metadata: DatasetMetadata) -> None:
+        """Fetch the Parquet file of a dataset from persistent storage if missing."""
+        if not metadata.storage_path or not self._storage:
+            return
+        local_path = self.parquet_dir / metadata.storage_path
+        if local_path.exists():
+            return
+        self.parquet_dir.mkdir(parents=True, exist_ok=True)
+        await asyncio.get_running_loop().run_in_executor(
+            None,
+            self._storage.fetch_from_storage,
+            self._parquet_storage_name(metadata.storage_path),
+            str(local_path.absolute()),
+        )
+
     async def _initialize_database(self) -> None:
         """Initialize database tables and metadata tracking."""
         await super()._initialize_database()
+        # the file may have been fetched from storage or reset by a version change
+        self._catalog.invalidate()
         async with self._get_connection() as conn:
             # Create metadata table
             await self.execute_query(
@@ -223,9 +973,11 @@ class DatasetHandler(BaseDuckDBHandler):
                     columns JSON,
                     row_count INTEGER,
                     data_source VARCHAR,
-                    file_size INTEGER DEFAULT 0
+                    file_size INTEGER DEFAULT 0,
+                    storage_path VARCHAR
                 )
                 """,
+                track_writes=False,
             )
             # Create cleansing reports table
             await self.execute_query(
@@ -237,7 +989,66 @@ class DatasetHandler(BaseDuckDBHandler):
                     PRIMARY KEY (dataset_name)
                 )
                 """,
+                track_writes=False,
+            )
+            # Derived datasets waiting to be rebuilt after a migration
+            await self.execute_query(conn, _STALE_ARTIFACTS_TABLE, track_writes=False)
+            # Column statistics computed when a dataset is registered
+            await self.execute_query(
+                conn,
+                """
+                CREATE TABLE IF NOT EXISTS column_profiles (
+                    table_name VARCHAR,
+                    position INTEGER,
+                    profile JSON,
+                    PRIMARY KEY (table_name, position)
+                )
+                """,
+                track_writes=False,
+            )
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._relocate_parquet_views, conn
+            )
+
+    async def mark_stale(self, name: str, dataset_type: DatasetType) -> None:
+        """Queue the derived dataset of `dataset_type` for `name` for a rebuild."""
+        async with self._get_connection() as conn:
+            await self.execute_query(
+                conn,
+                "INSERT OR IGNORE INTO stale_artifacts VALUES (?, ?)",
+                [name, dataset_type.value],
+            )
+        self._catalog.mark_stale(name, dataset_type)
+
+    async def claim_rebuild(self, name: str, dataset_type: DatasetType) -> bool:
+        """
+        Remove the derived dataset of `dataset_type` for `name` from the rebuild
+        queue, returning whether it was queued. Only one caller claims it.
+
+        The queue is read from the catalog, so DuckDB is only written to when
+        there is a marker to remove.
+        """
+        await self._catalog_entries()
+        claimed_in_catalog = self._catalog.claim_stale(name, dataset_type)
+        if claimed_in_catalog is False:
+            return False
+        async with self._get_connection() as conn:
+            result = await self.execute_query(
+                conn,
+                """
+                DELETE FROM stale_artifacts
+                WHERE dataset_name = ? AND dataset_type = ?
+                RETURNING dataset_name
+                """,
+                [name, dataset_type.value],
+                track_writes=False,
             )
+            claimed = await asyncio.get_running_loop().run_in_executor(
+                None, result.fetchall
+            )
+            if claimed:
+                self._mark_dirty()
+            return bool(claimed) or bool(claimed_in_catalog)
 
     async def register_dataframe(
         self,
@@ -273,48 +1084,197 @@ class DatasetHandler(BaseDuckDBHandler):
             if not await self.table_exists(original_name):
                 raise ValueError(f"Original dataset '{original_name}' not found")
 
-        async with self._get_connection() as conn:
-            # Create the table
+        loop = asyncio.get_running_loop()
+        profiles = await loop.run_in_executor(None, profile_dataframe, df)
+        storage_path = None
+        if self.use_parquet_storage:
+            # Write the dataset as a Parquet file and expose it as a view
+            storage_path = f"{uuid.uuid4().hex}.parquet"
+            parquet_file = self.parquet_dir / storage_path
+
+            def write_parquet() -> None:
+                self.parquet_dir.mkdir(parents=True, exist_ok=True)
+                df.write_parquet(
+                    parquet_file.absolute(),
+                    compression="zstd",
+                    row_group_size=PARQUET_ROW_GROUP_SIZE,
+                )
+
+            await loop.run_in_executor(None, write_parquet)
+        else:
             arrow_table = df.to_arrow()
 
-            def create_table() -> None:
+        metadata = DatasetMetadata(
+            name=name,
+            dataset_type=dataset_type,
+            original_name=original_name or name,
+            created_at=datetime.now(timezone.utc),
+            columns=list(df.columns),
+            row_count=len(df),
+            data_source=data_source,
+            file_size=file_size,
+            storage_path=storage_path,
+        )
+
+        def register(conn: duckdb.DuckDBPyConnection) -> DatasetMetadata:
+            if storage_path:
+                conn.execute(self._parquet_view(name, storage_path))
+            else:
                 conn.register("temp_view", arrow_table)
-                conn.execute(f"CREATE TABLE '{name}' AS SELECT * FROM temp_view")
-                conn.unregister("temp_view")
-
-            await asyncio.get_running_loop().run_in_executor(None, create_table)
-
-            # Store metadata
-            metadata = DatasetMetadata(
-                name=name,
-                dataset_type=dataset_type,
-                original_name=original_name or name,
-                created_at=datetime.now(timezone.utc),
-                columns=list(df.columns),
-                row_count=len(df),
-                data_source=data_source,
-                file_size=file_size,
+                try:
+                    conn.execute(
+                        f"CREATE TABLE {_quote_identifier(name)} AS "
+                        "SELECT * FROM temp_view"
+                    )
+                finally:
+                    conn.unregister("temp_view")
+            _store_column_profiles(conn, name, profiles)
+            return _insert_dataset_metadata(conn, metadata)
+
+        # the dataset, its profiles and its catalog row are written together
+        await self._create_dataset(register, storage_path)
+
+    async def register_csv(
+        self,
+        path: Path,
+        name: str,
+        data_source: DataSourceType,
+        file_size: int = 0,
+    ) -> None:
+        """
+        Load a CSV file into a new standard dataset with DuckDB's reader.
+
+        The file is streamed into the table, or into the Parquet file of the
+        Parquet tier, without materializing it in Python. Column profiles are
+        aggregated by DuckDB and stored with the dataset.
+
+        Args:
+            path: Local path of the CSV file
+            name: Name for the table
+            data_source: The source of the data
+            file_size: Size of the source file in bytes
+        """
+        logger.info(f"Registering CSV {path.name} as {name}")
+
+        if await self.table_exists(name):
+            raise ValueError(f"Table '{name}' already exists in the database")
+
+        source = (
+            f"read_csv({_sql_string(str(path.absolute()))}, header = true, "
+            f"sample_size = {CSV_SNIFF_ROWS})"
+        )
+        storage_path = None
+        if self.use_parquet_storage:
+            storage_path = f"{uuid.uuid4().hex}.parquet"
+            parquet_path = self._parquet_path(storage_path)
+            async with self._get_connection() as conn:
+
+                def write_parquet() -> None:
+                    self.parquet_dir.mkdir(parents=True, exist_ok=True)
+                    conn.execute(
+                        f"COPY (SELECT * FROM {source}) TO {parquet_path} "
+                        f"(FORMAT parquet, COMPRESSION zstd, "
+                        f"ROW_GROUP_SIZE {PARQUET_ROW_GROUP_SIZE})"
+                    )
+
+                await asyncio.get_running_loop().run_in_executor(None, write_parquet)
+
+        def register(conn: duckdb.DuckDBPyConnection) -> DatasetMetadata:
+            if storage_path:
+                conn.execute(self._parquet_view(name, storage_path))
+            else:
+                conn.execute(
+                    f"CREATE TABLE {_quote_identifier(name)} AS SELECT * FROM {source}"
+                )
+            result = conn.execute(f"SELECT * FROM {_quote_identifier(name)} LIMIT 0")
+            columns = [column[0] for column in result.description or []]
+            profiles = profile_relation(conn, _quote_identifier(name))
+            _store_column_profiles(conn, name, profiles)
+            return _insert_dataset_metadata(
+                conn,
+                DatasetMetadata(
+                    name=name,
+                    dataset_type=DatasetType.STANDARD,
+                    original_name=name,
+                    created_at=datetime.now(timezone.utc),
+                    columns=columns,
+                    row_count=profiles[0].count if profiles else 0,
+                    data_source=data_source,
+                    file_size=file_size,
+                    storage_path=storage_path,
+                ),
             )
 
-            await self.execute_query(
+        await self._create_dataset(register, storage_path)
+
+    async def _create_dataset(
+        self,
+        register: Callable[[duckdb.DuckDBPyConnection], DatasetMetadata],
+        storage_path: str | None,
+    ) -> None:
+        """
+        Create a dataset with `register` in one transaction and add it to the
+        catalog, deleting its Parquet file if the transaction fails.
+        """
+        try:
+            metadata = await self.run_transaction(register)
+        except Exception:
+            # not on cancellation, the transaction may still commit in its thread
+            if storage_path:
+                (self.parquet_dir / storage_path).unlink(missing_ok=True)
+            raise
+        if storage_path:
+            with self._flush_lock:
+                self._pending_uploads.add(storage_path)
+            self._mark_dirty()
+        self._catalog.put(metadata)
+
+    async def _catalog_entries(self) -> dict[str, DatasetMetadata]:
+        """Return the dataset catalog, loading it from DuckDB on first use."""
+        entries = self._catalog.snapshot()
+        if entries is not None:
+            return entries
+
+        generation = self._catalog.generation
+        async with self._get_connection() as conn:
+            result = await self.execute_query(
                 conn,
                 """
-                INSERT INTO dataset_metadata
-                (table_name, dataset_type, original_name, created_at, columns, row_count, data_source, file_size)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                SELECT
+                    table_name, dataset_type, original_name,
+                    created_at, columns, row_count, data_source, file_size,
+                    storage_path
+                FROM dataset_metadata
                 """,
-                [
-                    metadata.name,
-                    metadata.dataset_type.value,
-                    metadata.original_name,
-                    metadata.created_at,
-                    json.dumps(metadata.columns),
-                    metadata.row_count,
-                    metadata.data_source.value,
-                    metadata.file_size,
-                ],
+            )
+            rows = await asyncio.get_running_loop().run_in_executor(
+                None, result.fetchall
+            )
+            result = await self.execute_query(
+                conn, "SELECT dataset_name, dataset_type FROM stale_artifacts"
+            )
+            stale_rows = await asyncio.get_running_loop().run_in_executor(
+                None, result.fetchall
             )
 
+        entries = {
+            row[0]: DatasetMetadata(
+                name=row[0],
+                dataset_type=DatasetType(row[1]),
+                original_name=row[2],
+                created_at=row[3] or datetime.min,
+                columns=json.loads(row[4]),
+                row_count=row[5],
+                data_source=DataSourceType(row[6]),
+                file_size=row[7],
+                storage_path=row[8],
+            )
+            for row in rows
+        }
+        stale = {(name, DatasetType(dataset_type)) for name, dataset_type in stale_rows}
+        self._catalog.load(generation, dict(entries), stale)
+        return entries
+
     async def list_datasets(
         self,
         dataset_type: DatasetType | None = None,
@@ -330,145 +1290,58 @@ class DatasetHandler(BaseDuckDBHandler):
         Returns:
             List of DatasetMetadata for matching datasets
         """
-        async with self._get_connection() as conn:
-            query = """
-                SELECT
-                    table_name, dataset_type, original_name,
-                    created_at, columns, row_count, data_source, file_size
-                FROM dataset_metadata
-            """
-            params = []
-            where_clauses = []
-
-            if dataset_type:
-                where_clauses.append("dataset_type = ?")
-                params.append(dataset_type.value)
-
-            if data_source:
-                where_clauses.append("data_source = ?")
-                params.append(data_source.value)
-
-            if where_clauses:
-                query += " WHERE " + " AND ".join(where_clauses)
-
-            result = await self.execute_query(conn, query, params)
-            rows = await asyncio.get_running_loop().run_in_executor(
-                None, result.fetchall
-            )
-
-            return [
-                DatasetMetadata(
-                    name=row[0],
-                    dataset_type=DatasetType(row[1]),
-                    original_name=row[2],
-                    created_at=row[3],
-                    columns=json.loads(row[4]),
-                    row_count=row[5],
-                    data_source=DataSourceType(row[6]),
-                    file_size=row[7],
-                )
-                for row in rows
-            ]
+        return [
+            replace(metadata, columns=list(metadata.columns))
+            for metadata in (await self._catalog_entries()).values()
+            if (dataset_type is None or metadata.dataset_type == dataset_type)
+            and (data_source is None or metadata.data_source == data_source)
+        ]
 
     async def get_dataset_type(self, name: str) -> DatasetType:
         """Get the type of a dataset."""
-        async with self._get_connection() as conn:
-            result = await self.execute_query(
-                conn,
-                "SELECT dataset_type FROM dataset_metadata WHERE table_name = ?",
-                [name],
-            )
-            row = await asyncio.get_running_loop().run_in_executor(
-                None, result.fetchone
-            )
-            if not row:
-                raise ValueError(f"Dataset '{name}' not found")
-            return DatasetType(row[0])
+        metadata = (await self._catalog_entries()).get(name)
+        if not metadata:
+            raise ValueError(f"Dataset '{name}' not found")
+        return metadata.dataset_type
 
     async def table_exists(self, name: str) -> bool:
         """Check if a table exists in the database."""
-        async with self._get_connection() as conn:
-            result = await self.execute_query(
-                conn,
-                """
-                SELECT COUNT(*)
-                FROM dataset_metadata
-                WHERE table_name = ?
-                """,
-                [name],
-            )
-            row = await asyncio.get_running_loop().run_in_executor(
-                None, result.fetchone
-            )
-            return bool(row and row[0])
+        return name in await self._catalog_entries()
 
     async def get_related_datasets(self, name: str) -> dict[str, list[str]]:
         """
         Get all related datasets (cleansed versions and data dictionaries)
         for a given standard dataset.
         """
-        async with self._get_connection() as conn:
-            result = await self.execute_query(
-                conn,
-                """
-                SELECT table_name, dataset_type
-                FROM dataset_metadata
-                WHERE original_name = ?
-                """,
-                [name],
-            )
-            rows = await asyncio.get_running_loop().run_in_executor(
-                None, result.fetchall
-            )
-
-            related: dict[str, list[str]] = {"cleansed": [], "dictionary": []}
+        related: dict[str, list[str]] = {"cleansed": [], "dictionary": []}
 
-            for table_name, dtype in rows:
-                if dtype == DatasetType.CLEANSED.value:
-                    related["cleansed"].append(table_name)
-                elif dtype == DatasetType.DICTIONARY.value:
-                    related["dictionary"].append(table_name)
+        for metadata in (await self._catalog_entries()).values():
+            if metadata.original_name != name:
+                continue
+            if metadata.dataset_type == DatasetType.CLEANSED:
+                related["cleansed"].append(metadata.name)
+            elif metadata.dataset_type == DatasetType.DICTIONARY:
+                related["dictionary"].append(metadata.name)
 
-            return related
+        return related
 
     async def get_dataset_metadata(self, name: str) -> DatasetMetadata:
         """Get metadata for a dataset by name"""
         try:
-            if not await self.table_exists(name):
+            metadata = (await self._catalog_entries()).get(name)
+            if not metadata:
                 raise ValueError(f"Dataset '{name}' not found")
-
-            async with self._get_connection() as conn:
-                result = await self.execute_query(
-                    conn,
-                    """
-                    SELECT
-                        table_name, dataset_type, original_name,
-                        created_at, columns, row_count, data_source, file_size
-                    FROM dataset_metadata
-                    WHERE table_name = ?
-                    """,
-                    [name],
-                )
-                row = await asyncio.get_running_loop().run_in_executor(
-                    None, result.fetchone
-                )
-
-                if not row:
-                    raise ValueError(f"Metadata for dataset '{name}' not found")
-
-                # Format the metadata as a dictionary
-                metadata = DatasetMetadata(
-                    name=row[0],
-                    dataset_type=row[1],
-                    original_name=row[2],
-                    created_at=row[3].isoformat() if row[3] else datetime.min,
-                    columns=json.loads(row[4]),
-                    row_count=row[5],
-                    data_source=DataSourceType(row[6]),
-                    file_size=row[7],
-                )
-
-                return metadata
+            # callers get the dataset type and creation time as stored in
+            # DuckDB, a string and an ISO timestamp
+            created_at: Any = metadata.created_at
+            return replace(
+                metadata,
+                dataset_type=cast(DatasetType, metadata.dataset_type.value),
+                created_at=(
+                    created_at.isoformat() if created_at != datetime.min else created_at
+                ),
+                columns=list(metadata.columns),
+            )
 
         except Exception as e:
             # Catch all other exceptions and provide a clear error message
@@ -477,53 +1350,187 @@ class DatasetHandler(BaseDuckDBHandler):
                 f"Failed to retrieve metadata for dataset '{name}': {str(e)}"
             )
 
+    async def _dataset_metadata_of_type(
+        self, name: str, expected_type: DatasetType | None
+    ) -> DatasetMetadata:
+        metadata = (await self._catalog_entries()).get(name)
+        if not metadata:
+            raise ValueError(f"Dataset '{name}' not found")
+        if expected_type and metadata.dataset_type != expected_type:
+            raise ValueError(
+                f"Dataset '{name}' is of type {metadata.dataset_type.value}, "
+                f"expected {expected_type.value}"
+            )
+        await self._ensure_local_file(metadata)
+        return metadata
+
+    async def _fetch_dataframe(self, name: str, query: str) -> pl.DataFrame:
+        async with self._get_connection() as conn:
+            try:
+                result = await self.execute_query(conn, query)
+                arrow_table = await _run_interruptible(conn, result.arrow)
+                return cast(pl.DataFrame, pl.from_arrow(arrow_table))
+            except duckdb.CatalogException as e:
+                raise ValueError(f"Error retrieving dataset '{name}': {str(e)}") from e
+
     async def get_dataframe(
         self,
         name: str,
         expected_type: DatasetType | None = None,
         max_rows: int | None = None,
+        columns: list[str] | None = None,
+        filter: str | None = None,
+        sample: SampleSpec | None = None,
     ) -> pl.DataFrame:
         """
         Retrieve a registered table as a Polars DataFrame.
 
+        Column selection, filtering and sampling run in DuckDB, so only the
+        requested cells are materialized.
+
         Args:
             name: Name of the dataset to retrieve
             expected_type: Optional type validation - will raise error if dataset is not of expected type
+            max_rows: Maximum number of rows to return
+            columns: Columns to return, all columns if None
+            filter: SQL boolean expression rows must satisfy, e.g. `"price" > 10`.
+                It is inserted verbatim, never pass user input.
+            sample: Random sample of the (filtered) rows to return
 
         Returns:
             Polars DataFrame containing the dataset
 
         Raises:
-            ValueError: If dataset doesn't exist or is of wrong type
+            ValueError: If dataset doesn't exist, is of wrong type or a column is unknown
         """
         logger.info(f"Retrieving dataframe {name}")
 
-        # First verify the dataset exists and check its type
-        if not await self.table_exists(name):
-            raise ValueError(f"Dataset '{name}' not found")
+        metadata = await self._dataset_metadata_of_type(name, expected_type)
+        query = _select_query(metadata, columns=columns, filter=filter)
+        if sample:
+            query = f"SELECT * FROM ({query}) {sample.to_sql()}"
+        if max_rows is not None:
+            query += f" LIMIT {max(int(max_rows), 0)}"
+        return await self._fetch_dataframe(name, query)
 
-        if expected_type:
-            actual_type = await self.get_dataset_type(name)
-            if actual_type != expected_type:
-                raise ValueError(
-                    f"Dataset '{name}' is of type {actual_type.value}, "
-                    f"expected {expected_type.value}"
-                )
+    async def count_rows(
+        self,
+        name: str,
+        expected_type: DatasetType | None = None,
+        filter: str | None = None,
+    ) -> int:
+        """
+        Count the rows of a dataset, optionally only those matching `filter`.
 
-        # Retrieve the data
+        Without a filter the count comes from the catalog and DuckDB is not queried.
+        """
+        metadata = await self._dataset_metadata_of_type(name, expected_type)
+        if not filter:
+            return metadata.row_count
         async with self._get_connection() as conn:
-            try:
-                result = await self.execute_query(
-                    conn,
-                    f'SELECT * FROM "{name}"'
-                    + (f" LIMIT {max_rows}" if max_rows is not None else ""),
-                )
-                arrow_table = await asyncio.get_running_loop().run_in_executor(
-                    None, result.arrow
-                )
-                return cast(pl.DataFrame, pl.from_arrow(arrow_table))
-            except duckdb.CatalogException as e:
-                raise ValueError(f"Error retrieving dataset '{name}': {str(e)}") from e
+            result = await self.execute_query(
+                conn,
+                f"SELECT COUNT(*) FROM {_quote_identifier(name)} WHERE ({filter})",
+            )
+            row = await asyncio.get_running_loop().run_in_executor(
+                None, result.fetchone
+            )
+            return int(row[0]) if row else 0
+
+    async def query_dataframe(
+        self,
+        name: str,
+        expected_type: DatasetType | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+        columns: list[str] | None = None,
+        order_by: str | None = None,
+        descending: bool = False,
+    ) -> pl.DataFrame:
+        """
+        Retrieve one page of a registered table, letting DuckDB do the slicing.
+
+        Args:
+            name: Name of the dataset to retrieve
+            expected_type: Optional type validation - will raise error if dataset is not of expected type
+            offset: Number of rows to skip
+            limit: Maximum number of rows to return, all remaining rows if None
+            columns: Columns to return, all columns if None
+            order_by: Optional column to sort by before paging
+            descending: Sort in descending order
+
+        Returns:
+            Polars DataFrame containing the requested rows and columns
+
+        Raises:
+            ValueError: If dataset doesn't exist, is of wrong type or a column is unknown
+        """
+        query = await self._page_query(
+            name, expected_type, offset, limit, columns, order_by, descending
+        )
+        return await self._fetch_dataframe(name, query)
+
+    async def query_record_batches(
+        self,
+        name: str,
+        expected_type: DatasetType | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+        columns: list[str] | None = None,
+        order_by: str | None = None,
+        descending: bool = False,
+        *,
+        batch_rows: int,
+    ) -> AbstractAsyncContextManager[pa.RecordBatchReader]:
+        """
+        Select the same page as `query_dataframe`, read as it is sent.
+
+        The dataset and columns are validated right away, raising ValueError
+        like `query_dataframe`. The returned context manager runs the query and
+        holds a cursor while its reader yields Arrow record batches of at most
+        `batch_rows` rows straight from DuckDB, so the page is never
+        materialized in Python. Reading a batch blocks, run it in an executor.
+        """
+        query = await self._page_query(
+            name, expected_type, offset, limit, columns, order_by, descending
+        )
+
+        @asynccontextmanager
+        async def reader() -> AsyncGenerator[pa.RecordBatchReader, None]:
+            async with self._get_connection() as conn:
+                try:
+                    result = await self.execute_query(conn, query)
+                except duckdb.CatalogException as e:
+                    raise ValueError(
+                        f"Error retrieving dataset '{name}': {str(e)}"
+                    ) from e
+                yield result.fetch_record_batch(batch_rows)
+
+        return reader()
+
+    async def _page_query(
+        self,
+        name: str,
+        expected_type: DatasetType | None,
+        offset: int,
+        limit: int | None,
+        columns: list[str] | None,
+        order_by: str | None,
+        descending: bool,
+    ) -> str:
+        metadata = await self._dataset_metadata_of_type(name, expected_type)
+        query = _select_query(metadata, columns=columns)
+        if order_by:
+            _check_columns(metadata, [order_by])
+            query += (
+                f" ORDER BY {_quote_identifier(order_by)}"
+                f" {'DESC' if descending else 'ASC'}"
+            )
+        if limit is not None:
+            query += f" LIMIT {max(int(limit), 0)}"
+        if offset:
+            query += f" OFFSET {max(int(offset), 0)}"
+        return query
 
     async def store_cleansing_report(
         self, dataset_name: str, reports: list[CleansedColumnReport]
@@ -558,6 +1565,43 @@ class DatasetHandler(BaseDuckDBHandler):
                 return [CleansedColumnReport(**report) for report in reports_data]
             return []
 
+    async def get_column_profiles(
+        self, name: str, expected_type: DatasetType | None = None
+    ) -> list[ColumnProfile]:
+        """
+        Return the column profiles of a dataset.
+
+        Datasets registered before profiles were stored are profiled on first
+        access, in DuckDB.
+        """
+        metadata = (
+            await self._dataset_metadata_of_type(name, expected_type)
+            if expected_type
+            else await self.get_dataset_metadata(name)
+        )
+        async with self._get_connection() as conn:
+            result = await self.execute_query(
+                conn,
+                "SELECT profile FROM column_profiles WHERE table_name = ? ORDER BY position",
+                [name],
+            )
+            rows = await asyncio.get_running_loop().run_in_executor(
+                None, result.fetchall
+            )
+        if rows:
+            return [ColumnProfile.model_validate_json(row[0]) for row in rows]
+
+        async with self._get_connection() as conn:
+
+            def profile() -> list[ColumnProfile]:
+                profiles = profile_relation(conn, _quote_identifier(metadata.name))
+                _store_column_profiles(conn, name, profiles)
+                return profiles
+
+            profiles = await asyncio.get_running_loop().run_in_executor(None, profile)
+        self._mark_dirty()
+        return profiles
+
     async def delete_dataset(self, name: str) -> None:
         """
         Delete a specific dataset and its metadata.
@@ -569,35 +1613,123 @@ class DatasetHandler(BaseDuckDBHandler):
         Raises:
             ValueError: If dataset doesn't exist
         """
-        if not await self.table_exists(name):
+        if name not in await self._catalog_entries():
             raise ValueError(f"Dataset '{name}' not found")
+        await self._delete_datasets_where("table_name = ?", [name])
+        logger.info(f"Deleted dataset {name}")
 
-        async with self._get_connection() as conn:
-            # Delete the actual table
-            await self.execute_query(conn, f'DROP TABLE IF EXISTS "{name}"')
+    async def delete_datasets(self, names: list[str]) -> list[str]:
+        """
+        Delete several datasets and their metadata in one transaction.
 
-            # Delete metadata
-            await self.execute_query(
-                conn, "DELETE FROM dataset_metadata WHERE table_name = ?", [name]
-            )
+        Names that are not registered are ignored.
 
-            # Delete any cleansing reports
-            await self.execute_query(
-                conn, "DELETE FROM cleansing_reports WHERE dataset_name = ?", [name]
+        Returns:
+            The names of the deleted datasets
+        """
+        return await self._delete_datasets_where(
+            "table_name IN (SELECT unnest(?::VARCHAR[]))", [names]
+        )
+
+    async def _delete_datasets_where(
+        self, condition: str, params: list[Any]
+    ) -> list[str]:
+        """
+        Delete every dataset whose dataset_metadata row matches `condition`.
+
+        The targets are resolved by the DELETE ... RETURNING on the catalog, and
+        their tables, reports, profiles and stale markers are dropped in the
+        same transaction. Only deletes freeing at least `DELETE_CHECKPOINT_ROWS`
+        rows checkpoint right away to return the blocks, smaller ones are left
+        to DuckDB's automatic checkpoints.
+        """
+
+        def delete(
+            conn: duckdb.DuckDBPyConnection,
+        ) -> list[tuple[str, str, str, str | None, int]]:
+            rows = conn.execute(
+                f"""
+                DELETE FROM dataset_metadata WHERE {condition}
+                RETURNING table_name, dataset_type, original_name, storage_path,
+                    row_count
+                """,
+                params,
+            ).fetchall()
+            if not rows:
+                return []
+            names = [row[0] for row in rows]
+            for name, _, _, storage_path, _ in rows:
+                kind = "VIEW" if storage_path else "TABLE"
+                conn.execute(f"DROP {kind} IF EXISTS {_quote_identifier(name)}")
+            conn.execute(
+                "DELETE FROM cleansing_reports WHERE dataset_name IN (SELECT unnest(?::VARCHAR[]))",
+                [names],
+            )
+            conn.execute(
+                "DELETE FROM column_profiles WHERE table_name IN (SELECT unnest(?::VARCHAR[]))",
+                [names],
+            )
+            # A deleted derived dataset no longer needs rebuilding
+            conn.execute(
+                """
+                DELETE FROM stale_artifacts USING (
+                    SELECT unnest($1::VARCHAR[]) AS original_name,
+                           unnest($2::VARCHAR[]) AS dataset_type
+                ) AS deleted
+                WHERE stale_artifacts.dataset_name = deleted.original_name
+                AND (
+                    stale_artifacts.dataset_type = deleted.dataset_type
+                    OR deleted.dataset_type = $3
+                )
+                """,
+                [
+                    [row[2] for row in rows],
+                    [row[1] for row in rows],
+                    DatasetType.STANDARD.value,
+                ],
             )
+            return rows
 
-        logger.info(f"Deleted dataset {name}")
+        rows = await self.run_transaction(delete)
+        if not rows:
+            return []
+
+        freed_rows = sum(
+            row_count or 0
+            for _, _, _, storage_path, row_count in rows
+            if not storage_path
+        )
+        for name, dataset_type, original_name, storage_path, _ in rows:
+            if storage_path:
+                (self.parquet_dir / storage_path).unlink(missing_ok=True)
+                with self._flush_lock:
+                    self._pending_uploads.discard(storage_path)
+                    self._pending_deletes.add(storage_path)
+            self._catalog.remove(name)
+            self._catalog.discard_stale(original_name, DatasetType(dataset_type))
+        if freed_rows >= DELETE_CHECKPOINT_ROWS:
+            await asyncio.get_running_loop().run_in_executor(None, self._checkpoint)
+        return [row[0] for row in rows]
+
+    def _checkpoint(self) -> None:
+        conn = self._acquire()
+        try:
+            conn.execute("CHECKPOINT")
+        except duckdb.Error as e:
+            # other open transactions only delay the space reclamation
+            logger.debug(f"Skipped checkpoint of {self.db_path.name}: {e}")
+        finally:
+            self._connections.release(self.db_path, conn)
 
     async def delete_related_datasets(self, name: str) -> None:
         """
         Delete all related datasets (cleansed and dictionary) for a given standard dataset.
         Does not delete the original dataset itself.
         """
-        related = await self.get_related_datasets(name)
-
-        for dataset_list in related.values():
-            for dataset_name in dataset_list:
-                await self.delete_dataset(dataset_name)
+        await self._delete_datasets_where(
+            "original_name = ? AND dataset_type IN (?, ?)",
+            [name, DatasetType.CLEANSED.value, DatasetType.DICTIONARY.value],
+        )
 
         logger.info(f"Deleted all related datasets for {name}")
 
@@ -605,10 +1737,12 @@ class DatasetHandler(BaseDuckDBHandler):
         """
         Delete a dataset and all its related datasets (cleansed and dictionary versions).
         """
-        # Delete related datasets first
-        await self.delete_related_datasets(name)
-        # Then delete the main dataset
-        await self.delete_dataset(name)
+        if name not in await self._catalog_entries():
+            raise ValueError(f"Dataset '{name}' not found")
+        await self._delete_datasets_where(
+            "table_name = ? OR (original_name = ? AND dataset_type IN (?, ?))",
+            [name, name, DatasetType.CLEANSED.value, DatasetType.DICTIONARY.value],
+        )
 
     async def delete_all_datasets(
         self, dataset_type: DatasetType | None = None
@@ -616,10 +1750,10 @@ class DatasetHandler(BaseDuckDBHandler):
         """
         Delete all datasets of a specific type, or all datasets if type is None.
         """
-        datasets = await self.list_datasets(dataset_type)
-
-        for dataset in datasets:
-            await self.delete_dataset(dataset.name)
+        if dataset_type:
+            await self._delete_datasets_where("dataset_type = ?", [dataset_type.value])
+        else:
+            await self._delete_datasets_where("TRUE", [])
 
         type_str = f" of type {dataset_type.value}" if dataset_type else ""
         logger.info(f"Deleted all datasets{type_str}")
@@ -628,18 +1762,69 @@ class DatasetHandler(BaseDuckDBHandler):
         """
         Delete all datasets that have 0 rows.
         """
-        datasets = await self.list_datasets()
-
-        for dataset in datasets:
-            if dataset.row_count == 0:
-                await self.delete_dataset(dataset.name)
+        await self._delete_datasets_where("row_count = 0", [])
 
         logger.info("Deleted all empty datasets")
 
 
+_CHAT_MESSAGE_COMPONENTS_TABLE = """
+CREATE TABLE IF NOT EXISTS chat_message_components (
+    message_id VARCHAR NOT NULL,
+    chat_id VARCHAR NOT NULL,
+    position INTEGER NOT NULL,
+    component_type VARCHAR NOT NULL,
+    size BIGINT NOT NULL,
+    payload JSON NOT NULL,
+    PRIMARY KEY (message_id, position)
+)
+"""
+
+
+def _split_chat_message_components(conn: duckdb.DuckDBPyConnection) -> None:
+    """Move the components kept in the message JSON into their own table."""
+    conn.execute(_CHAT_MESSAGE_COMPONENTS_TABLE)
+    if not _table_exists(conn, "chat_messages"):
+        return
+    rows = conn.execute(
+        """
+        SELECT id, message, chat_id FROM chat_messages
+        WHERE json_array_length(message, '$.components') > 0
+        AND id NOT IN (SELECT message_id FROM chat_message_components)
+        """
+    ).fetchall()
+    messages = _build_chat_messages(rows, [], include_payloads=True)
+    if not messages:
+        return
+    _insert_component_rows(conn, _chat_component_rows(conn, messages))
+    headers = pa.table(
+        {
+            "id": [message.id for message in messages],
+            "message": [_message_header_json(message) for message in messages],
+        }
+    )
+    conn.register("migrated_chat_messages", headers)
+    try:
+        conn.execute(
+            """
+            UPDATE chat_messages SET message = migrated_chat_messages.message
+            FROM migrated_chat_messages
+            WHERE chat_messages.id = migrated_chat_messages.id
+            """
+        )
+    finally:
+        conn.unregister("migrated_chat_messages")
+
+
 class ChatHandler(BaseDuckDBHandler):
     """Async handler for chat-related operations."""
 
+    migrations = {
+        5: Migration(
+            "store message components separately",
+            _split_chat_message_components,
+        ),
+    }
+
     async def _initialize_database(self) -> None:
         """Initialize chat-related tables."""
         await super()._initialize_database()
@@ -656,6 +1841,7 @@ class ChatHandler(BaseDuckDBHandler):
                     updated_at TIMESTAMP
                 )
                 """,
+                track_writes=False,
             )
 
             await self.execute_query(
@@ -668,6 +1854,13 @@ class ChatHandler(BaseDuckDBHandler):
                     created_at TIMESTAMP,
                 )
                 """,
+                track_writes=False,
+            )
+
+            # Components are stored apart from the message header so that
+            # listing a chat does not have to parse every dataset and figure
+            await self.execute_query(
+                conn, _CHAT_MESSAGE_COMPONENTS_TABLE, track_writes=False
             )
 
     async def create_chat(
@@ -712,7 +1905,10 @@ class ChatHandler(BaseDuckDBHandler):
         return chat_id
 
     async def get_chat_messages(
-        self, chat_name: str | None = None, chat_id: str | None = None
+        self,
+        chat_name: str | None = None,
+        chat_id: str | None = None,
+        include_payloads: bool = True,
     ) -> list[AnalystChatMessage]:
         """
         Retrieve a specific chat conversation by name or ID.
@@ -720,6 +1916,9 @@ class ChatHandler(BaseDuckDBHandler):
         Args:
             chat_name: The name of the chat to retrieve (used if chat_id is not provided)
             chat_id: The ID of the chat to retrieve (takes precedence over chat_name)
+            include_payloads: Load the message components, otherwise each component
+                is returned as a `ComponentStub` that can be fetched with
+                `get_chat_message_component`
 
         Returns:
             List of chat messages or empty list if not found
@@ -770,17 +1969,25 @@ class ChatHandler(BaseDuckDBHandler):
             rows = await asyncio.get_running_loop().run_in_executor(
                 None, lambda: result.fetchall()
             )
+            if not rows:
+                return []
 
-            if rows:
-                messages = []
-                for row in rows:
-                    message = AnalystChatMessage.model_validate(json.loads(row[1]))
-                    # Ensure the message has the correct id and chat_id
-                    message.id = row[0]
-                    message.chat_id = row[2]
-                    messages.append(message)
-                return messages
-            return []
+            components_result = await self.execute_query(
+                conn,
+                f"""
+                SELECT message_id, position, component_type, size,
+                    {"payload" if include_payloads else "NULL"}
+                FROM chat_message_components
+                WHERE chat_id = ?
+                ORDER BY message_id, position
+                """,
+                [chat_id],
+            )
+            component_rows = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: components_result.fetchall()
+            )
+
+            return _build_chat_messages(rows, component_rows, include_payloads)
 
     async def get_chat_names(self) -> list[str]:
         """Get all chat names for the user."""
@@ -837,6 +2044,24 @@ class ChatHandler(BaseDuckDBHandler):
                 for row in rows
             ]
 
+    async def get_chat_updated_at(self, chat_id: str) -> datetime | None:
+        """
+        Return when a chat or any of its messages was last changed.
+
+        Every write to a chat or its messages updates this timestamp, so it
+        versions the whole chat without loading the messages.
+        """
+        async with self._get_connection() as conn:
+            result = await self.execute_query(
+                conn,
+                "SELECT updated_at FROM chat_history WHERE id = ?",
+                [chat_id],
+            )
+            row = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: result.fetchone()
+            )
+        return row[0] if row else None
+
     async def rename_chat(self, chat_id: str, new_name: str) -> None:
         """
         Rename a chat history entry by its ID.
@@ -933,23 +2158,17 @@ class ChatHandler(BaseDuckDBHandler):
             message.id = str(uuid.uuid4())
         message.chat_id = chat_id
 
-        # Check if this chat exists
-        async with self._get_connection() as conn:
-            result = await self.execute_query(
-                conn, "SELECT 1 FROM chat_history WHERE id = ?", [chat_id]
-            )
-            exists = await asyncio.get_running_loop().run_in_executor(
-                None, lambda: result.fetchone() is not None
-            )
-
-            if not exists:
-                logger.error(f"Chat with ID {chat_id} does not exist")
-                return ""
+        def add_message(conn: duckdb.DuckDBPyConnection) -> bool:
+            # Update the chat's updated_at timestamp, which also checks it exists
+            chat = conn.execute(
+                "UPDATE chat_history SET updated_at = ? WHERE id = ? RETURNING id",
+                [datetime.now(timezone.utc), chat_id],
+            ).fetchone()
+            if not chat:
+                return False
 
-            # Insert the new message
-            message_json = json.dumps(message.model_dump(), cls=ChatJSONEncoder)
-            await self.execute_query(
-                conn,
+            # Insert the new message and its components
+            conn.execute(
                 """
                 INSERT INTO chat_messages
                     (id, chat_id, message, created_at)
@@ -959,23 +2178,18 @@ class ChatHandler(BaseDuckDBHandler):
                 [
                     message.id,
                     chat_id,
-                    message_json,
+                    _message_header_json(message),
                     message.created_at,
                 ],
             )
+            _replace_message_components(conn, [message])
+            return True
 
-            # Update the chat's updated_at timestamp
-            await self.execute_query(
-                conn,
-                """
-                UPDATE chat_history SET
-                    updated_at = ?
-                WHERE id = ?
-                """,
-                [datetime.now(timezone.utc), chat_id],
-            )
+        if not await self.run_transaction(add_message):
+            logger.error(f"Chat with ID {chat_id} does not exist")
+            return ""
 
-            return message.id
+        return message.id
 
     async def delete_chat_message(
         self,
@@ -996,50 +2210,43 @@ class ChatHandler(BaseDuckDBHandler):
 
         logger.info(f"Deleting chat message with ID {message_id}")
 
-        async with self._get_connection() as conn:
-            # Check if the message exists
-            result = await self.execute_query(
-                conn, "SELECT chat_id FROM chat_messages WHERE id = ?", [message_id]
-            )
-            row = await asyncio.get_running_loop().run_in_executor(
-                None, lambda: result.fetchone()
-            )
-
+        def delete_message(conn: duckdb.DuckDBPyConnection) -> bool:
+            # Delete the message and its components
+            row = conn.execute(
+                "DELETE FROM chat_messages WHERE id = ? RETURNING chat_id",
+                [message_id],
+            ).fetchone()
             if not row:
-                logger.warning(f"Chat message with ID {message_id} not found")
                 return False
-
-            chat_id = row[0]
-
-            # Delete the message
-            await self.execute_query(
-                conn,
-                "DELETE FROM chat_messages WHERE id = ?",
+            conn.execute(
+                "DELETE FROM chat_message_components WHERE message_id = ?",
                 [message_id],
             )
 
             # Update the chat's updated_at timestamp
-            await self.execute_query(
-                conn,
-                """
-                UPDATE chat_history SET
-                    updated_at = ?
-                WHERE id = ?
-                """,
-                [datetime.now(timezone.utc), chat_id],
+            conn.execute(
+                "UPDATE chat_history SET updated_at = ? WHERE id = ?",
+                [datetime.now(timezone.utc), row[0]],
             )
-
             return True
 
+        if not await self.run_transaction(delete_message):
+            logger.warning(f"Chat message with ID {message_id} not found")
+            return False
+
+        return True
+
     async def get_chat_message(
         self,
         message_id: str,
+        include_payloads: bool = True,
     ) -> AnalystChatMessage | None:
         """
         Get a specific chat message by its ID.
 
         Args:
             message_id: ID of the message to retrieve
+            include_payloads: Load the message components instead of stubs
 
         Returns:
             The message if found, None otherwise
@@ -1070,11 +2277,60 @@ class ChatHandler(BaseDuckDBHandler):
                 logger.warning(f"Chat message with ID {message_id} not found")
                 return None
 
-            message = AnalystChatMessage.model_validate(json.loads(row[1]))
-            # Ensure the message has the correct id and chat_id
-            message.id = row[0]
-            message.chat_id = row[2]
-            return message
+            components_result = await self.execute_query(
+                conn,
+                f"""
+                SELECT message_id, position, component_type, size,
+                    {"payload" if include_payloads else "NULL"}
+                FROM chat_message_components
+                WHERE message_id = ?
+                ORDER BY position
+                """,
+                [message_id],
+            )
+            component_rows = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: components_result.fetchall()
+            )
+
+            return _build_chat_messages([row], component_rows, include_payloads)[0]
+
+    async def get_chat_message_component(
+        self, chat_id: str, message_id: str, position: int
+    ) -> Component | None:
+        """
+        Load the payload of one component of a chat message.
+
+        Args:
+            chat_id: The ID of the chat the message belongs to
+            message_id: The ID of the message
+            position: Index of the component in the message's components
+
+        Returns:
+            The component, or None if it does not exist
+        """
+        async with self._get_connection() as conn:
+            result = await self.execute_query(
+                conn,
+                """
+                SELECT component_type, payload
+                FROM chat_message_components
+                WHERE chat_id = ? AND message_id = ? AND position = ?
+                """,
+                [chat_id, message_id, position],
+            )
+            row = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: result.fetchone()
+            )
+            if row:
+                return _load_component(row[0], row[1])
+
+        # messages stored before components had their own table
+        message = await self.get_chat_message(message_id)
+        if not message or message.chat_id != chat_id:
+            return None
+        if 0 <= position < len(message.components):
+            return message.components[position]
+        return None
 
     async def update_chat_message(
         self,
@@ -1100,53 +2356,40 @@ class ChatHandler(BaseDuckDBHandler):
         # Preserve the message ID in the updated message
         message.id = message_id
 
-        async with self._get_connection() as conn:
-            # Check if the message exists
-            result = await self.execute_query(
-                conn, "SELECT chat_id FROM chat_messages WHERE id = ?", [message_id]
-            )
-            row = await asyncio.get_running_loop().run_in_executor(
-                None, lambda: result.fetchone()
-            )
-
-            if not row:
-                logger.warning(f"Chat message with ID {message_id} does not exist")
-                return False
-
-            chat_id = row[0]
-            # Ensure chat_id is preserved
-            message.chat_id = chat_id
-
-            # Update the message
-            message_json = json.dumps(message.model_dump(), cls=ChatJSONEncoder)
-            await self.execute_query(
-                conn,
+        def update_message(conn: duckdb.DuckDBPyConnection) -> bool:
+            # Update the message, keeping the chat_id it is stored with
+            row = conn.execute(
                 """
                 UPDATE chat_messages
-                SET message = ?,
+                SET message = json_merge_patch(
+                        ?::JSON, json_object('chat_id', chat_messages.chat_id)
+                    ),
                     created_at = ?
                 WHERE id = ?
+                RETURNING chat_id
                 """,
-                [
-                    message_json,
-                    message.created_at,
-                    message_id,
-                ],
-            )
+                [_message_header_json(message), message.created_at, message_id],
+            ).fetchone()
+            if not row:
+                return False
+            message.chat_id = row[0]
+
+            # Replace its components
+            _replace_message_components(conn, [message])
 
             # Update the chat's updated_at timestamp
-            await self.execute_query(
-                conn,
-                """
-                UPDATE chat_history SET
-                    updated_at = ?
-                WHERE id = ?
-                """,
-                [datetime.now(timezone.utc), chat_id],
+            conn.execute(
+                "UPDATE chat_history SET updated_at = ? WHERE id = ?",
+                [datetime.now(timezone.utc), message.chat_id],
             )
-
             return True
 
+        if not await self.run_transaction(update_message):
+            logger.warning(f"Chat message with ID {message_id} does not exist")
+            return False
+
+        return True
+
     async def update_chat(
         self,
         chat_id: str,
@@ -1176,75 +2419,69 @@ class ChatHandler(BaseDuckDBHandler):
 
         logger.info(f"Updating chat with ID {chat_id}")
 
-        # Check if this chat exists
-        async with self._get_connection() as conn:
-            result = await self.execute_query(
-                conn, "SELECT 1 FROM chat_history WHERE id = ?", [chat_id]
-            )
-            exists = await asyncio.get_running_loop().run_in_executor(
-                None, lambda: result.fetchone() is not None
-            )
-
-            if not exists:
-                logger.warning(f"Chat with ID {chat_id} does not exist")
-                return
-
-            # Build the update query for chat_history
-            current_time = datetime.now(timezone.utc)
-            update_parts = ["updated_at = ?"]
-            params: List[Any] = [current_time]
-
-            if chat_name:
-                update_parts.append("chat_name = ?")
-                params.append(chat_name)
-
-            if data_source is not None:
-                update_parts.append("data_source = ?")
-                params.append(data_source)
+        # Build the update query for chat_history
+        current_time = datetime.now(timezone.utc)
+        update_parts = ["updated_at = ?"]
+        params: List[Any] = [current_time]
 
-            # Add chat_id to params
-            params.append(chat_id)
+        if chat_name:
+            update_parts.append("chat_name = ?")
+            params.append(chat_name)
 
-            # Execute the update for chat_history
-            query = f"""
-                UPDATE chat_history SET
-                    {", ".join(update_parts)}
-                WHERE id = ?
-            """
-            await self.execute_query(conn, query, params)
+        if data_source is not None:
+            update_parts.append("data_source = ?")
+            params.append(data_source)
 
-            # If messages are provided, replace all existing messages
-            if messages is not None:
-                # First, delete all existing messages
-                await self.execute_query(
-                    conn,
-                    "DELETE FROM chat_messages WHERE chat_id = ?",
-                    [chat_id],
-                )
+        # Add chat_id to params
+        params.append(chat_id)
 
-                # Then insert new messages
-                for message in messages:
-                    # Ensure message has the chat_id and a unique ID if not already set
-                    if not message.id:
-                        message.id = str(uuid.uuid4())
-                    message.chat_id = chat_id
+        query = f"""
+            UPDATE chat_history SET
+                {", ".join(update_parts)}
+            WHERE id = ?
+            RETURNING id
+        """
 
-                    message_json = json.dumps(message.model_dump(), cls=ChatJSONEncoder)
-                    await self.execute_query(
-                        conn,
+        # If messages are provided, replace all existing messages in the same
+        # transaction, appending the new rows as a single Arrow table
+        if messages is not None:
+            for message in messages:
+                # Ensure message has the chat_id and a unique ID if not already set
+                if not message.id:
+                    message.id = str(uuid.uuid4())
+                message.chat_id = chat_id
+            message_rows = _chat_message_rows(messages)
+
+        def update(conn: duckdb.DuckDBPyConnection) -> bool:
+            # Execute the update for chat_history, which also checks it exists
+            if not conn.execute(query, params).fetchone():
+                return False
+            if messages is None:
+                return True
+
+            component_rows = _chat_component_rows(conn, messages)
+            conn.execute("DELETE FROM chat_messages WHERE chat_id = ?", [chat_id])
+            conn.execute(
+                "DELETE FROM chat_message_components WHERE chat_id = ?", [chat_id]
+            )
+            _insert_component_rows(conn, component_rows)
+            if message_rows.num_rows:
+                conn.register("new_chat_messages", message_rows)
+                try:
+                    conn.execute(
                         """
                         INSERT INTO chat_messages
                             (id, chat_id, message, created_at)
-                        VALUES
-                            (?, ?, ?, ?)
-                        """,
-                        [
-                            message.id,
-                            chat_id,
-                            message_json,
-                            message.created_at,
-                        ],
+                        SELECT id, chat_id, message, created_at
+                        FROM new_chat_messages
+                        """
                     )
+                finally:
+                    conn.unregister("new_chat_messages")
+            return True
+
+        if not await self.run_transaction(update):
+            logger.warning(f"Chat with ID {chat_id} does not exist")
 
     async def delete_chat(
         self, chat_name: str | None = None, chat_id: str | None = None
@@ -1258,81 +2495,277 @@ class ChatHandler(BaseDuckDBHandler):
         """
         if chat_id:
             logger.info(f"Deleting chat with ID {chat_id}")
-
-            async with self._get_connection() as conn:
-                # First delete all associated messages
-                await self.execute_query(
-                    conn, "DELETE FROM chat_messages WHERE chat_id = ?", [chat_id]
-                )
-
-                # Then delete the chat history record
-                await self.execute_query(
-                    conn, "DELETE FROM chat_history WHERE id = ?", [chat_id]
-                )
+            query = "DELETE FROM chat_history WHERE id = ? RETURNING id"
+            params: list[Any] = [chat_id]
         elif chat_name:
             logger.info(f"Deleting chat {chat_name} for user {self.user_id}")
-
-            async with self._get_connection() as conn:
-                # First, get the chat ID
-                result = await self.execute_query(
-                    conn,
-                    """
-                    SELECT id
-                    FROM chat_history
-                    WHERE user_id = ? AND chat_name = ?
-                    """,
-                    [self.user_id, chat_name],
-                )
-                row = await asyncio.get_running_loop().run_in_executor(
-                    None, lambda: result.fetchone()
-                )
-
-                if row:
-                    chat_id = row[0]
-                    # Delete all associated messages
-                    await self.execute_query(
-                        conn, "DELETE FROM chat_messages WHERE chat_id = ?", [chat_id]
-                    )
-
-                    # Then delete the chat history record
-                    await self.execute_query(
-                        conn, "DELETE FROM chat_history WHERE id = ?", [chat_id]
-                    )
+            query = """
+                DELETE FROM chat_history
+                WHERE user_id = ? AND chat_name = ?
+                RETURNING id
+            """
+            params = [self.user_id, chat_name]
         else:
             logger.warning(
                 "Neither chat_name nor chat_id provided for delete operation"
             )
+            return
+
+        def delete_chat(conn: duckdb.DuckDBPyConnection) -> None:
+            # Delete the chat history record, then all associated messages
+            chat_ids = [row[0] for row in conn.execute(query, params).fetchall()]
+            if not chat_ids:
+                return
+            conn.execute(
+                "DELETE FROM chat_messages WHERE chat_id IN (SELECT unnest(?))",
+                [chat_ids],
+            )
+            conn.execute(
+                "DELETE FROM chat_message_components "
+                "WHERE chat_id IN (SELECT unnest(?))",
+                [chat_ids],
+            )
+
+        await self.run_transaction(delete_chat)
 
     async def delete_all_chats(self) -> None:
         """Delete all chats for the user."""
         logger.info(f"Deleting all chats for user {self.user_id}")
 
-        async with self._get_connection() as conn:
-            # Get all chat IDs for this user
-            result = await self.execute_query(
-                conn, "SELECT id FROM chat_history WHERE user_id = ?", [self.user_id]
-            )
-            await asyncio.get_running_loop().run_in_executor(
-                None, lambda: result.fetchall()
-            )
-
+        def delete_chats(conn: duckdb.DuckDBPyConnection) -> None:
             # First delete all chat messages for this user's chats
-            chat_ids_result = await self.execute_query(
-                conn, "SELECT id FROM chat_history WHERE user_id = ?", [self.user_id]
+            conn.execute(
+                """
+                DELETE FROM chat_messages
+                WHERE chat_id IN (
+                    SELECT id FROM chat_history WHERE user_id = ?
+                )
+                """,
+                [self.user_id],
             )
-            chat_ids = await asyncio.get_running_loop().run_in_executor(
-                None, lambda: chat_ids_result.fetchall()
+            conn.execute(
+                """
+                DELETE FROM chat_message_components
+                WHERE chat_id IN (
+                    SELECT id FROM chat_history WHERE user_id = ?
+                )
+                """,
+                [self.user_id],
             )
+            # Then delete the chat history records
+            conn.execute("DELETE FROM chat_history WHERE user_id = ?", [self.user_id])
+
+        await self.run_transaction(delete_chats)
+
+
+def _chat_message_rows(messages: list[AnalystChatMessage]) -> pa.Table:
+    """Build the chat_messages rows for `messages` as one Arrow table."""
+    return pl.DataFrame(
+        {
+            "id": [message.id for message in messages],
+            "chat_id": [message.chat_id for message in messages],
+            "message": [_message_header_json(message) for message in messages],
+            # DuckDB stores aware datetimes in the TIMESTAMP column as local time
+            "created_at": [
+                message.created_at.astimezone().replace(tzinfo=None)
+                if message.created_at.tzinfo
+                else message.created_at
+                for message in messages
+            ],
+        },
+        schema={
+            "id": pl.String,
+            "chat_id": pl.String,
+            "message": pl.String,
+            "created_at": pl.Datetime("us"),
+        },
+    ).to_arrow()
+
+
+_COMPONENT_TYPES: dict[str, type[BaseModel]] = {
+    "analysis": RunAnalysisResult,
+    "charts": RunChartsResult,
+    "business": GetBusinessAnalysisResult,
+    "enhanced_question": EnhancedQuestionGeneration,
+    "database_analysis": RunDatabaseAnalysisResult,
+}
+
+
+def get_component_type(component: Component) -> str:
+    """Name under which a chat message component is stored, e.g. `charts`."""
+    if isinstance(component, str):
+        return "text"
+    for name, model in _COMPONENT_TYPES.items():
+        if isinstance(component, model):
+            return name
+    raise ValueError(f"Unsupported chat message component {type(component)}")
+
+
+def _load_component(component_type: str, payload: str) -> Component:
+    data = json.loads(payload)
+    if component_type == "text":
+        return cast(str, data)
+    return cast(Component, _COMPONENT_TYPES[component_type].model_validate(data))
+
+
+def _component_stub(component: Component, position: int) -> ComponentStub:
+    """Stub for a component that was loaded from a legacy message blob."""
+    if isinstance(component, ComponentStub):
+        return component
+    payload = json.dumps(
+        component if isinstance(component, str) else component.model_dump(),
+        cls=ChatJSONEncoder,
+    )
+    return ComponentStub(
+        component_type=get_component_type(component),
+        position=position,
+        size=len(payload.encode()),
+    )
 
-            for (chat_id,) in chat_ids:
-                await self.execute_query(
-                    conn, "DELETE FROM chat_messages WHERE chat_id = ?", [chat_id]
-                )
 
-            # Then delete the chat history records
-            await self.execute_query(
-                conn, "DELETE FROM chat_history WHERE user_id = ?", [self.user_id]
+def _message_header_json(message: AnalystChatMessage) -> str:
+    """Serialize a message without its components, which are stored separately."""
+    return json.dumps(
+        {**message.model_dump(exclude={"components"}), "components": []},
+        cls=ChatJSONEncoder,
+    )
+
+
+def _build_chat_messages(
+    rows: list[tuple[Any, ...]],
+    component_rows: list[tuple[Any, ...]],
+    include_payloads: bool,
+) -> list[AnalystChatMessage]:
+    """
+    Assemble messages from chat_messages rows and their component rows.
+
+    Messages written before components were split out keep their components
+    in the message JSON and are read from there.
+    """
+    components: dict[str, list[Component]] = {}
+    for message_id, position, component_type, size, payload in component_rows:
+        components.setdefault(message_id, []).append(
+            _load_component(component_type, payload)
+            if include_payloads
+            else ComponentStub(
+                component_type=component_type, position=position, size=size
             )
+        )
+
+    messages = []
+    for row in rows:
+        message = AnalystChatMessage.model_validate(json.loads(row[1]))
+        if row[0] in components:
+            message.components = components[row[0]]
+        elif not include_payloads:
+            message.components = [
+                _component_stub(component, position)
+                for position, component in enumerate(message.components)
+            ]
+        # Ensure the message has the correct id and chat_id
+        message.id = row[0]
+        message.chat_id = row[2]
+        messages.append(message)
+    return messages
+
+
+def _chat_component_rows(
+    conn: duckdb.DuckDBPyConnection, messages: list[AnalystChatMessage]
+) -> pa.Table:
+    """
+    Build the chat_message_components rows for `messages` as one Arrow table.
+
+    Stubs in the messages keep the payload that is currently stored for them.
+    """
+    stub_ids = [
+        message.id
+        for message in messages
+        if any(isinstance(c, ComponentStub) for c in message.components)
+    ]
+    stored: dict[tuple[str, int], tuple[str, int, str]] = {}
+    if stub_ids:
+        result = conn.execute(
+            """
+            SELECT message_id, position, component_type, size, payload
+            FROM chat_message_components
+            WHERE message_id IN (SELECT unnest(?))
+            """,
+            [stub_ids],
+        ).fetchall()
+        stored = {(row[0], row[1]): (row[2], row[3], row[4]) for row in result}
+
+    columns: dict[str, list[Any]] = {
+        "message_id": [],
+        "chat_id": [],
+        "position": [],
+        "component_type": [],
+        "size": [],
+        "payload": [],
+    }
+    for message in messages:
+        for position, component in enumerate(message.components):
+            if isinstance(component, ComponentStub):
+                key = (message.id, component.position)
+                if key not in stored:
+                    raise ValueError(
+                        f"Payload of component {component.position} of message "
+                        f"{message.id} is not loaded"
+                    )
+                component_type, size, payload = stored[key]
+            else:
+                component_type = get_component_type(component)
+                payload = json.dumps(
+                    component if isinstance(component, str) else component.model_dump(),
+                    cls=ChatJSONEncoder,
+                )
+                size = len(payload.encode())
+            columns["message_id"].append(message.id)
+            columns["chat_id"].append(message.chat_id)
+            columns["position"].append(position)
+            columns["component_type"].append(component_type)
+            columns["size"].append(size)
+            columns["payload"].append(payload)
+
+    return pl.DataFrame(
+        columns,
+        schema={
+            "message_id": pl.String,
+            "chat_id": pl.String,
+            "position": pl.Int32,
+            "component_type": pl.String,
+            "size": pl.Int64,
+            "payload": pl.String,
+        },
+    ).to_arrow()
+
+
+def _insert_component_rows(conn: duckdb.DuckDBPyConnection, rows: pa.Table) -> None:
+    if not rows.num_rows:
+        return
+    conn.register("new_chat_message_components", rows)
+    try:
+        conn.execute(
+            """
+            INSERT INTO chat_message_components
+                (message_id, chat_id, position, component_type, size, payload)
+            SELECT message_id, chat_id, position, component_type, size, payload
+            FROM new_chat_message_components
+            """
+        )
+    finally:
+        conn.unregister("new_chat_message_components")
+
+
+def _replace_message_components(
+    conn: duckdb.DuckDBPyConnection, messages: list[AnalystChatMessage]
+) -> None:
+    """Replace the stored components of `messages`, inside a transaction."""
+    rows = _chat_component_rows(conn, messages)
+    conn.execute(
+        "DELETE FROM chat_message_components WHERE message_id IN (SELECT unnest(?))",
+        [[message.id for message in messages]],
+    )
+    _insert_component_rows(conn, rows)
 
 
 class AnalystDB:
@@ -1353,6 +2786,8 @@ class AnalystDB:
         chat_db_name: str = "chat",
         db_version: int | None = ANALYST_DATABASE_VERSION,
         use_persistent_storage: bool = False,
+        use_parquet_storage: bool = PARQUET_DATASET_STORAGE,
+        shared: bool = SHARED_DATABASE,
     ) -> "AnalystDB":
         self = cls.__new__(cls)
         self.dataset_handler = DatasetHandler(
@@ -1361,6 +2796,8 @@ class AnalystDB:
             name=dataset_db_name,
             db_version=db_version,
             use_persistent_storage=use_persistent_storage,
+            use_parquet_storage=use_parquet_storage,
+            shared=shared,
         )
         self.chat_handler = ChatHandler(
             user_id=user_id,
@@ -1368,6 +2805,7 @@ class AnalystDB:
             name=chat_db_name,
             db_version=db_version,
             use_persistent_storage=use_persistent_storage,
+            shared=shared,
         )
         self.user_id = user_id
         self.db_path = db_path
@@ -1378,8 +2816,13 @@ class AnalystDB:
 
     async def initialize(self) -> None:
         """Initialize both database handlers."""
-        await self.dataset_handler._initialize_database()
-        await self.chat_handler._initialize_database()
+        await self.dataset_handler.initialize()
+        await self.chat_handler.initialize()
+
+    async def close(self) -> None:
+        """Release both database handlers."""
+        await self.dataset_handler.close()
+        await self.chat_handler.close()
 
     # Dataset operations
     async def register_dataset(
@@ -1409,35 +2852,185 @@ class AnalystDB:
         except Exception as e:
             logger.warning(f"Error registering dataset: {e}")
 
+    async def register_csv(
+        self,
+        path: Path,
+        name: str,
+        data_source: DataSourceType = DataSourceType.FILE,
+        file_size: int = 0,
+    ) -> None:
+        """Load a CSV file into a new dataset; parse errors are raised."""
+        await self.dataset_handler.register_csv(
+            path, name, data_source=data_source, file_size=file_size
+        )
+
     async def get_dataset(
-        self, name: str, max_rows: int | None = 10000
+        self,
+        name: str,
+        max_rows: int | None = 10000,
+        columns: list[str] | None = None,
+        filter: str | None = None,
+        sample: SampleSpec | None = None,
     ) -> AnalystDataset:
         data = AnalystDataset(
             data=await self.dataset_handler.get_dataframe(
-                name, expected_type=DatasetType.STANDARD, max_rows=max_rows
+                name,
+                expected_type=DatasetType.STANDARD,
+                max_rows=max_rows,
+                columns=columns,
+                filter=filter,
+                sample=sample,
             ),
             name=name,
         )
         return data
 
+    async def count_rows(
+        self, name: str, cleansed: bool = False, filter: str | None = None
+    ) -> int:
+        """Count the rows of a standard or cleansed dataset without loading it."""
+        if cleansed:
+            await self._rebuild_if_stale(name, DatasetType.CLEANSED)
+        return await self.dataset_handler.count_rows(
+            f"{name}_cleansed" if cleansed else name,
+            expected_type=DatasetType.CLEANSED if cleansed else DatasetType.STANDARD,
+            filter=filter,
+        )
+
+    async def get_dataset_page(
+        self,
+        name: str,
+        skip: int = 0,
+        limit: int | None = None,
+        columns: list[str] | None = None,
+        order_by: str | None = None,
+        descending: bool = False,
+    ) -> tuple[AnalystDataset, int]:
+        """Return one page of a standard dataset and the dataset's total row count."""
+        data = AnalystDataset(
+            data=await self.dataset_handler.query_dataframe(
+                name,
+                expected_type=DatasetType.STANDARD,
+                offset=skip,
+                limit=limit,
+                columns=columns,
+                order_by=order_by,
+                descending=descending,
+            ),
+            name=name,
+        )
+        metadata = await self.dataset_handler.get_dataset_metadata(name)
+        return data, metadata.row_count
+
+    async def open_dataset_page(
+        self,
+        name: str,
+        skip: int = 0,
+        limit: int | None = None,
+        columns: list[str] | None = None,
+        order_by: str | None = None,
+        descending: bool = False,
+        *,
+        batch_rows: int,
+    ) -> tuple[AbstractAsyncContextManager[pa.RecordBatchReader], int]:
+        """
+        Like `get_dataset_page`, but return a context manager reading the page
+        as Arrow record batches while it is sent, and the total row count.
+        """
+        page = await self.dataset_handler.query_record_batches(
+            name,
+            expected_type=DatasetType.STANDARD,
+            offset=skip,
+            limit=limit,
+            columns=columns,
+            order_by=order_by,
+            descending=descending,
+            batch_rows=batch_rows,
+        )
+        metadata = await self.dataset_handler.get_dataset_metadata(name)
+        return page, metadata.row_count
+
     async def get_dataset_metadata(self, name: str) -> DatasetMetadata:
         data = await self.dataset_handler.get_dataset_metadata(name)
         return data
 
+    async def _rebuild_if_stale(self, name: str, dataset_type: DatasetType) -> None:
+        """Rebuild a derived dataset a migration marked stale before it is read."""
+        rebuilder = _artifact_rebuilders.get(dataset_type)
+        if rebuilder is None:
+            return
+        if not await self.dataset_handler.claim_rebuild(name, dataset_type):
+            return
+        logger.info(f"Rebuilding {dataset_type.value} dataset of {name}")
+        try:
+            await rebuilder(self, name)
+        except Exception as e:
+            logger.warning(
+                f"Failed to rebuild {dataset_type.value} dataset of {name}: {e}"
+            )
+            await self.dataset_handler.mark_stale(name, dataset_type)
+
     async def get_cleansed_dataset(
-        self, name: str, max_rows: int | None = 10000
+        self,
+        name: str,
+        max_rows: int | None = 10000,
+        columns: list[str] | None = None,
+        filter: str | None = None,
+        sample: SampleSpec | None = None,
     ) -> CleansedDataset:
+        await self._rebuild_if_stale(name, DatasetType.CLEANSED)
         data = AnalystDataset(
             name=name,
             data=await self.dataset_handler.get_dataframe(
                 f"{name}_cleansed",
                 expected_type=DatasetType.CLEANSED,
                 max_rows=max_rows,
+                columns=columns,
+                filter=filter,
+                sample=sample,
             ),
         )
         cleansing_report = await self.dataset_handler.get_cleansing_report(name)
         return CleansedDataset(dataset=data, cleaning_report=cleansing_report)
 
+    async def get_column_profiles(
+        self, name: str, cleansed: bool = False
+    ) -> dict[str, ColumnProfile]:
+        """Return the column profiles of a dataset keyed by column name."""
+        if cleansed:
+            await self._rebuild_if_stale(name, DatasetType.CLEANSED)
+            profiles = await self.dataset_handler.get_column_profiles(
+                f"{name}_cleansed", expected_type=DatasetType.CLEANSED
+            )
+        else:
+            profiles = await self.dataset_handler.get_column_profiles(name)
+        return {profile.column: profile for profile in profiles}
+
+    async def has_cleansed_dataset(self, name: str) -> bool:
+        return await self.dataset_handler.table_exists(f"{name}_cleansed")
+
+    async def get_dataset_version(self, name: str) -> str:
+        """
+        Identify the stored state of a dataset and its cleansed version.
+
+        Derived from the creation time and row count kept in DuckDB, so it
+        changes whenever either is registered, replaced or deleted, and stays
+        the same across restarts and reloads of the catalog.
+        """
+        versions = []
+        for dataset_name in (name, f"{name}_cleansed"):
+            version = "missing"
+            if await self.dataset_handler.table_exists(dataset_name):
+                try:
+                    metadata = await self.dataset_handler.get_dataset_metadata(
+                        dataset_name
+                    )
+                    version = f"{metadata.created_at}:{metadata.row_count}"
+                except ValueError:
+                    pass  # deleted meanwhile
+            versions.append(version)
+        return "/".join(versions)
+
     async def register_data_dictionary(self, data_dictionary: DataDictionary) -> None:
         try:
             return await self.dataset_handler.register_dataframe(
@@ -1453,6 +3046,7 @@ class AnalystDB:
             )
 
     async def get_data_dictionary(self, name: str) -> DataDictionary | None:
+        await self._rebuild_if_stale(name, DatasetType.DICTIONARY)
         try:
             df = await self.dataset_handler.get_dataframe(
                 f"{name}_dict", expected_type=DatasetType.DICTIONARY
@@ -1577,17 +3171,39 @@ class AnalystDB:
     async def get_chat_message(
         self,
         message_id: str,
+        include_payloads: bool = True,
     ) -> AnalystChatMessage | None:
         """
         Get a specific chat message by its ID.
 
         Args:
             message_id: ID of the message to retrieve
+            include_payloads: Load the message components instead of stubs
 
         Returns:
             The message if found, None otherwise
         """
-        return await self.chat_handler.get_chat_message(message_id=message_id)
+        return await self.chat_handler.get_chat_message(
+            message_id=message_id, include_payloads=include_payloads
+        )
+
+    async def get_chat_message_component(
+        self, chat_id: str, message_id: str, position: int
+    ) -> Component | None:
+        """
+        Load the payload of one component of a chat message.
+
+        Args:
+            chat_id: ID of the chat the message belongs to
+            message_id: ID of the message
+            position: Index of the component in the message's components
+
+        Returns:
+            The component if found, None otherwise
+        """
+        return await self.chat_handler.get_chat_message_component(
+            chat_id=chat_id, message_id=message_id, position=position
+        )
 
     async def get_chat_list(self) -> list[dict[str, Any]]:
         """
@@ -1609,7 +3225,10 @@ class AnalystDB:
         return await self.chat_handler.rename_chat(chat_id=chat_id, new_name=new_name)
 
     async def get_chat_messages(
-        self, name: str | None = None, chat_id: str | None = None
+        self,
+        name: str | None = None,
+        chat_id: str | None = None,
+        include_payloads: bool = True,
     ) -> list[AnalystChatMessage]:
         """
         Get a chat by name or ID.
@@ -1617,15 +3236,21 @@ class AnalystDB:
         Args:
             name: The name of the chat (used if chat_id not provided)
             chat_id: The ID of the chat (takes precedence over name)
+            include_payloads: Load the message components, otherwise they are
+                returned as stubs
 
         Returns:
             List of chat messages or None if not found
         """
         chat_history = await self.chat_handler.get_chat_messages(
-            chat_name=name, chat_id=chat_id
+            chat_name=name, chat_id=chat_id, include_payloads=include_payloads
         )
         return chat_history
 
+    async def get_chat_updated_at(self, chat_id: str) -> datetime | None:
+        """Return when a chat or any of its messages was last changed."""
+        return await self.chat_handler.get_chat_updated_at(chat_id)
+
     async def delete_all_chats(self) -> None:
         await self.chat_handler.delete_all_chats()
 
@@ -58,13 +58,20 @@ from pydantic import ValidationError
 
 sys.path.append(os.path.dirname(os.path.realpath(__file__)))
 from utils import prompts, tools
-from utils.analyst_db import AnalystDB, DataSourceType
+from utils.analyst_db import (
+    AnalystDB,
+    DatasetType,
+    DataSourceType,
+    SampleSpec,
+    register_artifact_rebuilder,
+)
 from utils.code_execution import (
     InvalidGeneratedCode,
     MaxReflectionAttempts,
     execute_python,
     reflect_code_generation_errors,
 )
+from utils.column_profiles import profile_dataframe
 from utils.data_cleansing_helpers import (
     add_summary_statistics,
     process_column,
@@ -81,6 +88,7 @@ from utils.schema import (
     ChatRequest,
     CleansedDataset,
     CodeGeneration,
+    ColumnProfile,
     Component,
     DatabaseAnalysisCodeGeneration,
     DataDictionary,
@@ -165,6 +173,7 @@ MAX_REGISTRY_DATASET_SIZE = 400e6  # aligns to 400MB set in streamlit config.tom
 DISK_CACHE_LIMIT_BYTES = 512e6
 DICTIONARY_PARALLEL_BATCH_SIZE = 2
 DICTIONARY_TIMEOUT = 45.0
+ANALYSIS_CANCELLED_MESSAGE = "Analysis cancelled"
 
 _memory = Memory(tempfile.gettempdir(), verbose=0)
 _memory.clear(warn=False)  # clear cache on startup
@@ -280,7 +289,10 @@ async def download_registry_datasets(
 
 
 async def _get_dictionary_batch(
-    columns: list[str], df: pl.DataFrame, batch_size: int = 5
+    columns: list[str],
+    df: pl.DataFrame,
+    profiles: dict[str, ColumnProfile],
+    batch_size: int = 5,
 ) -> list[DataDictionaryColumn]:
     """Process a batch of columns to get their descriptions"""
 
@@ -309,29 +321,19 @@ async def _get_dictionary_batch(
                 # For non-datetime columns, just take the samples as is
                 sample_data[col] = df.select(pl.col(col)).head(num_samples).to_dict()
 
-        # Handle numeric summary
-        numeric_summary = {}
-        logger.debug("Calculating numeric summaries")
-        for col in columns:
-            if df[col].dtype.is_numeric():
-                desc = df[col].describe()
-                numeric_summary[col] = desc.to_dict()
-
-        # Get categories for non-numeric columns
-        categories = []
-        logger.debug("Getting categories for non-numeric columns")
-        for column in columns:
-            if not df[column].dtype.is_numeric():
-                try:
-                    value_counts = (
-                        df[column].sample(n=1000, seed=42).value_counts().head(10)
-                    )
-                    # Convert any timestamp values to strings
-                    if df[column].dtype.is_temporal():
-                        value_counts[column] = value_counts[column].cast(pl.String)
-                    categories.append({column: value_counts[column].to_list()})
-                except Exception:
-                    continue
+        # Numeric summaries and categories come from the column profiles.
+        # Profiles keep top values for non-numeric columns only, so numeric
+        # columns are described by their summary, as before the profiles.
+        numeric_summary = {
+            col: profiles[col].summary()
+            for col in columns
+            if df[col].dtype.is_numeric()
+        }
+        categories = [
+            {column: [v.value for v in profiles[column].top_values]}
+            for column in columns
+            if profiles[column].top_values
+        ]
 
         # Create messages for OpenAI
         messages: list[ChatCompletionMessageParam] = [
@@ -389,8 +391,15 @@ async def _get_dictionary_batch(
 
 
 @log_api_call
-async def get_dictionary(dataset: AnalystDataset) -> DataDictionary:
-    """Process a single dataset with parallel column batch processing"""
+async def get_dictionary(
+    dataset: AnalystDataset, profiles: dict[str, ColumnProfile] | None = None
+) -> DataDictionary:
+    """
+    Process a single dataset with parallel column batch processing
+
+    `profiles` are the stored column profiles of the dataset; without them the
+    columns are profiled from the sample.
+    """
 
     try:
         logger.info(f"Processing dataset {dataset.name} init")
@@ -409,6 +418,9 @@ async def get_dictionary(dataset: AnalystDataset) -> DataDictionary:
                 column_descriptions=[],
             )
 
+        if profiles is None:
+            profiles = {profile.column: profile for profile in profile_dataframe(df)}
+
         # Split columns into batches
         column_batches = [
             list(df.columns[i : i + DICTIONARY_BATCH_SIZE])
@@ -427,7 +439,9 @@ async def get_dictionary(dataset: AnalystDataset) -> DataDictionary:
             try:
                 async with sem:
                     return await asyncio.wait_for(
-                        _get_dictionary_batch(batch, df, DICTIONARY_BATCH_SIZE),
+                        _get_dictionary_batch(
+                            batch, df, profiles, DICTIONARY_BATCH_SIZE
+                        ),
                         timeout=DICTIONARY_TIMEOUT,
                     )
             except asyncio.TimeoutError:
@@ -659,11 +673,15 @@ async def _generate_run_charts_python_code(
     request: RunChartsRequest,
     validation_error: InvalidGeneratedCode | None = None,
 ) -> str:
-    df = request.dataset.to_df().to_pandas()
+    df_polars = request.dataset.to_df()
+    df = df_polars.to_pandas()
     question = request.question
     dataframe_metadata = {
         "shape": {"rows": int(df.shape[0]), "columns": int(df.shape[1])},
-        "statistics": df.describe(include="all").to_dict(),
+        "statistics": {
+            profile.column: profile.summary()
+            for profile in profile_dataframe(df_polars)
+        },
         "dtypes": df.dtypes.astype(str).to_dict(),
     }
     messages: list[ChatCompletionMessageParam] = [
@@ -756,15 +774,20 @@ async def _generate_run_analysis_python_code(
 
     logger.debug(f"datasets: {request.dataset_names}")
     for dataset_name in request.dataset_names:
+        # Only the first 10 rows are read, the row count comes from the catalog
         try:
-            dataset = (await analyst_db.get_cleansed_dataset(dataset_name)).to_df()
+            sample_df = (
+                await analyst_db.get_cleansed_dataset(dataset_name, max_rows=10)
+            ).to_df()
+            row_count = await analyst_db.count_rows(dataset_name, cleansed=True)
         except Exception:
-            dataset = (await analyst_db.get_dataset(dataset_name)).to_df()
+            sample_df = (
+                await analyst_db.get_dataset(dataset_name, max_rows=10)
+            ).to_df()
+            row_count = await analyst_db.count_rows(dataset_name)
         all_shapes.append(
-            f"{dataset_name}: {dataset.shape[0]} rows x {dataset.shape[1]} columns"
+            f"{dataset_name}: {row_count} rows x {sample_df.shape[1]} columns"
         )
-        # Limit sample to 10 rows
-        sample_df = dataset.head(10)
         all_samples.append(f"{dataset_name}:\n{sample_df}")
 
     shape_info = "\n".join(all_shapes)
@@ -1218,7 +1241,7 @@ async def _generate_database_analysis_code(
     all_samples = []
 
     for table in request.dataset_names:
-        df = (await analyst_db.get_dataset(table)).to_df().to_pandas()
+        df = (await analyst_db.get_dataset(table, max_rows=10)).to_df().to_pandas()
 
         sample_str = f"Table: {table}\n{df.head(10).to_string()}"
         all_samples.append(sample_str)
@@ -1381,6 +1404,16 @@ async def execute_business_analysis_and_charts(
         return None, business_result
 
 
+async def mark_analysis_cancelled(
+    analyst_db: AnalystDB, message: AnalystChatMessage
+) -> None:
+    """Record on a message that the analysis producing it was cancelled."""
+    message.in_progress = False
+    message.error = ANALYSIS_CANCELLED_MESSAGE
+    # a no-op if the message has been deleted meanwhile
+    await analyst_db.update_chat_message(message_id=message.id, message=message)
+
+
 async def run_complete_analysis(
     chat_request: ChatRequest,
     data_source: DataSourceType,
@@ -1404,6 +1437,9 @@ async def run_complete_analysis(
 
         yield enhanced_message
 
+    except asyncio.CancelledError:
+        await mark_analysis_cancelled(analyst_db, user_message)
+        raise
     except ValidationError:
         user_message.error = "LLM Error, please retry"
         user_message.in_progress = False
@@ -1475,6 +1511,9 @@ async def run_complete_analysis(
             message_id=assistant_message.id, message=assistant_message
         )
 
+    except asyncio.CancelledError:
+        await mark_analysis_cancelled(analyst_db, assistant_message)
+        raise
     except Exception as e:
         error_message = f"Error running initial analysis. Try rephrasing: {str(e)}"
         assistant_message.in_progress = False
@@ -1546,6 +1585,9 @@ async def run_complete_analysis(
 
             yield business_result
 
+    except asyncio.CancelledError:
+        await mark_analysis_cancelled(analyst_db, assistant_message)
+        raise
     except Exception as e:
         error_message = f"Error setting up additional analysis: {str(e)}"
         assistant_message.in_progress = False
@@ -1621,8 +1663,16 @@ async def process_data_and_update_state(
             except Exception:
                 pass
             logger.info(f"Creating dictionary for dataset: {analysis_dataset_name}")
-            analysis_dataset = await analyst_db.get_dataset(analysis_dataset_name)
-            new_dictionary = await get_dictionary(analysis_dataset)
+            # the dictionary is built from a 10k row sample, drawn by DuckDB
+            analysis_dataset = await analyst_db.get_dataset(
+                analysis_dataset_name,
+                max_rows=None,
+                sample=SampleSpec(rows=10000, seed=42),
+            )
+            new_dictionary = await get_dictionary(
+                analysis_dataset,
+                await analyst_db.get_column_profiles(analysis_dataset_name),
+            )
             logger.info(new_dictionary.to_application_df())
             del analysis_dataset
             await analyst_db.register_data_dictionary(new_dictionary)
@@ -1637,3 +1687,31 @@ async def process_data_and_update_state(
     log_memory()
     # Final completion message
     yield "Processing complete"
+
+
+async def _rebuild_cleansed_dataset(analyst_db: AnalystDB, name: str) -> None:
+    """Re-cleanse a dataset whose cleansed version a migration marked stale."""
+    analysis_dataset = await analyst_db.get_dataset(name, max_rows=None)
+    cleansed_dataset = await cleanse_dataframe(analysis_dataset)
+    if await analyst_db.has_cleansed_dataset(name):
+        await analyst_db.dataset_handler.delete_dataset(f"{name}_cleansed")
+    await analyst_db.register_dataset(
+        cleansed_dataset, data_source=DataSourceType.GENERATED
+    )
+
+
+async def _rebuild_data_dictionary(analyst_db: AnalystDB, name: str) -> None:
+    """Regenerate a data dictionary a migration marked stale."""
+    analysis_dataset = await analyst_db.get_dataset(
+        name, max_rows=None, sample=SampleSpec(rows=10000, seed=42)
+    )
+    new_dictionary = await get_dictionary(
+        analysis_dataset, await analyst_db.get_column_profiles(name)
+    )
+    if await analyst_db.dataset_handler.table_exists(f"{name}_dict"):
+        await analyst_db.delete_dictionary(name)
+    await analyst_db.register_data_dictionary(new_dictionary)
+
+
+register_artifact_rebuilder(DatasetType.CLEANSED, _rebuild_cleansed_dataset)
+register_artifact_rebuilder(DatasetType.DICTIONARY, _rebuild_data_dictionary)
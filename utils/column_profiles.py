@@ -0,0 +1,244 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, cast
+
+import duckdb
+import polars as pl
+
+from utils.schema import ColumnProfile, ColumnValueCount
+
+# number of most frequent values kept for non-numeric columns
+PROFILE_TOP_K = 10
+
+# quantiles kept for numeric columns
+PROFILE_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def _json_value(value: Any) -> Any:
+    """Convert a Polars scalar to a JSON serializable value."""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _is_nested(dtype: pl.DataType) -> bool:
+    return dtype.is_nested() or dtype == pl.Object
+
+
+def profile_dataframe(
+    df: pl.DataFrame, top_k: int = PROFILE_TOP_K
+) -> list[ColumnProfile]:
+    """
+    Compute the profile of every column of `df` in one vectorized pass.
+
+    Numeric columns get mean, standard deviation and quantiles, numeric and
+    temporal columns min and max, and all other columns their `top_k` most
+    frequent values. Distinct counts are HyperLogLog estimates that count null
+    as a value.
+    """
+    exprs: list[pl.Expr] = []
+    for position, (name, dtype) in enumerate(df.schema.items()):
+        col = pl.col(name)
+        key = f"{position}"
+        exprs.append(col.null_count().alias(f"{key}:null_count"))
+        if _is_nested(dtype):
+            continue
+        exprs.append(col.approx_n_unique().alias(f"{key}:distinct_count"))
+        if dtype.is_numeric() or dtype.is_temporal():
+            exprs += [col.min().alias(f"{key}:min"), col.max().alias(f"{key}:max")]
+        if dtype.is_numeric():
+            exprs += [
+                col.mean().alias(f"{key}:mean"),
+                col.std().alias(f"{key}:std"),
+            ]
+            exprs += [
+                col.quantile(q, "linear").alias(f"{key}:{q:.0%}")
+                for q in PROFILE_QUANTILES
+            ]
+        else:
+            exprs.append(
+                col.drop_nulls()
+                .value_counts(sort=True, name="count" if name != "count" else "n")
+                .head(top_k)
+                .implode()
+                .alias(f"{key}:top_values")
+            )
+    stats = df.select(exprs).row(0, named=True) if exprs else {}
+
+    profiles = []
+    for position, (name, dtype) in enumerate(df.schema.items()):
+        key = f"{position}"
+        profile = ColumnProfile(
+            column=name,
+            data_type=str(dtype),
+            count=df.height,
+            null_count=stats[f"{key}:null_count"],
+            distinct_count=(
+                min(stats[f"{key}:distinct_count"], df.height)
+                if f"{key}:distinct_count" in stats
+                else None
+            ),
+            min=_json_value(stats.get(f"{key}:min")),
+            max=_json_value(stats.get(f"{key}:max")),
+            mean=stats.get(f"{key}:mean"),
+            std=stats.get(f"{key}:std"),
+        )
+        if dtype.is_numeric():
+            profile.quantiles = {
+                f"{q:.0%}": stats[f"{key}:{q:.0%}"] for q in PROFILE_QUANTILES
+            }
+        for value_count in stats.get(f"{key}:top_values") or []:
+            value, count = value_count.values()
+            profile.top_values.append(
+                ColumnValueCount(value=_json_value(value), count=count)
+            )
+        profiles.append(profile)
+    return profiles
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _top_values(
+    conn: duckdb.DuckDBPyConnection,
+    relation: str,
+    schema: pl.Schema,
+    top_k: int,
+) -> dict[str, list[ColumnValueCount]]:
+    """
+    Count the `top_k` most frequent values of every non-numeric column in one
+    scan of `relation`, keyed by column position.
+
+    The columns are unpivoted into (position, value) pairs so a single
+    grouping covers them all. Values go through JSON to share one type, and
+    come back as the JSON serializable values `_json_value` would return.
+    """
+    columns = [
+        f"to_json({_quote(name)}) AS {_quote(str(position))}"
+        for position, (name, dtype) in enumerate(schema.items())
+        if not dtype.is_numeric() and not _is_nested(dtype)
+    ]
+    if not columns:
+        return {}
+    rows = conn.execute(
+        f"""
+        WITH "values" AS (SELECT {", ".join(columns)} FROM {relation}),
+        pairs AS (
+            UNPIVOT "values" ON COLUMNS(*) INTO NAME position VALUE value
+        ),
+        counts AS (
+            SELECT
+                position,
+                value,
+                count(*) AS n,
+                row_number() OVER (
+                    PARTITION BY position ORDER BY count(*) DESC, value
+                ) AS rank
+            FROM pairs
+            GROUP BY position, value
+        )
+        SELECT position, value, n FROM counts
+        WHERE rank <= {int(top_k)}
+        ORDER BY position, rank
+        """
+    ).fetchall()
+    top_values: dict[str, list[ColumnValueCount]] = {}
+    for position, value, count in rows:
+        top_values.setdefault(position, []).append(
+            ColumnValueCount(value=json.loads(value), count=count)
+        )
+    return top_values
+
+
+def profile_relation(
+    conn: duckdb.DuckDBPyConnection, relation: str, top_k: int = PROFILE_TOP_K
+) -> list[ColumnProfile]:
+    """
+    Compute the same profiles as `profile_dataframe` for a DuckDB table or view.
+
+    The statistics are aggregated by DuckDB, in one query for all columns and
+    one for the top values of all non-numeric columns, so the dataset is never
+    loaded into Python. `relation` is the quoted name of the table or view.
+    """
+    empty = conn.execute(f"SELECT * FROM {relation} LIMIT 0").arrow()
+    schema = cast(pl.DataFrame, pl.from_arrow(empty)).schema
+    exprs = ['count(*) AS "rows"']
+    for position, (name, dtype) in enumerate(schema.items()):
+        col = _quote(name)
+
+        def stat(sql: str, statistic: str) -> str:
+            return f"{sql} AS {_quote(f'{position}:{statistic}')}"
+
+        exprs.append(stat(f"count(*) FILTER (WHERE {col} IS NULL)", "null_count"))
+        if _is_nested(dtype):
+            continue
+        # counts null as a value, like approx_n_unique
+        exprs.append(
+            stat(
+                f"approx_count_distinct({col})"
+                f" + (count(*) FILTER (WHERE {col} IS NULL) > 0)::INTEGER",
+                "distinct_count",
+            )
+        )
+        if dtype.is_numeric() or dtype.is_temporal():
+            exprs += [stat(f"min({col})", "min"), stat(f"max({col})", "max")]
+        if dtype.is_numeric():
+            exprs += [stat(f"avg({col})", "mean"), stat(f"stddev_samp({col})", "std")]
+            exprs += [
+                stat(f"quantile_cont({col}, {q})", f"{q:.0%}")
+                for q in PROFILE_QUANTILES
+            ]
+    result = conn.execute(f"SELECT {', '.join(exprs)} FROM {relation}")
+    names = [column[0] for column in result.description or []]
+    stats = dict(zip(names, result.fetchone() or ()))
+    height = stats["rows"]
+    top_values = _top_values(conn, relation, schema, top_k)
+
+    profiles = []
+    for position, (name, dtype) in enumerate(schema.items()):
+        key = f"{position}"
+        profile = ColumnProfile(
+            column=name,
+            data_type=str(dtype),
+            count=height,
+            null_count=stats[f"{key}:null_count"],
+            distinct_count=(
+                min(stats[f"{key}:distinct_count"], height)
+                if f"{key}:distinct_count" in stats
+                else None
+            ),
+            min=_json_value(stats.get(f"{key}:min")),
+            max=_json_value(stats.get(f"{key}:max")),
+            mean=_json_value(stats.get(f"{key}:mean")),
+            std=_json_value(stats.get(f"{key}:std")),
+        )
+        if dtype.is_numeric():
+            profile.quantiles = {
+                f"{q:.0%}": _json_value(stats[f"{key}:{q:.0%}"])
+                for q in PROFILE_QUANTILES
+            }
+        profile.top_values = top_values.get(key, [])
+        profiles.append(profile)
+    return profiles
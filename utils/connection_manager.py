@@ -0,0 +1,406 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator
+
+import duckdb
+import psutil
+
+from utils.logging_helper import get_logger
+
+logger = get_logger("ConnectionManager")
+
+# seconds a database may stay open without any cursor checked out before it is closed
+DUCKDB_IDLE_TIMEOUT = float(os.environ.get("DUCKDB_IDLE_TIMEOUT", 300))
+
+# memory in MB shared by all open databases, defaults to half of the machine's memory
+DUCKDB_MEMORY_BUDGET_MB = int(
+    os.environ.get(
+        "DUCKDB_MEMORY_BUDGET_MB", psutil.virtual_memory().total // 2 // 2**20
+    )
+)
+# worker threads shared by all open databases
+DUCKDB_THREAD_BUDGET = int(os.environ.get("DUCKDB_THREAD_BUDGET", os.cpu_count() or 1))
+# memory limit of a database without a cursor checked out, which bounds its block cache
+DUCKDB_MIN_MEMORY_MB = int(os.environ.get("DUCKDB_MIN_MEMORY_MB", 128))
+# directory databases spill to once they reach their memory limit
+DUCKDB_TEMP_DIRECTORY = os.environ.get(
+    "DUCKDB_TEMP_DIRECTORY", os.path.join(tempfile.gettempdir(), "duckdb_spill")
+)
+
+
+@dataclass
+class ConnectionStats:
+    opened: int = 0  # number of times a database file was opened
+    reused: int = 0  # number of cursors served from an already open database
+    evicted: int = 0  # number of databases closed by the idle timeout or release
+    open_databases: int = 0
+    active_cursors: int = 0
+
+
+@dataclass(frozen=True)
+class ResourceAllocation:
+    memory_limit_mb: int
+    threads: int
+    temp_directory: str
+
+
+class ResourceGovernor:
+    """
+    Split a process-wide memory and thread budget across the open DuckDB
+    databases.
+
+    Every user has their own database files, and an unconfigured DuckDB
+    instance claims all cores and most of the machine's memory, so a few
+    concurrent heavy queries can get the container OOM-killed. Databases with
+    a cursor checked out share the budget evenly as `memory_limit` and
+    `threads`, and get a temp directory of their own to spill to, so large
+    queries go to disk instead of failing. Idle databases keep at most
+    `min_memory_mb` each for their block cache, and together at most half the
+    budget, which is taken off the shares of the busy ones. The memory limits
+    of all open databases therefore never add up to more than the budget.
+    """
+
+    def __init__(
+        self,
+        memory_budget_mb: int = DUCKDB_MEMORY_BUDGET_MB,
+        thread_budget: int = DUCKDB_THREAD_BUDGET,
+        min_memory_mb: int = DUCKDB_MIN_MEMORY_MB,
+        temp_directory: str = DUCKDB_TEMP_DIRECTORY,
+    ) -> None:
+        self.memory_budget_mb = memory_budget_mb
+        self.thread_budget = thread_budget
+        self.min_memory_mb = min_memory_mb
+        self.temp_directory = temp_directory
+
+    def allocate(
+        self, key: str, active: int, idle: int, in_use: bool = True
+    ) -> ResourceAllocation:
+        """
+        Return the share of database `key` while `active` databases have a
+        cursor checked out and `idle` others are open.
+
+        `in_use` tells whether `key` itself is one of the active databases.
+        """
+        idle_memory_mb = (
+            min(self.min_memory_mb, self.memory_budget_mb // 2 // idle) if idle else 0
+        )
+        if in_use:
+            active = max(active, 1)
+            memory_limit_mb = (self.memory_budget_mb - idle * idle_memory_mb) // active
+            threads = max(self.thread_budget // active, 1)
+        else:
+            memory_limit_mb, threads = idle_memory_mb, 1
+        return ResourceAllocation(
+            memory_limit_mb=max(memory_limit_mb, 1),
+            threads=threads,
+            temp_directory=os.path.join(
+                self.temp_directory,
+                f"{Path(key).stem}-{hashlib.sha1(key.encode()).hexdigest()[:8]}",
+            ),
+        )
+
+    @staticmethod
+    def apply(
+        connection: duckdb.DuckDBPyConnection, allocation: ResourceAllocation
+    ) -> None:
+        """Set the DuckDB pragmas of a database instance to `allocation`."""
+        temp_directory = allocation.temp_directory.replace("'", "''")
+        connection.execute(f"SET memory_limit = '{allocation.memory_limit_mb}MiB'")
+        connection.execute(f"SET threads = {allocation.threads}")
+        connection.execute(f"SET temp_directory = '{temp_directory}'")
+
+
+@dataclass
+class _DatabaseEntry:
+    connection: duckdb.DuckDBPyConnection
+    handlers: int = 0
+    active_cursors: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+    timer: threading.Timer | None = None
+    allocation: ResourceAllocation | None = None  # applied to the connection
+    target: ResourceAllocation | None = None  # decided by the latest rebalance
+    # serializes applying allocations, the newest rebalance wins
+    apply_lock: threading.Lock = field(default_factory=threading.Lock)
+    generation: int = 0
+    closed: bool = False
+
+
+# allocations a rebalance decided on, applied once the manager lock is released
+_Rebalance = list[tuple[str, _DatabaseEntry, ResourceAllocation, int]]
+
+
+class DuckDBConnectionManager:
+    """
+    Keep one DuckDB database instance open per database file and hand out
+    cursors to it.
+
+    Opening a DuckDB file loads its catalog and replays the WAL, so doing that
+    for every query dominates the cost of the small queries the handlers run.
+    Databases stay open while a handler is registered for them or a cursor is
+    checked out, and are closed once they have been idle for `idle_timeout`
+    seconds. The manager is thread-safe and not bound to an event loop, so it
+    can be shared by the FastAPI and Streamlit frontends alike. Database files
+    are opened outside the manager's lock, so a slow open only holds up the
+    callers of that same file.
+
+    `governor` splits the memory and thread budget across the open databases.
+    The shares are rebalanced whenever a database gains its first cursor,
+    releases its last one, or is opened or closed. The changed shares are
+    applied right after the manager's lock is released, so queries already
+    running are held to the new limits too.
+    """
+
+    def __init__(
+        self,
+        idle_timeout: float = DUCKDB_IDLE_TIMEOUT,
+        governor: ResourceGovernor | None = None,
+    ) -> None:
+        self.idle_timeout = idle_timeout
+        self.governor = governor or ResourceGovernor()
+        self._lock = threading.Lock()
+        self._entries: dict[str, _DatabaseEntry] = {}
+        self._opening: dict[str, threading.Event] = {}
+        self._generation = 0
+        self._stats = ConnectionStats()
+
+    @staticmethod
+    def _key(db_path: Path) -> str:
+        return str(Path(db_path).absolute())
+
+    def register(self, db_path: Path) -> None:
+        """Mark `db_path` as used by a handler, keeping it open until unregistered."""
+        with self._locked_entry(self._key(db_path)) as (entry, _):
+            entry.handlers += 1
+            rebalance = self._rebalance()
+        self._apply(rebalance)
+
+    def unregister(self, db_path: Path) -> None:
+        """Drop a handler reference and close the database if nothing else uses it."""
+        key = self._key(db_path)
+        rebalance: _Rebalance = []
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.handlers = max(entry.handlers - 1, 0)
+            if entry.handlers == 0 and entry.active_cursors == 0:
+                self._close(key, entry)
+                rebalance = self._rebalance()
+        self._apply(rebalance)
+
+    def acquire(self, db_path: Path) -> duckdb.DuckDBPyConnection:
+        """Return a new cursor on the shared database instance for `db_path`."""
+        key = self._key(db_path)
+        rebalance: _Rebalance = []
+        try:
+            with self._locked_entry(key) as (entry, opened):
+                if not opened:
+                    self._stats.reused += 1
+                if entry.timer is not None:
+                    entry.timer.cancel()
+                    entry.timer = None
+                entry.active_cursors += 1
+                entry.last_used = time.monotonic()
+                if entry.active_cursors == 1 or entry.target is None:
+                    rebalance = self._rebalance()
+                try:
+                    return entry.connection.cursor()
+                except Exception:
+                    entry.active_cursors -= 1
+                    if entry.active_cursors == 0:
+                        rebalance = self._rebalance()
+                    raise
+        finally:
+            self._apply(rebalance)
+
+    def release(self, db_path: Path, cursor: duckdb.DuckDBPyConnection) -> None:
+        """Close a cursor returned by `acquire` and schedule idle eviction."""
+        try:
+            cursor.close()
+        except Exception as e:
+            logger.warning(f"Error closing cursor for {db_path}: {e}")
+        key = self._key(db_path)
+        rebalance: _Rebalance = []
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.active_cursors = max(entry.active_cursors - 1, 0)
+            entry.last_used = time.monotonic()
+            if entry.active_cursors == 0:
+                rebalance = self._rebalance()
+                self._schedule_eviction(key, entry)
+        self._apply(rebalance)
+
+    def evict_idle(self) -> int:
+        """Close every unregistered database idle for longer than the timeout."""
+        now = time.monotonic()
+        rebalance: _Rebalance = []
+        with self._lock:
+            idle = [
+                (key, entry)
+                for key, entry in self._entries.items()
+                if entry.handlers == 0
+                and entry.active_cursors == 0
+                and now - entry.last_used >= self.idle_timeout
+            ]
+            for key, entry in idle:
+                self._close(key, entry)
+            if idle:
+                rebalance = self._rebalance()
+        self._apply(rebalance)
+        return len(idle)
+
+    def close_all(self) -> None:
+        """Close all open databases, e.g. on application shutdown."""
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                self._close(key, entry)
+
+    def stats(self) -> ConnectionStats:
+        """Return a snapshot of the open/reuse/evict counters."""
+        with self._lock:
+            return ConnectionStats(
+                opened=self._stats.opened,
+                reused=self._stats.reused,
+                evicted=self._stats.evicted,
+                open_databases=len(self._entries),
+                active_cursors=sum(e.active_cursors for e in self._entries.values()),
+            )
+
+    def allocations(self) -> dict[str, ResourceAllocation]:
+        """Return the resources currently given to each open database."""
+        with self._lock:
+            return {
+                key: entry.allocation
+                for key, entry in self._entries.items()
+                if entry.allocation is not None
+            }
+
+    @contextmanager
+    def _locked_entry(self, key: str) -> Iterator[tuple[_DatabaseEntry, bool]]:
+        """
+        Hold the manager's lock with the entry of `key`, and whether this call
+        opened it.
+
+        The database file is opened without the lock held. Callers of the same
+        file wait for the thread opening it rather than opening it twice.
+        """
+        opened = False
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    yield entry, opened
+                    return
+                opening = self._opening.get(key)
+                if opening is None:
+                    opening = self._opening[key] = threading.Event()
+                    owner = True
+                else:
+                    owner = False
+            if not owner:
+                opening.wait()
+                continue
+            try:
+                logger.info(f"Opening DuckDB database {key}")
+                connection = duckdb.connect(key)
+                with self._lock:
+                    self._entries[key] = _DatabaseEntry(connection=connection)
+                    self._stats.opened += 1
+                opened = True
+            finally:
+                with self._lock:
+                    del self._opening[key]
+                opening.set()
+
+    def _rebalance(self) -> _Rebalance:
+        """
+        Return the governor's current share of every open database whose share
+        changed, to be applied with `_apply` once the lock is released.
+        """
+        self._generation += 1
+        active = sum(1 for entry in self._entries.values() if entry.active_cursors)
+        idle = len(self._entries) - active
+        rebalance = []
+        for key, entry in self._entries.items():
+            allocation = self.governor.allocate(
+                key, active, idle, in_use=entry.active_cursors > 0
+            )
+            if allocation != entry.target:
+                entry.target = allocation
+                rebalance.append((key, entry, allocation, self._generation))
+        return rebalance
+
+    def _apply(self, rebalance: _Rebalance) -> None:
+        """Set the allocations of a rebalance unless a newer one got there first."""
+        for key, entry, allocation, generation in rebalance:
+            with entry.apply_lock:
+                if entry.closed or generation <= entry.generation:
+                    continue
+                try:
+                    self.governor.apply(entry.connection, allocation)
+                    entry.allocation = allocation
+                    entry.generation = generation
+                except Exception as e:
+                    # the next cursor retries it
+                    entry.target = None
+                    logger.warning(
+                        f"Error limiting resources of DuckDB database {key}: {e}"
+                    )
+
+    def _schedule_eviction(self, key: str, entry: _DatabaseEntry) -> None:
+        if entry.timer is not None:
+            entry.timer.cancel()
+        timer = threading.Timer(self.idle_timeout, self._evict_if_idle, args=(key,))
+        timer.daemon = True
+        entry.timer = timer
+        timer.start()
+
+    def _evict_if_idle(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.handlers or entry.active_cursors:
+                return
+            if time.monotonic() - entry.last_used < self.idle_timeout:
+                self._schedule_eviction(key, entry)
+                return
+            self._close(key, entry)
+            rebalance = self._rebalance()
+        self._apply(rebalance)
+
+    def _close(self, key: str, entry: _DatabaseEntry) -> None:
+        if entry.timer is not None:
+            entry.timer.cancel()
+            entry.timer = None
+        self._entries.pop(key, None)
+        with entry.apply_lock:
+            entry.closed = True
+            try:
+                entry.connection.close()
+            except Exception as e:
+                logger.warning(f"Error closing DuckDB database {key}: {e}")
+        self._stats.evicted += 1
+        logger.info(f"Closed DuckDB database {key}")
+
+
+connection_manager = DuckDBConnectionManager()
@@ -265,10 +265,29 @@ def add_summary_statistics(
     df: pl.DataFrame, report: list[CleansedColumnReport]
 ) -> None:
     """Add summary statistics to the report."""
+    columns = [
+        column_report.new_column_name
+        for column_report in report
+        if column_report.new_dtype
+    ]
+    unique_columns = [
+        column_report.new_column_name
+        for column_report in report
+        if column_report.new_dtype == "float64"
+    ]
+    # exact counts for all columns in one select instead of a scan per column
+    counts = (
+        df.select(
+            *(pl.col(col).null_count().alias(f"nulls:{col}") for col in columns),
+            *(pl.col(col).n_unique().alias(f"unique:{col}") for col in unique_columns),
+        ).row(0, named=True)
+        if columns
+        else {}
+    )
     for column_report in report:
         col = column_report.new_column_name
         if column_report.new_dtype:
-            null_count = df[col].is_null().sum()
+            null_count = counts[f"nulls:{col}"]
             total_count = len(df)
             if null_count > 0:
                 column_report.warnings.append(
@@ -276,7 +295,7 @@ def add_summary_statistics(
                 )
 
             if column_report.new_dtype == "float64":
-                unique_count = df[col].n_unique()
+                unique_count = counts[f"unique:{col}"]
                 if unique_count == 1:
                     column_report.warnings.append("Contains only one unique value")
                 elif unique_count == 2:
@@ -0,0 +1,163 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+from enum import Enum
+from typing import AsyncIterator, Iterator
+
+import polars as pl
+import pyarrow as pa
+from pydantic import BaseModel
+
+from utils.schema import AnalystDataset
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+COLUMNAR_JSON_MEDIA_TYPE = "application/vnd.columnar+json"
+JSON_MEDIA_TYPE = "application/json"
+
+# rows per Arrow record batch of a streamed response
+ARROW_BATCH_ROWS = 65_536
+
+# schema metadata key holding the JSON of the response without its dataset
+ARROW_RESPONSE_METADATA_KEY = "response"
+
+
+class ResponseFormat(str, Enum):
+    JSON = JSON_MEDIA_TYPE
+    COLUMNAR_JSON = COLUMNAR_JSON_MEDIA_TYPE
+    ARROW_STREAM = ARROW_STREAM_MEDIA_TYPE
+
+
+def negotiate_format(
+    accept: str | None,
+    available: tuple[ResponseFormat, ...] = tuple(ResponseFormat),
+) -> ResponseFormat | None:
+    """
+    Pick the response format the Accept header prefers.
+
+    Exact media types take precedence over wildcards, the highest quality wins
+    and ties go to the first of `available`, so a missing header or `*/*`
+    keeps plain JSON. Returns None if nothing available is acceptable.
+    """
+    if not accept:
+        return available[0]
+    ranges: dict[str, float] = {}
+    for media_range in accept.split(","):
+        media_type, *params = (part.strip() for part in media_range.split(";"))
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ranges[media_type.lower()] = quality
+
+    best: tuple[float, ResponseFormat] | None = None
+    for response_format in available:
+        media_type = response_format.value
+        quality = ranges.get(
+            media_type,
+            ranges.get(media_type.split("/")[0] + "/*", ranges.get("*/*", 0.0)),
+        )
+        if quality > 0 and (best is None or quality > best[0]):
+            best = (quality, response_format)
+    return best[1] if best else None
+
+
+def columnar_json(dataset: AnalystDataset) -> str:
+    """
+    Encode a dataset as one JSON array per column.
+
+    The arrays are written by Polars, so no Python object is created per cell.
+    """
+    df = dataset.to_df()
+    columns = json.dumps(df.columns, separators=(",", ":"))
+    dtypes = json.dumps([str(dtype) for dtype in df.dtypes], separators=(",", ":"))
+    data = (
+        df.select(pl.all().implode()).write_json()[1:-1] if df.width else "{}"
+    ) or "{}"
+    return (
+        f'{{"name":{json.dumps(dataset.name)},'
+        f'"columns":{columns},"dtypes":{dtypes},'
+        f'"row_count":{df.height},"data":{data}}}'
+    )
+
+
+def columnar_json_response(model: BaseModel) -> str:
+    """Encode a response model whose `dataset` field is sent in columnar form."""
+    dataset: AnalystDataset | None = getattr(model, "dataset")
+    body = model.model_dump_json(exclude={"dataset"})
+    encoded = columnar_json(dataset) if dataset is not None else "null"
+    return f'{body[:-1]}{"," if body != "{}" else ""}"dataset":{encoded}}}'
+
+
+def arrow_stream(model: BaseModel) -> Iterator[bytes]:
+    """
+    Stream the dataset of a response model as Arrow IPC record batches.
+
+    The remaining fields are sent as JSON in the schema metadata, so the
+    stream is self-describing.
+    """
+    dataset: AnalystDataset | None = getattr(model, "dataset")
+    table = dataset.to_df().to_arrow() if dataset is not None else pa.table({})
+    schema = table.schema.with_metadata(
+        {ARROW_RESPONSE_METADATA_KEY: model.model_dump_json(exclude={"dataset"})}
+    )
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for batch in table.to_batches(max_chunksize=ARROW_BATCH_ROWS):
+            writer.write_batch(batch)
+            yield _drain(sink)
+    yield _drain(sink)
+
+
+async def arrow_reader_stream(
+    model: BaseModel, reader: pa.RecordBatchReader
+) -> AsyncIterator[bytes]:
+    """
+    Stream a response model like `arrow_stream`, with the record batches of
+    its dataset read from `reader` as they are sent instead of from `dataset`.
+    """
+    schema = reader.schema.with_metadata(
+        {ARROW_RESPONSE_METADATA_KEY: model.model_dump_json(exclude={"dataset"})}
+    )
+    loop = asyncio.get_running_loop()
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        while (
+            batch := await loop.run_in_executor(None, _read_batch, reader)
+        ) is not None:
+            writer.write_batch(batch)
+            yield _drain(sink)
+    yield _drain(sink)
+
+
+def _read_batch(reader: pa.RecordBatchReader) -> pa.RecordBatch | None:
+    try:
+        return reader.read_next_batch()
+    except StopIteration:
+        return None
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
@@ -0,0 +1,179 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import AsyncGenerator, Callable, Hashable, Iterator
+
+# events kept per channel for clients that reconnect with Last-Event-ID
+EVENT_HISTORY_SIZE = int(os.environ.get("EVENT_HISTORY_SIZE", 256))
+
+# seconds a finished or idle channel stays available for replay
+EVENT_RETENTION_SECONDS = float(os.environ.get("EVENT_RETENTION_SECONDS", 300))
+
+# seconds between keep-alive comments on an idle stream
+EVENT_HEARTBEAT_SECONDS = float(os.environ.get("EVENT_HEARTBEAT_SECONDS", 15))
+
+
+@dataclass(frozen=True)
+class ServerSentEvent:
+    id: int
+    event: str
+    data: str  # JSON
+
+    def encode(self) -> bytes:
+        return f"id: {self.id}\nevent: {self.event}\ndata: {self.data}\n\n".encode()
+
+
+# a comment line, ignored by EventSource but keeping proxies from timing out
+HEARTBEAT = b": keep-alive\n\n"
+
+
+class EventChannel:
+    """
+    An append-only log of events with any number of live subscribers.
+
+    The last `history` events are kept, so a client that reconnects with the
+    id of the last event it saw gets everything it missed. Once closed, a
+    subscriber drains the log and ends.
+    """
+
+    def __init__(self, ids: Callable[[], int], history: int = EVENT_HISTORY_SIZE):
+        self._ids = ids
+        self._events: deque[ServerSentEvent] = deque(maxlen=history)
+        self._changed = asyncio.Event()
+        self.closed = False
+        self.last_active = time.monotonic()
+        self.producers = 0
+        self.subscribers = 0
+
+    @property
+    def last_event_id(self) -> int:
+        return self._events[-1].id if self._events else 0
+
+    def publish(self, event: str, data: str) -> ServerSentEvent:
+        message = ServerSentEvent(id=self._ids(), event=event, data=data)
+        self._events.append(message)
+        self._notify()
+        return message
+
+    def close(self) -> None:
+        self.closed = True
+        self._notify()
+
+    async def subscribe(
+        self, last_event_id: int = 0, heartbeat: float = EVENT_HEARTBEAT_SECONDS
+    ) -> AsyncGenerator[ServerSentEvent | None, None]:
+        """
+        Yield the events after `last_event_id`, then new ones as they arrive.
+
+        Yields None whenever `heartbeat` seconds pass without an event.
+        """
+        self.subscribers += 1
+        try:
+            while True:
+                # take the waiter before reading the log, so no publish is missed
+                changed = self._changed
+                for message in list(self._events):
+                    if message.id > last_event_id:
+                        last_event_id = message.id
+                        yield message
+                if self.closed:
+                    return
+                try:
+                    await asyncio.wait_for(changed.wait(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            self.subscribers -= 1
+            self.last_active = time.monotonic()
+
+    def _notify(self) -> None:
+        self.last_active = time.monotonic()
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+class EventBroker:
+    """
+    Event channels keyed by topic.
+
+    Event ids are unique across all channels and start from the wall clock in
+    milliseconds, so ids issued after a restart are still newer than the ones
+    a reconnecting client holds. A channel nobody publishes to or listens
+    on is dropped `retention` seconds after its last activity, so finished
+    streams can still be replayed for a while.
+    """
+
+    def __init__(
+        self,
+        history: int = EVENT_HISTORY_SIZE,
+        retention: float = EVENT_RETENTION_SECONDS,
+    ):
+        self.history = history
+        self.retention = retention
+        self._channels: dict[Hashable, EventChannel] = {}
+        self._ids = itertools.count(time.time_ns() // 1_000_000)
+
+    def open(self, key: Hashable) -> EventChannel:
+        """Return the open channel for `key`, replacing a closed one."""
+        self._prune()
+        channel = self._channels.get(key)
+        if channel is None or channel.closed:
+            channel = EventChannel(lambda: next(self._ids), self.history)
+            self._channels[key] = channel
+        return channel
+
+    @contextmanager
+    def publisher(self, key: Hashable, close: bool = True) -> Iterator[EventChannel]:
+        """
+        Hold the channel for `key` open while publishing to it.
+
+        With `close` the channel is closed on exit, ending its subscriptions
+        once they have drained it.
+        """
+        channel = self.open(key)
+        channel.producers += 1
+        try:
+            yield channel
+        finally:
+            channel.producers -= 1
+            if close:
+                channel.close()
+            else:
+                channel.last_active = time.monotonic()
+
+    def get(self, key: Hashable) -> EventChannel | None:
+        self._prune()
+        return self._channels.get(key)
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - self.retention
+        for key, channel in list(self._channels.items()):
+            if (
+                not channel.producers
+                and not channel.subscribers
+                and channel.last_active < cutoff
+            ):
+                del self._channels[key]
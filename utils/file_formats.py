@@ -0,0 +1,59 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import IO
+
+import polars as pl
+
+# CSV files, optionally compressed; DuckDB and Polars decompress them on read
+CSV_EXTENSIONS = (".csv", ".csv.gz", ".csv.zst")
+
+# columnar files read straight into Arrow memory
+COLUMNAR_EXTENSIONS = (".parquet", ".arrow", ".feather")
+
+EXCEL_EXTENSIONS = (".xlsx", ".xls")
+
+UPLOAD_EXTENSIONS = CSV_EXTENSIONS + COLUMNAR_EXTENSIONS + EXCEL_EXTENSIONS
+
+
+def split_extension(filename: str) -> tuple[str, str]:
+    """
+    Split a file name into its dataset name and lower-cased extension.
+
+    Compressed CSV files keep both suffixes, so "sales.csv.gz" gives
+    ("sales", ".csv.gz").
+    """
+    lowered = filename.lower()
+    for extension in UPLOAD_EXTENSIONS:
+        if lowered.endswith(extension):
+            return filename[: -len(extension)], extension
+    stem, dot, suffix = filename.rpartition(".")
+    return (stem, f".{suffix.lower()}") if dot else (filename, "")
+
+
+def read_columnar(source: str | Path | IO[bytes], extension: str) -> pl.DataFrame:
+    """
+    Read a Parquet or Arrow IPC (Feather v2) file into a DataFrame.
+
+    Both formats decode into Arrow buffers without building Python rows, and
+    IPC files on disk are memory-mapped rather than copied.
+    """
+    if extension == ".parquet":
+        return pl.read_parquet(source)
+    if extension in (".arrow", ".feather"):
+        return pl.read_ipc(source, memory_map=isinstance(source, (str, Path)))
+    raise ValueError(f"Unsupported columnar file type: {extension}")
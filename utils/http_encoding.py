@@ -0,0 +1,236 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import hashlib
+import os
+import zlib
+from typing import Protocol
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# responses smaller than this many bytes are sent uncompressed
+COMPRESSION_MINIMUM_SIZE = int(os.environ.get("COMPRESSION_MINIMUM_SIZE", 1024))
+
+# brotli quality 4 compresses about as well as gzip -6 at a fraction of the cost
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", 4))
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", 6))
+
+# content encodings in order of preference
+CONTENT_ENCODINGS = ("br", "gzip")
+
+# media types that are already compressed or must reach the client unbuffered
+_UNCOMPRESSED_MEDIA_TYPES = (
+    "text/event-stream",
+    "image/",
+    "application/zip",
+    "application/gzip",
+    "application/vnd.openxmlformats",
+)
+
+
+def choose_encoding(accept_encoding: str | None) -> str | None:
+    """Pick the content encoding the Accept-Encoding header prefers, if any."""
+    if not accept_encoding:
+        return None
+    qualities: dict[str, float] = {}
+    for coding in accept_encoding.split(","):
+        name, *params = (part.strip() for part in coding.split(";"))
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.lower()] = quality
+
+    best: tuple[float, str] | None = None
+    for encoding in CONTENT_ENCODINGS:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > 0 and (best is None or quality > best[0]):
+            best = (quality, encoding)
+    return best[1] if best else None
+
+
+def make_etag(*parts: object) -> str:
+    """Return a strong ETag identifying the representation described by `parts`."""
+    digest = hashlib.sha256("\0".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Whether an If-None-Match header names `etag`.
+
+    Uses the weak comparison of RFC 9110, and ignores the suffix the
+    compression middleware appends, so a client holding the compressed
+    representation still gets a 304.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip().removeprefix("W/")
+        for encoding in CONTENT_ENCODINGS:
+            candidate = candidate.replace(f'-{encoding}"', '"')
+        if candidate == opaque:
+            return True
+    return False
+
+
+class _Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+    def finish(self) -> bytes: ...
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        result: bytes = self._compressor.process(data)
+        return result
+
+    def flush(self) -> bytes:
+        result: bytes = self._compressor.flush()
+        return result
+
+    def finish(self) -> bytes:
+        result: bytes = self._compressor.finish()
+        return result
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with brotli or gzip, whichever the client prefers.
+
+    Unlike Starlette's GZipMiddleware this also speaks brotli and keeps strong
+    ETags strong: the ETag of a compressed response gets the encoding
+    appended, as each encoding is a representation of its own. Streamed
+    responses are compressed chunk by chunk and flushed after each chunk, so
+    Arrow record batches still reach the client as they are produced.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MINIMUM_SIZE,
+        brotli_quality: int = BROTLI_QUALITY,
+        gzip_level: int = GZIP_LEVEL,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.brotli_quality = brotli_quality
+        self.gzip_level = gzip_level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = None
+        if scope["type"] == "http":
+            encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        compressor: _Compressor | None = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compressor, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                media_type = headers.get("content-type", "")
+                passthrough = (
+                    "content-encoding" in headers
+                    or message["status"] < 200
+                    or message["status"] in (204, 304)
+                    or media_type.startswith(_UNCOMPRESSED_MEDIA_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body: bytes = message.get("body", b"")
+            more_body: bool = message.get("more_body", False)
+            if start is not None:
+                response_start, start = start, None
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(response_start)
+                    await send(message)
+                    return
+                compressor = self._compressor(encoding)
+                headers = MutableHeaders(raw=response_start["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag is not None and not etag.startswith("W/"):
+                    headers["ETag"] = f'{etag[:-1]}-{encoding}"'
+                if more_body:
+                    del headers["content-length"]
+                else:
+                    body = compressor.compress(body) + compressor.finish()
+                    headers["Content-Length"] = str(len(body))
+                    await send(response_start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(response_start)
+
+            assert compressor is not None
+            if more_body:
+                body = compressor.compress(body) + compressor.flush()
+            else:
+                body = compressor.compress(body) + compressor.finish()
+            await send(
+                {"type": "http.response.body", "body": body, "more_body": more_body}
+            )
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compressor(self, encoding: str) -> _Compressor:
+        if encoding == "br":
+            return _BrotliCompressor(self.brotli_quality)
+        return _GzipCompressor(self.gzip_level)
@@ -0,0 +1,328 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import os
+import uuid
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from enum import Enum, IntEnum
+from typing import Any, Awaitable, Callable
+
+from utils.logging_helper import get_logger
+
+logger = get_logger("JobScheduler")
+
+# jobs running at once across all users
+JOB_MAX_CONCURRENT = int(os.environ.get("JOB_MAX_CONCURRENT", 4))
+
+# jobs running at once for one user
+JOB_MAX_PER_USER = int(os.environ.get("JOB_MAX_PER_USER", 2))
+
+# running slots bulk jobs may not take, so interactive jobs never wait on them
+JOB_INTERACTIVE_RESERVED = int(os.environ.get("JOB_INTERACTIVE_RESERVED", 1))
+
+# queued jobs beyond which new work is refused
+JOB_MAX_QUEUED = int(os.environ.get("JOB_MAX_QUEUED", 200))
+
+# finished jobs kept for status lookups
+JOB_HISTORY_SIZE = int(os.environ.get("JOB_HISTORY_SIZE", 1000))
+
+
+class JobPriority(IntEnum):
+    INTERACTIVE = 0  # chat analysis, a user is waiting for it
+    BULK = 1  # cleansing and data dictionary generation
+
+
+class JobState(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+@dataclass(eq=False)
+class Job:
+    id: str
+    user_id: str
+    kind: str
+    priority: JobPriority
+    state: JobState = JobState.QUEUED
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    error: str | None = None
+    key: tuple[str, ...] | None = None  # what the job works on
+    _sequence: int = field(default=0, repr=False)  # submission order
+    _factory: Callable[[], Awaitable[Any]] | None = field(default=None, repr=False)
+    _task: asyncio.Task[Any] | None = field(default=None, repr=False)
+    _stopped: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.state not in (JobState.QUEUED, JobState.RUNNING)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "priority": self.priority.name.lower(),
+            "state": self.state.value,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+@dataclass
+class JobSchedulerStats:
+    queued_interactive: int = 0
+    queued_bulk: int = 0
+    running: int = 0
+    max_concurrent: int = 0
+    max_per_user: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    cancelled: int = 0
+    rejected: int = 0  # submissions refused because the queue was full
+
+
+class JobScheduler:
+    """
+    An in-process queue of background jobs with concurrency limits.
+
+    At most `max_concurrent` jobs run at once, and at most `max_per_user` of
+    them for any one user, so a large ingest cannot starve other users.
+    Queued jobs start in priority order, then in submission order, and bulk
+    jobs leave `interactive_reserved` slots free, so a chat analysis starts
+    right away even while ingests fill the rest. Callers check `admit()`
+    before doing any work, which refuses new jobs once `max_queued` are
+    waiting.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = JOB_MAX_CONCURRENT,
+        max_per_user: int = JOB_MAX_PER_USER,
+        interactive_reserved: int = JOB_INTERACTIVE_RESERVED,
+        max_queued: int = JOB_MAX_QUEUED,
+        history: int = JOB_HISTORY_SIZE,
+    ):
+        if max_concurrent < 1 or max_per_user < 1:
+            raise ValueError("max_concurrent and max_per_user must be at least 1")
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.interactive_reserved = min(interactive_reserved, max_concurrent - 1)
+        self.max_queued = max_queued
+        self.history = history
+        self._queue: list[tuple[int, int, Job]] = []
+        self._sequence = itertools.count()
+        self._running: dict[str, Job] = {}
+        self._running_per_user: Counter[str] = Counter()
+        self._queued: dict[str, Job] = {}
+        self._finished: OrderedDict[str, Job] = OrderedDict()
+        self._stats = JobSchedulerStats()
+
+    def admit(self) -> bool:
+        """Whether there is room for another job; counts a refusal if not."""
+        if len(self._queue) < self.max_queued:
+            return True
+        self._stats.rejected += 1
+        return False
+
+    def submit(
+        self,
+        user_id: str,
+        kind: str,
+        priority: JobPriority,
+        factory: Callable[[], Awaitable[Any]],
+        key: tuple[str, ...] | None = None,
+    ) -> Job:
+        """
+        Queue `factory()` to run as a job of `user_id` and return the job.
+
+        `key` names what the job works on, so it can be found and cancelled
+        when that goes away.
+        """
+        job = Job(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            kind=kind,
+            priority=priority,
+            key=key,
+            _sequence=next(self._sequence),
+            _factory=factory,
+        )
+        self._queued[job.id] = job
+        heapq.heappush(self._queue, (priority, job._sequence, job))
+        self._dispatch()
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return (
+            self._queued.get(job_id)
+            or self._running.get(job_id)
+            or self._finished.get(job_id)
+        )
+
+    def jobs(self, user_id: str) -> list[Job]:
+        """Return the queued, running and recently finished jobs of a user."""
+        jobs = itertools.chain(
+            self._queued.values(), self._running.values(), self._finished.values()
+        )
+        return sorted(
+            (job for job in jobs if job.user_id == user_id),
+            key=lambda job: job._sequence,
+        )
+
+    def find(self, user_id: str, *key: str) -> list[Job]:
+        """
+        Return the queued and running jobs of a user whose key starts with
+        `key`, or all of them if no key is given.
+        """
+        jobs = itertools.chain(self._queued.values(), self._running.values())
+        return sorted(
+            (
+                job
+                for job in jobs
+                if job.user_id == user_id
+                and (not key or (job.key is not None and job.key[: len(key)] == key))
+            ),
+            key=lambda job: job._sequence,
+        )
+
+    async def wait(self, user_id: str, *key: str) -> None:
+        """Wait until `find` returns no jobs, including ones submitted meanwhile."""
+        while active := self.find(user_id, *key):
+            await active[0]._stopped.wait()
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; returns False if it already finished."""
+        job = self.get(job_id)
+        if job is None or job.done:
+            return False
+        if job._task is not None:
+            job._task.cancel()
+        else:
+            self._queue = [entry for entry in self._queue if entry[2] is not job]
+            heapq.heapify(self._queue)
+            self._finish(job, JobState.CANCELLED)
+        return True
+
+    async def stop(self, job_id: str) -> bool:
+        """Cancel a job like `cancel`, then wait until it has stopped running."""
+        job = self.get(job_id)
+        task = job._task if job is not None else None
+        if not self.cancel(job_id):
+            return False
+        if task is not None:
+            await asyncio.wait([task])
+        return True
+
+    async def shutdown(self) -> None:
+        """Cancel every queued and running job and wait for them to stop."""
+        for job in list(self._queued.values()):
+            self._finish(job, JobState.CANCELLED)
+        self._queue.clear()
+        tasks = [job._task for job in self._running.values() if job._task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> JobSchedulerStats:
+        """Return a snapshot of the queue depths and job counters."""
+        queued = Counter(priority for priority, _, _ in self._queue)
+        return JobSchedulerStats(
+            queued_interactive=queued[JobPriority.INTERACTIVE],
+            queued_bulk=queued[JobPriority.BULK],
+            running=len(self._running),
+            max_concurrent=self.max_concurrent,
+            max_per_user=self.max_per_user,
+            succeeded=self._stats.succeeded,
+            failed=self._stats.failed,
+            cancelled=self._stats.cancelled,
+            rejected=self._stats.rejected,
+        )
+
+    def _dispatch(self) -> None:
+        """Start queued jobs, in order, while their limits allow."""
+        skipped = []
+        while self._queue and len(self._running) < self.max_concurrent:
+            entry = heapq.heappop(self._queue)
+            job = entry[2]
+            bulk_limit = self.max_concurrent - self.interactive_reserved
+            if self._running_per_user[job.user_id] >= self.max_per_user or (
+                job.priority == JobPriority.BULK and len(self._running) >= bulk_limit
+            ):
+                skipped.append(entry)
+                continue
+            self._start(job)
+        for entry in skipped:
+            heapq.heappush(self._queue, entry)
+
+    def _start(self, job: Job) -> None:
+        assert job._factory is not None
+        factory, job._factory = job._factory, None
+        del self._queued[job.id]
+        job.state = JobState.RUNNING
+        job.started_at = datetime.now(timezone.utc)
+        self._running[job.id] = job
+        self._running_per_user[job.user_id] += 1
+
+        async def run() -> None:
+            await factory()
+
+        job._task = asyncio.create_task(run())
+        job._task.add_done_callback(lambda task: self._complete(job, task))
+
+    def _complete(self, job: Job, task: asyncio.Task[Any]) -> None:
+        del self._running[job.id]
+        self._running_per_user[job.user_id] -= 1
+        if not self._running_per_user[job.user_id]:
+            del self._running_per_user[job.user_id]
+        if task.cancelled():
+            self._finish(job, JobState.CANCELLED)
+        elif (exception := task.exception()) is not None:
+            logger.error(
+                f"{job.kind} job {job.id} failed",
+                exc_info=(type(exception), exception, exception.__traceback__),
+            )
+            job.error = str(exception)
+            self._finish(job, JobState.FAILED)
+        else:
+            self._finish(job, JobState.SUCCEEDED)
+        job._task = None
+        self._dispatch()
+
+    def _finish(self, job: Job, state: JobState) -> None:
+        self._queued.pop(job.id, None)
+        job.state = state
+        job.finished_at = datetime.now(timezone.utc)
+        if state == JobState.SUCCEEDED:
+            self._stats.succeeded += 1
+        elif state == JobState.FAILED:
+            self._stats.failed += 1
+        else:
+            self._stats.cancelled += 1
+        self._finished[job.id] = job
+        job._stopped.set()
+        while len(self._finished) > self.history:
+            self._finished.popitem(last=False)
@@ -12,11 +12,28 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import contextvars
+import hashlib
 import json
 import logging
 import os
+import shutil
+import tempfile
 import time
-from typing import Callable, List, Optional, ParamSpec, TypeVar
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    ParamSpec,
+    Protocol,
+    TypeVar,
+)
 
 import datarobot as dr
 
@@ -27,6 +44,15 @@ ReturnType = TypeVar("ReturnType")
 
 logger = logging.getLogger(__name__)
 
+# files are split into chunks of this size, only chunks whose content changed are uploaded
+PERSISTENT_STORAGE_CHUNK_SIZE = int(
+    os.environ.get("PERSISTENT_STORAGE_CHUNK_SIZE", 4 * 1024 * 1024)
+)
+# number of chunks transferred concurrently
+PERSISTENT_STORAGE_WORKERS = int(os.environ.get("PERSISTENT_STORAGE_WORKERS", 8))
+
+MANIFEST_FORMAT = "chunked-v1"
+
 
 def _use_owner_creds(func: Callable[Param, ReturnType]) -> Callable[Param, ReturnType]:
     def wrapper(*args: Param.args, **kwargs: Param.kwargs) -> ReturnType:
@@ -39,12 +65,193 @@ def _use_owner_creds(func: Callable[Param, ReturnType]) -> Callable[Param, Retur
     return wrapper
 
 
+class FileStore(Protocol):
+    """Blob storage the chunks of a persisted file are written to."""
+
+    def upload(self, local_path: str) -> str:
+        """Store the file and return its id."""
+        ...
+
+    def download(self, file_id: str, local_path: str) -> None: ...
+
+    def delete(self, file_id: str) -> None: ...
+
+
+class DataRobotFileStore:
+    """Stores chunks as files in the DataRobot files API."""
+
+    def upload(self, local_path: str) -> str:
+        return str(File.from_file(local_path)["catalogId"])
+
+    def download(self, file_id: str, local_path: str) -> None:
+        File.file(file_id, local_path)
+
+    def delete(self, file_id: str) -> None:
+        File.delete(file_id)
+
+
+class LocalDirectoryFileStore:
+    """Stores chunks in a local directory, a stand-in for the files API."""
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def upload(self, local_path: str) -> str:
+        file_id = uuid.uuid4().hex
+        shutil.copyfile(local_path, self.directory / file_id)
+        return file_id
+
+    def download(self, file_id: str, local_path: str) -> None:
+        shutil.copyfile(self.directory / file_id, local_path)
+
+    def delete(self, file_id: str) -> None:
+        (self.directory / file_id).unlink(missing_ok=True)
+
+
+@dataclass
+class ChunkManifest:
+    """Ordered list of content hashes making up a file, with the stored chunk ids."""
+
+    size: int
+    chunk_size: int
+    chunks: list[str]
+    chunk_ids: dict[str, str]
+    timestamp: int = field(default_factory=time.time_ns)
+
+    def file_ids(self) -> set[str]:
+        return set(self.chunk_ids.values())
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "format": MANIFEST_FORMAT,
+            "size": self.size,
+            "chunkSize": self.chunk_size,
+            "chunks": [[digest, self.chunk_ids[digest]] for digest in self.chunks],
+            "timestamp": self.timestamp,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> Optional["ChunkManifest"]:
+        if data.get("format") != MANIFEST_FORMAT:
+            return None
+        return cls(
+            size=data["size"],
+            chunk_size=data["chunkSize"],
+            chunks=[digest for digest, _ in data["chunks"]],
+            chunk_ids={digest: file_id for digest, file_id in data["chunks"]},
+            timestamp=data["timestamp"],
+        )
+
+
+def _run_parallel(
+    func: Callable[..., ReturnType], calls: Iterable[tuple[Any, ...]], workers: int
+) -> list[ReturnType]:
+    """Run `func` over `calls` in a thread pool, keeping the caller's DataRobot client."""
+    calls = list(calls)
+    if not calls:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(calls)))) as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, func, *args) for args in calls
+        ]
+        return [future.result() for future in futures]
+
+
+class ChunkedFileSync:
+    """
+    Content-addressed, chunked transfer of a local file to a `FileStore`.
+
+    The file is split into fixed-size chunks keyed by their SHA-256, so after a
+    small change only the chunks that differ from the previous manifest are
+    uploaded. Downloads fetch all chunks in parallel and rebuild the file.
+    """
+
+    def __init__(
+        self,
+        store: FileStore,
+        chunk_size: int = PERSISTENT_STORAGE_CHUNK_SIZE,
+        workers: int = PERSISTENT_STORAGE_WORKERS,
+    ) -> None:
+        self.store = store
+        self.chunk_size = chunk_size
+        self.workers = workers
+
+    def upload(
+        self, local_path: str, previous: ChunkManifest | None = None
+    ) -> tuple[ChunkManifest, set[str]]:
+        """
+        Upload the chunks of `local_path` that `previous` does not already hold.
+
+        Returns:
+            The new manifest and the ids of the chunks uploaded by this call
+        """
+        known = dict(previous.chunk_ids) if previous else {}
+        if previous and previous.chunk_size != self.chunk_size:
+            known = {}
+        chunks: list[str] = []
+        size = 0
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pending: dict[str, str] = {}
+            with open(local_path, "rb") as source:
+                while data := source.read(self.chunk_size):
+                    size += len(data)
+                    digest = hashlib.sha256(data).hexdigest()
+                    chunks.append(digest)
+                    if digest in known or digest in pending:
+                        continue
+                    chunk_path = os.path.join(tmp_dir, digest)
+                    with open(chunk_path, "wb") as chunk_file:
+                        chunk_file.write(data)
+                    pending[digest] = chunk_path
+            uploaded_ids = _run_parallel(
+                self.store.upload, [(path,) for path in pending.values()], self.workers
+            )
+        uploaded = dict(zip(pending, uploaded_ids))
+        logger.info(
+            f"Uploaded {len(uploaded)} of {len(chunks)} chunks for {local_path}"
+        )
+        chunk_ids = {digest: uploaded.get(digest) or known[digest] for digest in chunks}
+        manifest = ChunkManifest(
+            size=size,
+            chunk_size=self.chunk_size,
+            chunks=chunks,
+            chunk_ids=chunk_ids,
+        )
+        return manifest, set(uploaded.values())
+
+    def download(self, manifest: ChunkManifest, local_path: str) -> None:
+        """Fetch all chunks of `manifest` in parallel and rebuild the file."""
+        target = Path(local_path)
+        with tempfile.TemporaryDirectory(dir=target.parent) as tmp_dir:
+            digests = list(dict.fromkeys(manifest.chunks))
+            _run_parallel(
+                self.store.download,
+                [
+                    (manifest.chunk_ids[digest], os.path.join(tmp_dir, digest))
+                    for digest in digests
+                ],
+                self.workers,
+            )
+            partial_path = os.path.join(tmp_dir, target.name)
+            with open(partial_path, "wb") as output:
+                for digest in manifest.chunks:
+                    with open(os.path.join(tmp_dir, digest), "rb") as chunk_file:
+                        shutil.copyfileobj(chunk_file, output)
+            os.replace(partial_path, target)
+
+    def delete(self, file_ids: Iterable[str]) -> None:
+        """Remove chunks from the store."""
+        _run_parallel(self.store.delete, [(i,) for i in file_ids], self.workers)
+
+
 class PersistentStorage:
-    def __init__(self, user_id: Optional[str]):
+    def __init__(self, user_id: Optional[str], store: FileStore | None = None):
         self.app_id: str = os.environ.get("APPLICATION_ID")  # type: ignore[assignment]
         if not self.app_id:
             raise ValueError("APPLICATION_ID env variable is not set.")
         self.name_prefix = f"{user_id}_"
+        self.sync = ChunkedFileSync(store or DataRobotFileStore())
 
     @_use_owner_creds
     def files(self) -> List[str]:
@@ -59,6 +266,14 @@ class PersistentStorage:
             and v.name.startswith(self.name_prefix)
         ]
 
+    @staticmethod
+    def _stored_file_ids(data: dict[str, Any]) -> set[str]:
+        """Ids of everything a storage link references, chunked or not."""
+        manifest = ChunkManifest.from_dict(data)
+        if manifest:
+            return manifest.file_ids()
+        return {data["catalogId"]} if data.get("catalogId") else set()
+
     @_use_owner_creds
     def fetch_from_storage(self, file_name: str, local_path: str) -> None:
         logger.info(f"Fetching file {file_name} from storage")
@@ -70,21 +285,25 @@ class PersistentStorage:
         if not storage_link:
             return
         data = json.loads(storage_link.value)
-        File.file(data["catalogId"], local_path)
+        manifest = ChunkManifest.from_dict(data)
+        if manifest:
+            self.sync.download(manifest, local_path)
+        else:
+            # files stored before chunked uploads were introduced
+            File.file(data["catalogId"], local_path)
 
     @_use_owner_creds
     def save_to_storage(self, file_name: str, local_path: str) -> None:
         logger.info(f"Storing file {file_name} to persistent storage")
         storing_label = f"{self.name_prefix}{file_name}"
-        timestamp = time.time_ns()
-
-        catalog_info = File.from_file(local_path)
-        file_data = {**catalog_info, "timestamp": timestamp}
 
         storage_link = KeyValue.find(
             self.app_id, KeyValueEntityType.CUSTOM_APPLICATION, storing_label
         )
         data = json.loads(storage_link.value) if storage_link else {}
+        manifest, uploaded = self.sync.upload(
+            local_path, ChunkManifest.from_dict(data) if data else None
+        )
         if not data:
             # there is no previous version of this file
             KeyValue.create(
@@ -93,17 +312,18 @@ class PersistentStorage:
                 name=storing_label,
                 category=dr.KeyValueCategory.ARTIFACT,
                 value_type=dr.KeyValueType.JSON,
-                value=json.dumps(file_data),
+                value=json.dumps(manifest.to_dict()),
             )
             return
 
-        if timestamp > data["timestamp"]:
-            # uploaded file is newer version and storage link needs to be updated and old file to be removed
-            storage_link.update(value=json.dumps(file_data))  # type: ignore[union-attr]
-            File.delete(data["catalogId"])
+        if manifest.timestamp > data["timestamp"]:
+            # uploaded file is newer version: update the storage link and remove
+            # the chunks only the old version referenced
+            storage_link.update(value=json.dumps(manifest.to_dict()))  # type: ignore[union-attr]
+            self.sync.delete(self._stored_file_ids(data) - manifest.file_ids())
         else:
-            # there is a newer file in storage and we drop just uploaded one
-            File.delete(catalog_info["catalogId"])
+            # there is a newer file in storage and we drop the chunks just uploaded
+            self.sync.delete(uploaded)
 
     @_use_owner_creds
     def delete_file(self, file_name: str) -> None:
@@ -115,5 +335,5 @@ class PersistentStorage:
         if not storage_link:
             return
         data = json.loads(storage_link.value)
-        File.delete(data["catalogId"])
+        self.sync.delete(self._stored_file_ids(data))
         storage_link.delete()
@@ -21,22 +21,34 @@ import os
 import sys
 import tempfile
 import uuid
-from contextlib import contextmanager
+import weakref
+from contextlib import asynccontextmanager, contextmanager
 from copy import deepcopy
+from dataclasses import asdict
 from pathlib import Path
-from typing import Any, Generator, List, Union, cast
+from typing import (
+    Any,
+    AsyncGenerator,
+    Generator,
+    Hashable,
+    List,
+    TypeVar,
+    Union,
+    cast,
+)
 
 import datarobot as dr
+import fastexcel
 import pandas as pd
 import polars as pl
 import polars.dataframe.frame
 from fastapi import (
     APIRouter,
-    BackgroundTasks,
     Depends,
     FastAPI,
     Form,
     HTTPException,
+    Query,
     Request,
     Response,
     UploadFile,
@@ -51,18 +63,51 @@ from openai.types.chat.chat_completion_user_message_param import (
 from openpyxl import Workbook
 from openpyxl.drawing.image import Image as XLImage
 from openpyxl.utils.dataframe import dataframe_to_rows
-
-from utils.analyst_db import AnalystDB, DatasetMetadata, DataSourceType
+from pydantic import BaseModel
+
+from utils.account_info import AccountInfoCache
+from utils.analyst_db import (
+    SHARED_DATABASE,
+    AnalystDB,
+    DatasetMetadata,
+    DataSourceType,
+    flush_persistent_storage,
+    get_component_type,
+)
+from utils.connection_manager import connection_manager
 from utils.database_helpers import get_external_database
+from utils.dataset_encoding import (
+    ARROW_BATCH_ROWS,
+    ARROW_STREAM_MEDIA_TYPE,
+    COLUMNAR_JSON_MEDIA_TYPE,
+    ResponseFormat,
+    arrow_reader_stream,
+    arrow_stream,
+    columnar_json_response,
+    negotiate_format,
+)
+from utils.event_stream import HEARTBEAT, EventBroker, EventChannel
+from utils.file_formats import (
+    COLUMNAR_EXTENSIONS,
+    CSV_EXTENSIONS,
+    UPLOAD_EXTENSIONS,
+    read_columnar,
+    split_extension,
+)
+from utils.http_encoding import CompressionMiddleware, etag_matches, make_etag
+from utils.job_scheduler import Job, JobPriority, JobScheduler
 from utils.logging_helper import get_logger
+from utils.session_store import SessionStore, SingleFlight
 
 sys.path.append(os.path.dirname(os.path.realpath(__file__)))
 
 from utils.api import (
+    ANALYSIS_CANCELLED_MESSAGE,
     AnalysisGenerationError,
     download_registry_datasets,
     list_registry_datasets,
     log_memory,
+    mark_analysis_cancelled,
     process_data_and_update_state,
     run_complete_analysis,
 )
@@ -74,20 +119,27 @@ from utils.schema import (
     ChatRequest,
     ChatResponse,
     ChatUpdate,
+    CleaningReport,
+    Component,
     DataDictionary,
     DataDictionaryResponse,
     DataRegistryDataset,
     DatasetCleansedResponse,
     DictionaryCellUpdate,
+    EnhancedQuestionGeneration,
     FileUploadResponse,
     GetBusinessAnalysisResult,
     LoadDatabaseRequest,
     RunAnalysisResult,
     RunChartsResult,
+    RunDatabaseAnalysisResult,
 )
 
 logger = get_logger()
 
+# bytes copied per read when spooling an upload to disk
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 
 async def get_database(user_id: str) -> AnalystDB:
     analyst_db = await AnalystDB.create(
@@ -95,7 +147,9 @@ async def get_database(user_id: str) -> AnalystDB:
         db_path=Path("/tmp"),
         dataset_db_name="datasets.db",
         chat_db_name="chat.db",
-        use_persistent_storage=bool(os.environ.get("APPLICATION_ID")),
+        # a shared database is one file for all users and is not uploaded
+        use_persistent_storage=bool(os.environ.get("APPLICATION_ID"))
+        and not SHARED_DATABASE,
     )
     return analyst_db
 
@@ -160,6 +214,9 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Compress responses with brotli or gzip
+app.add_middleware(CompressionMiddleware)
+
 
 # Add custom OpenAPI schema
 def custom_openapi() -> dict[str, Any]:
@@ -185,6 +242,17 @@ def custom_openapi() -> dict[str, Any]:
 app.openapi = custom_openapi  # type: ignore[method-assign]
 
 
+@app.on_event("shutdown")
+async def close_database_connections() -> None:
+    """Save pending writes and close every DuckDB database kept open."""
+    # stop the scheduled jobs before their databases are closed
+    await jobs.shutdown()
+    # let sessions already evicted finish closing their databases
+    await session_store.drain()
+    flush_persistent_storage()
+    connection_manager.close_all()
+
+
 class SessionState(object):
     _state: dict[str, Any]
 
@@ -210,8 +278,60 @@ class SessionState(object):
         self._state.update(state)
 
 
-session_store: dict[str, SessionState] = {}
-session_lock = asyncio.Lock()
+async def _close_session(session: SessionState) -> None:
+    """
+    Flush and close the databases of an evicted session.
+
+    Jobs of the user may still be using them, in which case they are closed in
+    the background once the jobs have finished.
+    """
+    analyst_db = session._state.get("analyst_db")
+    if analyst_db is None:
+        return
+    if not jobs.find(analyst_db.user_id):
+        await analyst_db.close()
+        return
+
+    async def close_when_idle() -> None:
+        await jobs.wait(analyst_db.user_id)
+        await analyst_db.close()
+
+    task = asyncio.create_task(close_when_idle())
+    deferred_closes.add(task)
+    task.add_done_callback(deferred_closes.discard)
+
+
+session_store: SessionStore[SessionState] = SessionStore(on_evict=_close_session)
+# closes of evicted sessions waiting for the user's jobs to finish
+deferred_closes: set[asyncio.Task[None]] = set()
+account_info_cache = AccountInfoCache()
+
+# concurrent cold starts of the same user share one database initialization
+database_initializations: SingleFlight[AnalystDB] = SingleFlight()
+
+# progress of analyses and dataset processing, streamed to the UI as it happens
+events = EventBroker()
+
+# chat analyses, cleansing and dictionary generation run as scheduled jobs
+jobs = JobScheduler()
+
+
+def _admit_job() -> None:
+    """Refuse a request that would start a job while the job queue is full."""
+    if not jobs.admit():
+        raise HTTPException(
+            status_code=503,
+            detail="Too many queued jobs, please retry shortly",
+            headers={"Retry-After": "10"},
+        )
+
+
+def _analysis_events_key(user_id: str, chat_id: str, message_id: str) -> Hashable:
+    return ("analysis", user_id, chat_id, message_id)
+
+
+def _processing_events_key(user_id: str) -> Hashable:
+    return ("processing", user_id)
 
 
 @contextmanager
@@ -243,44 +363,47 @@ def use_user_token(request: Request) -> Generator[None, None, None]:
 @app.middleware("http")
 async def add_session_middleware(request: Request, call_next):  # type: ignore[no-untyped-def]
     request_methods = ["GET", "POST", "PUT", "PATCH", "DELETE"]
-    if request.method in request_methods:
-        # Initialize the session
-        session_state, session_id, user_id = await _initialize_session(request)
-        request.state.session = session_state
-
-        auth_header = request.headers.get("Authorization")
-        if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header.replace("Bearer ", "")
-            if request.state.session.datarobot_api_skoped_token != token:
-                request.state.session.datarobot_api_skoped_token = token
-
-        account_info = {}
-        if not request.state.session.datarobot_account_info:
-            try:
-                if (
-                    request.state.session.datarobot_api_token
-                    or request.state.session.datarobot_api_skoped_token
-                ):
-                    with use_user_token(request):
-                        reply = dr.client.get_client().get("account/info/")
-                        account_info = reply.json()
-            except Exception as e:
-                logger.info(f"Error fetching account info: {e}")
-        else:
-            account_info = request.state.session.datarobot_account_info
+    leased: SessionState | None = None
+    try:
+        if request.method in request_methods:
+            # Initialize the session
+            session_state, session_id, user_id = await _initialize_session(request)
+            # a stored session is leased until the response has been sent
+            leased = session_state if session_id else None
+            request.state.session = session_state
+
+            auth_header = request.headers.get("Authorization")
+            if auth_header and auth_header.startswith("Bearer "):
+                token = auth_header.replace("Bearer ", "")
+                if request.state.session.datarobot_api_skoped_token != token:
+                    request.state.session.datarobot_api_skoped_token = token
+
+            account_info = request.state.session.datarobot_account_info or {}
+            api_token = (
+                request.state.session.datarobot_api_token
+                or request.state.session.datarobot_api_skoped_token
+            )
+            if not account_info and api_token:
+                account_info = await account_info_cache.get(
+                    api_token, request.state.session.datarobot_endpoint
+                )
 
-        request.state.session.datarobot_account_info = account_info
-        dr_uid = request.state.session.datarobot_account_info.get("uid")
-        if session_id is None and dr_uid is not None:
-            session_id = base64.b64encode(dr_uid.encode()).decode()
-            user_id = dr_uid
+            request.state.session.datarobot_account_info = account_info
+            dr_uid = request.state.session.datarobot_account_info.get("uid")
+            if session_id is None and dr_uid is not None:
+                session_id = base64.b64encode(dr_uid.encode()).decode()
+                user_id = dr_uid
 
-        # Initialize database in the session
-        if user_id:
-            await _initialize_database(request, user_id)
+            # Initialize database in the session
+            if user_id:
+                await _initialize_database(request, user_id)
 
-    # Process the request
-    response: Response = await call_next(request)
+        # Process the request
+        response: Response = await call_next(request)
+    except BaseException:
+        if leased is not None:
+            session_store.release(leased)
+        raise
 
     if request.method in request_methods:
         # Set session cookie if needed
@@ -289,6 +412,10 @@ async def add_session_middleware(request: Request, call_next):  # type: ignore[n
                 response, user_id, session_id, request.cookies.get("session_fastapi")
             )
 
+    if leased is not None:
+        # the body is streamed after this returns, so the lease ends with the
+        # response rather than here
+        weakref.finalize(response, session_store.release, leased)
     return response
 
 
@@ -336,14 +463,10 @@ async def _initialize_session(
     elif new_user_id:
         session_id = base64.b64encode(new_user_id.encode()).decode()
 
-    # Get or create session in store
+    # Get or create session in store; an evicted session is rebuilt lazily.
+    # The session is leased and must be released once the request is done.
     if session_id:
-        async with session_lock:
-            existing_session = session_store.get(session_id)
-            if existing_session:
-                return existing_session, session_id, user_id or new_user_id
-            else:
-                session_store[session_id] = session_state
+        session_state = await session_store.acquire(session_id, lambda: session_state)
 
     return session_state, session_id, user_id or new_user_id
 
@@ -354,8 +477,9 @@ async def _initialize_database(request: Request, user_id: str) -> None:
         not hasattr(request.state.session, "analyst_db")
         or request.state.session.analyst_db is None
     ):
-        async with session_lock:
-            request.state.session.analyst_db = await get_database(user_id)
+        request.state.session.analyst_db = await database_initializations.run(
+            user_id, lambda: get_database(user_id)
+        )
 
 
 def _set_session_cookie(
@@ -388,101 +512,133 @@ async def get_database_tables() -> list[str]:
 async def process_and_update(
     dataset_names: List[str], analyst_db: AnalystDB, datasource_type: DataSourceType
 ) -> None:
-    async for _ in process_data_and_update_state(
-        dataset_names, analyst_db, datasource_type
-    ):
-        pass
+    with events.publisher(
+        _processing_events_key(analyst_db.user_id), close=False
+    ) as channel:
+        try:
+            async for progress in process_data_and_update_state(
+                dataset_names, analyst_db, datasource_type
+            ):
+                channel.publish(
+                    "progress",
+                    json.dumps({"message": progress, "datasets": dataset_names}),
+                )
+        except Exception as e:
+            channel.publish(
+                "failed", json.dumps({"message": str(e), "datasets": dataset_names})
+            )
+            raise
+        channel.publish("complete", json.dumps({"datasets": dataset_names}))
+
+
+def _submit_processing(
+    dataset_names: List[str], analyst_db: AnalystDB, datasource_type: DataSourceType
+) -> Job:
+    """Schedule the cleansing and dictionary generation of new datasets."""
+    return jobs.submit(
+        analyst_db.user_id,
+        "processing",
+        JobPriority.BULK,
+        lambda: process_and_update(dataset_names, analyst_db, datasource_type),
+    )
+
+
+@asynccontextmanager
+async def _spool_upload(
+    file: UploadFile, suffix: str
+) -> AsyncGenerator[tuple[Path, int], None]:
+    """
+    Copy an upload to a named temporary file in chunks and remove it afterwards.
+
+    Yields the path of the file and its size in bytes.
+    """
+    loop = asyncio.get_running_loop()
+    fd, name = tempfile.mkstemp(suffix=suffix)
+    path = Path(name)
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            await file.seek(0)
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await loop.run_in_executor(None, spool.write, chunk)
+        yield path, path.stat().st_size
+    finally:
+        path.unlink(missing_ok=True)
 
 
 @router.post("/datasets/upload")
 async def upload_files(
     request: Request,
-    background_tasks: BackgroundTasks,
     analyst_db: AnalystDB = Depends(get_initialized_db),
     files: List[UploadFile] | None = None,
     registry_ids: str | None = Form(None),
 ) -> list[FileUploadResponse]:
+    _admit_job()
     dataset_names = []
     response: list[FileUploadResponse] = []
     if files:
         for file in files:
             try:
-                file_size = file.size or 0
-                contents = await file.read()
                 if file.filename is None:
                     continue
 
-                file_extension = os.path.splitext(file.filename)[1].lower()
-
-                if file_extension == ".csv":
-                    logger.info(f"Loading CSV: {file.filename}")
-                    log_memory()
-                    df = pl.read_csv(
-                        io.StringIO(contents.decode("utf-8")),
-                        infer_schema_length=10000,
-                        low_memory=True,
-                    )
-                    log_memory()
-                    dataset_name = os.path.splitext(file.filename)[0]
-                    dataset = AnalystDataset(name=dataset_name, data=df)
+                base_name, file_extension = split_extension(file.filename)
+                if file_extension not in UPLOAD_EXTENSIONS:
+                    raise ValueError(f"Unsupported file type: {file_extension}")
 
-                    # Register dataset with the database
-                    await analyst_db.register_dataset(
-                        dataset, DataSourceType.FILE, file_size=file_size
-                    )
+                # the spool keeps the extension, so DuckDB detects compression
+                async with _spool_upload(file, file_extension) as (path, size):
+                    if file_extension in CSV_EXTENSIONS:
+                        logger.info(f"Loading CSV: {file.filename}")
+                        log_memory()
+                        await analyst_db.register_csv(
+                            path, base_name, DataSourceType.FILE, file_size=size
+                        )
+                        log_memory()
+                        dataset_names_in_file = [base_name]
+                    elif file_extension in COLUMNAR_EXTENSIONS:
+                        logger.info(f"Loading {file_extension}: {file.filename}")
+                        data = await asyncio.get_running_loop().run_in_executor(
+                            None, read_columnar, path, file_extension
+                        )
+                        await analyst_db.register_dataset(
+                            AnalystDataset(name=base_name, data=data),
+                            DataSourceType.FILE,
+                            file_size=size,
+                        )
+                        del data
+                        dataset_names_in_file = [base_name]
+                    else:
+                        # register one sheet at a time so only one is in memory
+                        sheet_names = await asyncio.get_running_loop().run_in_executor(
+                            None, lambda: fastexcel.read_excel(path).sheet_names
+                        )
+                        dataset_names_in_file = []
+                        for sheet_name in sheet_names:
+                            data = await asyncio.get_running_loop().run_in_executor(
+                                None,
+                                lambda: pl.read_excel(path, sheet_name=sheet_name),
+                            )
+                            dataset = AnalystDataset(
+                                name=f"{base_name}_{sheet_name}", data=data
+                            )
+                            del data
+                            await analyst_db.register_dataset(
+                                dataset, DataSourceType.FILE, file_size=size
+                            )
+                            dataset_names_in_file.append(dataset.name)
+                            del dataset
 
+                for dataset_name in dataset_names_in_file:
                     # Add to processing queue
-                    dataset_names.append(dataset.name)
-
+                    dataset_names.append(dataset_name)
                     file_response: FileUploadResponse = {
                         "filename": file.filename,
                         "content_type": file.content_type,
-                        "size": len(contents),
+                        "size": size,
                         "dataset_name": dataset_name,
                     }
                     response.append(file_response)
 
-                elif file_extension in [".xlsx", ".xls"]:
-                    base_name = os.path.splitext(file.filename)[0]
-                    excel_dataset = pl.read_excel(
-                        io.BytesIO(contents), sheet_id=None
-                    )  # Get available sheet names
-                    if isinstance(excel_dataset, dict):
-                        for sheet_name, data in excel_dataset.items():
-                            dataset_name = f"{base_name}_{sheet_name}"
-                            dataset = AnalystDataset(name=dataset_name, data=data)
-                            await analyst_db.register_dataset(
-                                dataset, DataSourceType.FILE, file_size=file_size
-                            )
-                            # Add to processing queue
-                            dataset_names.append(dataset.name)
-
-                            excel_sheet_response: FileUploadResponse = {
-                                "filename": file.filename,
-                                "content_type": file.content_type,
-                                "size": len(contents),
-                                "dataset_name": dataset_name,
-                            }
-                            response.append(excel_sheet_response)
-                    elif isinstance(excel_dataset, pl.DataFrame):
-                        dataset_name = base_name
-                        dataset = AnalystDataset(name=dataset_name, data=excel_dataset)
-                        await analyst_db.register_dataset(
-                            dataset, DataSourceType.FILE, file_size=file_size
-                        )
-                        # Add to processing queue
-                        dataset_names.append(dataset.name)
-
-                        excel_file_response: FileUploadResponse = {
-                            "filename": file.filename,
-                            "content_type": file.content_type,
-                            "size": len(contents),
-                            "dataset_name": dataset_name,
-                        }
-                        response.append(excel_file_response)
-                else:
-                    raise ValueError(f"Unsupported file type: {file_extension}")
-
             except Exception as e:
                 error_response: FileUploadResponse = {
                     "filename": file.filename or "unknown_file",
@@ -492,9 +648,7 @@ async def upload_files(
 
     # Process the data in the background (cleansing and dictionary generation)
     if dataset_names:
-        background_tasks.add_task(
-            process_and_update, dataset_names, analyst_db, DataSourceType.FILE
-        )
+        _submit_processing(dataset_names, analyst_db, DataSourceType.FILE)
 
     if registry_ids:
         id_list: list[str] = json.loads(registry_ids)
@@ -504,12 +658,7 @@ async def upload_files(
                 dataset_names = [
                     dataset.name for dataset in dataframes if not dataset.error
                 ]
-                background_tasks.add_task(
-                    process_and_update,
-                    dataset_names,
-                    analyst_db,
-                    DataSourceType.REGISTRY,
-                )
+                _submit_processing(dataset_names, analyst_db, DataSourceType.REGISTRY)
                 for dts in dataframes:
                     dts_response: FileUploadResponse = {
                         "dataset_name": dts.name,
@@ -523,10 +672,10 @@ async def upload_files(
 @router.post("/database/select")
 async def load_from_database(
     data: LoadDatabaseRequest,
-    background_tasks: BackgroundTasks,
     analyst_db: AnalystDB = Depends(get_initialized_db),
     sample_size: int = 5000,
 ) -> list[str]:
+    _admit_job()
     dataset_names = []
 
     # Load the data from the database
@@ -538,9 +687,7 @@ async def load_from_database(
 
     # Process the data in the background (cleansing and dictionary generation)
     if dataset_names:
-        background_tasks.add_task(
-            process_and_update, dataset_names, analyst_db, DataSourceType.DATABASE
-        )
+        _submit_processing(dataset_names, analyst_db, DataSourceType.DATABASE)
 
     return dataset_names
 
@@ -596,54 +743,188 @@ async def get_dataset_metadata(
         )
 
 
-@router.get("/datasets/{name}/cleansed")
+def _negotiate_format(
+    request: Request,
+    response: Response,
+    available: tuple[ResponseFormat, ...] = tuple(ResponseFormat),
+) -> ResponseFormat:
+    """Pick the response format from the Accept header or raise 406."""
+    response.headers["Vary"] = "Accept"
+    response_format = negotiate_format(request.headers.get("accept"), available)
+    if response_format is None:
+        raise HTTPException(
+            status_code=406,
+            detail="Acceptable media types: "
+            + ", ".join(response_format.value for response_format in available),
+        )
+    return response_format
+
+
+DatasetResponseT = TypeVar("DatasetResponseT", bound=BaseModel)
+
+
+def _encode_dataset_response(
+    model: DatasetResponseT, response_format: ResponseFormat, response: Response
+) -> DatasetResponseT | Response:
+    """Encode a response carrying a dataset in the negotiated format."""
+    # a returned Response does not pick up the headers set on `response`
+    headers = dict(response.headers)
+    if response_format == ResponseFormat.ARROW_STREAM:
+        return StreamingResponse(
+            arrow_stream(model), media_type=ARROW_STREAM_MEDIA_TYPE, headers=headers
+        )
+    if response_format == ResponseFormat.COLUMNAR_JSON:
+        return Response(
+            columnar_json_response(model),
+            media_type=COLUMNAR_JSON_MEDIA_TYPE,
+            headers=headers,
+        )
+    return model
+
+
+def _not_modified(request: Request, response: Response, etag: str) -> Response | None:
+    """
+    Set the validators of a conditional GET.
+
+    Returns a 304 response if the client's copy is still current. The browser
+    keeps the body and revalidates it on every request, so polling an
+    unchanged resource transfers no body at all.
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=dict(response.headers))
+    return None
+
+
+# the alternative encodings of responses that carry a dataset
+_DATASET_MEDIA_TYPES: dict[int | str, dict[str, Any]] = {
+    200: {
+        "content": {
+            COLUMNAR_JSON_MEDIA_TYPE: {},
+            ARROW_STREAM_MEDIA_TYPE: {},
+        }
+    }
+}
+
+
+@router.get(
+    "/datasets/{name}/cleansed",
+    response_model=DatasetCleansedResponse,
+    responses=_DATASET_MEDIA_TYPES,
+)
 async def get_cleansed_dataset(
+    request: Request,
+    response: Response,
     name: str,
     skip: int = 0,
     limit: int = 10000,
+    columns: list[str] | None = Query(None),
+    order_by: str | None = None,
+    descending: bool = False,
     analyst_db: AnalystDB = Depends(get_initialized_db),
-) -> DatasetCleansedResponse:
+) -> DatasetCleansedResponse | Response:
     """
     Get a cleansed dataset by name from the database with pagination support.
 
+    The page is returned as a list of records by default. Send
+    `Accept: application/vnd.columnar+json` for one array per column, or
+    `Accept: application/vnd.apache.arrow.stream` for Arrow IPC record batches
+    with the other fields as JSON in the schema metadata.
+
     Args:
         name: The name of the dataset
         skip: Number of records to skip (for pagination)
         limit: Maximum number of records to return (for pagination)
+        columns: Optional list of columns to return
+        order_by: Optional column to sort the records by
+        descending: Sort in descending order
 
     Returns:
-        A dictionary containing the cleaning report (if available) and the dataset as a list of records.
+        A dictionary containing the cleaning report (if available), the requested
+        page of the dataset as a list of records and the total number of rows.
 
     Raises:
         HTTPException: If the dataset doesn't exist or cannot be retrieved
     """
+    response_format = _negotiate_format(request, response)
+    # versioned before the page is read, so a concurrent write never ends up
+    # labelled with its own version while the page predates it
+    etag = make_etag(
+        analyst_db.user_id,
+        await analyst_db.get_dataset_version(name),
+        name,
+        skip,
+        limit,
+        columns,
+        order_by,
+        descending,
+        response_format.value,
+    )
+    if (not_modified := _not_modified(request, response, etag)) is not None:
+        return not_modified
+    skip = max(skip, 0)
+    # only the page is read from DuckDB, a non-positive limit keeps the old 10k cap
+    limit = limit if limit > 0 else 10000
     try:
-        ds_display = await analyst_db.get_dataset(name)
+        if response_format == ResponseFormat.ARROW_STREAM:
+            # record batches go from the DuckDB cursor to the client as they
+            # are read, the page is never loaded into Polars
+            reader, total_rows = await analyst_db.open_dataset_page(
+                name,
+                skip=skip,
+                limit=limit,
+                columns=columns,
+                order_by=order_by,
+                descending=descending,
+                batch_rows=ARROW_BATCH_ROWS,
+            )
+        else:
+            ds_display, total_rows = await analyst_db.get_dataset_page(
+                name,
+                skip=skip,
+                limit=limit,
+                columns=columns,
+                order_by=order_by,
+                descending=descending,
+            )
 
         # Initialize the response structure
-        response = DatasetCleansedResponse(
+        cleansed_response = DatasetCleansedResponse(
             dataset_name=name,
             cleaning_report=None,
             dataset=None,
+            total_rows=total_rows,
         )
 
-        # Attempt to fetch the cleaning report
-        try:
-            ds_display_cleansed = await analyst_db.get_cleansed_dataset(name)
-            response.cleaning_report = ds_display_cleansed.generate_cleaning_report()
+        # Attach the cleaning report if the dataset has a cleansed version
+        if await analyst_db.has_cleansed_dataset(name):
+            cleansed_response.cleaning_report = CleaningReport.from_column_reports(
+                await analyst_db.get_cleansing_report(name) or []
+            )
 
-        except ValueError:
-            # Cleaning report is not available
-            response.cleaning_report = None
+        if response_format == ResponseFormat.ARROW_STREAM:
 
-        # Convert the dataset to a DataFrame
-        df_display = ds_display.to_df()
+            async def stream() -> AsyncGenerator[bytes, None]:
+                async with reader as batches:
+                    async for chunk in arrow_reader_stream(cleansed_response, batches):
+                        yield chunk
 
-        # Apply pagination (skip and limit)
-        if skip > 0 or limit > 0:
-            df_display = df_display.slice(skip, limit)
+            return StreamingResponse(
+                stream(),
+                media_type=ARROW_STREAM_MEDIA_TYPE,
+                headers=dict(response.headers),
+            )
+
+        if response_format != ResponseFormat.JSON:
+            # the columnar encodings read the Arrow-backed page directly
+            cleansed_response.dataset = ds_display
+            return _encode_dataset_response(
+                cleansed_response, response_format, response
+            )
 
-        # Create an instance of AnalystDataset
+        # Convert the page to a list of records
+        df_display = ds_display.to_df()
         dataset = AnalystDataset(
             name=name,
             columns=df_display.columns,
@@ -651,9 +932,9 @@ async def get_cleansed_dataset(
         )
 
         # Add the dataset to the response
-        response.dataset = dataset
+        cleansed_response.dataset = dataset
 
-        return response
+        return cleansed_response
 
     except ValueError as e:
         raise HTTPException(
@@ -779,12 +1060,34 @@ async def get_chats(
     ]
 
 
-@router.get("/chats/{chat_id}")
+async def _chat_etag(
+    analyst_db: AnalystDB, chat_id: str, include_payloads: bool
+) -> str:
+    # every write to a chat or its messages moves chat_history.updated_at
+    updated_at = await analyst_db.get_chat_updated_at(chat_id)
+    return make_etag(analyst_db.user_id, chat_id, updated_at, include_payloads)
+
+
+@router.get("/chats/{chat_id}", response_model=ChatResponse)
 async def get_chat(
-    chat_id: str, analyst_db: AnalystDB = Depends(get_initialized_db)
-) -> ChatResponse:
-    """Get a specific chat by ID"""
-    chat = await analyst_db.get_chat_messages(chat_id=chat_id)
+    request: Request,
+    response: Response,
+    chat_id: str,
+    include_payloads: bool = True,
+    analyst_db: AnalystDB = Depends(get_initialized_db),
+) -> ChatResponse | Response:
+    """
+    Get a specific chat by ID
+
+    Supports conditional requests: a matching `If-None-Match` gets a 304
+    without the messages being loaded.
+    """
+    etag = await _chat_etag(analyst_db, chat_id, include_payloads)
+    if (not_modified := _not_modified(request, response, etag)) is not None:
+        return not_modified
+    chat = await analyst_db.get_chat_messages(
+        chat_id=chat_id, include_payloads=include_payloads
+    )
 
     return {
         "id": chat_id,
@@ -821,32 +1124,81 @@ async def update_chat(
 async def delete_chat(
     chat_id: str, analyst_db: AnalystDB = Depends(get_initialized_db)
 ) -> dict[str, str]:
-    """Delete a chat"""
+    """Delete a chat, cancelling its running analyses"""
+    await _stop_analyses(analyst_db, chat_id)
     # Delete the chat
     await analyst_db.delete_chat(chat_id=chat_id)
 
     return {"message": f"Chat with ID {chat_id} deleted successfully"}
 
 
-@router.get("/chats/{chat_id}/messages")
+@router.get("/chats/{chat_id}/messages", response_model=list[AnalystChatMessage])
 async def get_chat_messages(
+    request: Request,
+    response: Response,
     chat_id: str,
+    include_payloads: bool = True,
     analyst_db: AnalystDB = Depends(get_initialized_db),
-) -> list[AnalystChatMessage]:
-    """Get messages for a specific chat"""
+) -> list[AnalystChatMessage] | Response:
+    """
+    Get messages for a specific chat.
+
+    With `include_payloads=false` components are returned as stubs carrying their
+    type and size, to be loaded with the component endpoint when displayed.
+    A matching `If-None-Match` gets a 304 without the messages being loaded.
+    """
+    etag = await _chat_etag(analyst_db, chat_id, include_payloads)
+    if (not_modified := _not_modified(request, response, etag)) is not None:
+        return not_modified
 
-    chat = await analyst_db.get_chat_messages(chat_id=chat_id)
+    chat = await analyst_db.get_chat_messages(
+        chat_id=chat_id, include_payloads=include_payloads
+    )
 
     return chat
 
 
+@router.get(
+    "/chats/{chat_id}/messages/{message_id}/components/{position}",
+    response_model=Component,
+    responses=_DATASET_MEDIA_TYPES,
+)
+async def get_chat_message_component(
+    request: Request,
+    response: Response,
+    chat_id: str,
+    message_id: str,
+    position: int,
+    analyst_db: AnalystDB = Depends(get_initialized_db),
+) -> Component | Response:
+    """
+    Get the payload of one component of a chat message
+
+    Analysis results with a dataset can also be requested as columnar JSON or
+    an Arrow IPC stream, like the cleansed dataset endpoint.
+    """
+    component = await analyst_db.get_chat_message_component(
+        chat_id=chat_id, message_id=message_id, position=position
+    )
+    if component is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Component {position} of message {message_id} not found",
+        )
+    if not isinstance(component, (RunAnalysisResult, RunDatabaseAnalysisResult)):
+        _negotiate_format(request, response, available=(ResponseFormat.JSON,))
+        return component
+    response_format = _negotiate_format(request, response)
+    return _encode_dataset_response(component, response_format, response)
+
+
 @router.delete("/chats/messages/{message_id}")
 async def delete_chat_message(
     request: Request,
     message_id: str,
     analyst_db: AnalystDB = Depends(get_initialized_db),
 ) -> list[AnalystChatMessage]:
-    """Delete a specific message"""
+    """Delete a specific message, cancelling the analysis it is waiting on"""
     try:
         message = await analyst_db.get_chat_message(message_id=message_id)
         if not message:
@@ -854,6 +1206,11 @@ async def delete_chat_message(
                 status_code=404, detail=f"Message with ID {message_id} not found"
             )
         else:
+            if message.chat_id and message.role == "user":
+                await _stop_analyses(analyst_db, message.chat_id, message_id)
+            elif message.chat_id and message.in_progress:
+                # a response still being written belongs to the chat's analysis
+                await _stop_analyses(analyst_db, message.chat_id)
             await analyst_db.delete_chat_message(message_id=message_id)
             messages = await analyst_db.get_chat_messages(
                 chat_id=message.chat_id,
@@ -865,14 +1222,98 @@ async def delete_chat_message(
         return cast(list[AnalystChatMessage], [])
 
 
+def _submit_analysis(
+    request: Request,
+    payload: ChatMessagePayload,
+    analyst_db: AnalystDB,
+    chat_request: ChatRequest,
+    chat_id: str,
+    message_id: str,
+) -> Job:
+    """Schedule the analysis of a user message ahead of any bulk processing."""
+    return jobs.submit(
+        analyst_db.user_id,
+        "analysis",
+        JobPriority.INTERACTIVE,
+        lambda: run_complete_analysis_task(
+            chat_request,
+            payload.data_source,
+            analyst_db,
+            chat_id,
+            message_id,
+            payload.enable_chart_generation,
+            payload.enable_business_insights,
+            request,
+        ),
+        # the analysis is found by the chat and user message it answers
+        key=(chat_id, message_id),
+    )
+
+
+async def _stop_analyses(analyst_db: AnalystDB, *key: str) -> list[Job]:
+    """
+    Cancel the analyses of the user for a chat, or one message of it.
+
+    Waits for them to stop, so their in-flight LLM calls and queries are
+    aborted and their messages are marked cancelled before returning.
+    """
+    analyses = [
+        job for job in jobs.find(analyst_db.user_id, *key) if job.kind == "analysis"
+    ]
+    for job in analyses:
+        await _stop_analysis(analyst_db, job)
+    return analyses
+
+
+async def _stop_analysis(analyst_db: AnalystDB, job: Job) -> bool:
+    """Cancel one analysis job like `_stop_analyses`; False if it had finished."""
+    if not await jobs.stop(job.id):
+        return False
+    if job.started_at is None and job.key is not None:
+        # a queued analysis never ran, so its message and stream are ended here
+        chat_id, message_id = job.key
+        message = await analyst_db.get_chat_message(message_id=message_id)
+        if message is not None:
+            await mark_analysis_cancelled(analyst_db, message)
+        with events.publisher(
+            _analysis_events_key(analyst_db.user_id, chat_id, message_id)
+        ) as channel:
+            channel.publish(
+                "failed", json.dumps({"message": ANALYSIS_CANCELLED_MESSAGE})
+            )
+            channel.publish("done", "{}")
+    return True
+
+
+@router.post("/chats/{chat_id}/messages/{message_id}/cancel")
+async def cancel_chat_message_analysis(
+    chat_id: str,
+    message_id: str,
+    analyst_db: AnalystDB = Depends(get_initialized_db),
+) -> dict[str, Any]:
+    """
+    Cancel the analysis answering a user message.
+
+    The analysis stops at once, aborting its LLM calls and database queries,
+    and its messages are kept with a cancelled error. Returns the cancelled
+    job, or 404 if the message has no queued or running analysis.
+    """
+    analyses = await _stop_analyses(analyst_db, chat_id, message_id)
+    if not analyses:
+        raise HTTPException(
+            status_code=404, detail=f"No running analysis for message {message_id}"
+        )
+    return analyses[0].to_dict()
+
+
 @router.post("/chats/messages")
 async def create_new_chat_message(
     request: Request,
     payload: ChatMessagePayload,
-    background_tasks: BackgroundTasks,
     analyst_db: AnalystDB = Depends(get_initialized_db),
 ) -> dict[str, Union[str, list[AnalystChatMessage], None]]:
     """Create a new chat and post a message to it"""
+    _admit_job()
 
     # Create a new chat
     chat_id = await analyst_db.create_chat(
@@ -903,18 +1344,11 @@ async def create_new_chat_message(
     # Create the chat request
     chat_request = ChatRequest(messages=valid_messages)
 
+    # Open the event stream now, so the client can subscribe right away
+    events.open(_analysis_events_key(analyst_db.user_id, chat_id, message_id))
+
     # Run the analysis in the background
-    background_tasks.add_task(
-        run_complete_analysis_task,
-        chat_request,
-        payload.data_source,
-        analyst_db,
-        chat_id,
-        message_id,
-        payload.enable_chart_generation,
-        payload.enable_business_insights,
-        request,
-    )
+    _submit_analysis(request, payload, analyst_db, chat_request, chat_id, message_id)
 
     chat_list = await analyst_db.get_chat_list()
     chat_name = next((n["name"] for n in chat_list if n["id"] == chat_id), None)
@@ -934,11 +1368,14 @@ async def create_chat_message(
     request: Request,
     chat_id: str,
     payload: ChatMessagePayload,
-    background_tasks: BackgroundTasks,
     analyst_db: AnalystDB = Depends(get_initialized_db),
 ) -> dict[str, Union[str, list[AnalystChatMessage], None]]:
     """Post a message to a specific chat"""
-    messages = await analyst_db.get_chat_messages(chat_id=chat_id)
+    _admit_job()
+    # only the message headers are needed to check progress and build the history
+    messages = await analyst_db.get_chat_messages(
+        chat_id=chat_id, include_payloads=False
+    )
 
     # Check if any message is in progress
     in_progress = any(message.in_progress for message in messages)
@@ -968,17 +1405,12 @@ async def create_chat_message(
         # Create the chat request
         chat_request = ChatRequest(messages=valid_messages)
 
+        # Open the event stream now, so the client can subscribe right away
+        events.open(_analysis_events_key(analyst_db.user_id, chat_id, message_id))
+
         # Run the analysis in the background
-        background_tasks.add_task(
-            run_complete_analysis_task,
-            chat_request,
-            payload.data_source,
-            analyst_db,
-            chat_id,
-            message_id,
-            payload.enable_chart_generation,
-            payload.enable_business_insights,
-            request,
+        _submit_analysis(
+            request, payload, analyst_db, chat_request, chat_id, message_id
         )
 
     chat_list = await analyst_db.get_chat_list()
@@ -1140,11 +1572,111 @@ async def run_complete_analysis_task(
         enable_business_insights=enable_business_insights,
     )
 
-    async for message in run_analysis_iterator:
-        if isinstance(message, AnalysisGenerationError):
-            break
-        else:
-            pass
+    with events.publisher(
+        _analysis_events_key(analyst_db.user_id, chat_id, message_id)
+    ) as channel:
+        try:
+            async for message in run_analysis_iterator:
+                if isinstance(message, AnalysisGenerationError):
+                    channel.publish("failed", json.dumps({"message": message.message}))
+                    break
+                else:
+                    channel.publish("component", _component_event(message, message_id))
+        except asyncio.CancelledError:
+            channel.publish(
+                "failed", json.dumps({"message": ANALYSIS_CANCELLED_MESSAGE})
+            )
+            raise
+        finally:
+            # tells the client to stop listening rather than reconnect
+            channel.publish("done", "{}")
+
+
+def _component_event(component: Component, message_id: str) -> str:
+    """
+    Describe a new component of the analysis started by `message_id`.
+
+    Payloads such as analysis datasets are not sent on the stream, clients
+    load them from the chat messages and the component endpoint.
+    """
+    if isinstance(component, str):
+        # the rephrased question is yielded as a plain string
+        component = EnhancedQuestionGeneration(enhanced_user_message=component)
+    return json.dumps({"type": get_component_type(component), "message_id": message_id})
+
+
+def _event_stream(
+    channel: EventChannel,
+    request: Request,
+    last_event_id: int | None,
+    replay: bool = True,
+) -> Response:
+    """
+    Stream the events of a channel, resuming after the client's last event.
+
+    Without a last event a client gets the channel's history, or only new
+    events if `replay` is False.
+    """
+    header = request.headers.get("last-event-id")
+    if header and header.isdigit():
+        last_event_id = int(header)
+    if last_event_id is None and not replay:
+        last_event_id = channel.last_event_id
+    if channel.closed and channel.last_event_id <= (last_event_id or 0):
+        # a 204 tells EventSource not to reconnect
+        return Response(status_code=204)
+
+    async def stream() -> AsyncGenerator[bytes, None]:
+        async for message in channel.subscribe(last_event_id or 0):
+            yield HEARTBEAT if message is None else message.encode()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/chats/{chat_id}/messages/{message_id}/events")
+async def stream_analysis_events(
+    request: Request,
+    chat_id: str,
+    message_id: str,
+    last_event_id: int | None = None,
+    analyst_db: AnalystDB = Depends(get_initialized_db),
+) -> Response:
+    """
+    Stream the progress of the analysis started by a user message.
+
+    Sends server-sent events as the pipeline produces them: a `component`
+    event naming the type of each new component, `failed` if the analysis
+    fails and `done` at the end. A reconnecting client resumes after its `Last-Event-ID` header
+    or `last_event_id` parameter. Streams of finished analyses can be replayed
+    for a few minutes, after which this returns 404.
+    """
+    channel = events.get(_analysis_events_key(analyst_db.user_id, chat_id, message_id))
+    if channel is None:
+        raise HTTPException(
+            status_code=404, detail=f"No analysis events for message {message_id}"
+        )
+    return _event_stream(channel, request, last_event_id)
+
+
+@router.get("/datasets/processing/events")
+async def stream_processing_events(
+    request: Request,
+    last_event_id: int | None = None,
+    analyst_db: AnalystDB = Depends(get_initialized_db),
+) -> Response:
+    """
+    Stream the progress of cleansing and dictionary generation.
+
+    Sends a `progress` event with each step, then `complete` or `failed` for
+    every batch of uploaded datasets. The stream stays open across batches,
+    so new subscribers start at its tail instead of replaying earlier batches.
+    """
+    channel = events.open(_processing_events_key(analyst_db.user_id))
+    return _event_stream(channel, request, last_event_id, replay=False)
 
 
 @router.get("/user/datarobot-account")
@@ -1181,4 +1713,81 @@ async def store_datarobot_account(
     return {"success": True}
 
 
+@router.get("/diagnostics/duckdb")
+async def get_duckdb_diagnostics(
+    analyst_db: AnalystDB = Depends(get_initialized_db),
+) -> dict[str, Any]:
+    """Report the DuckDB resource budget and the share of the user's databases."""
+    governor = connection_manager.governor
+    allocations = connection_manager.allocations()
+    user_databases = {
+        handler.db_path.name: handler.db_path.absolute()
+        for handler in (analyst_db.dataset_handler, analyst_db.chat_handler)
+    }
+    return {
+        "budget": {
+            "memory_mb": governor.memory_budget_mb,
+            "threads": governor.thread_budget,
+            "min_memory_mb": governor.min_memory_mb,
+            "temp_directory": governor.temp_directory,
+        },
+        "connections": asdict(connection_manager.stats()),
+        "databases": {
+            name: asdict(allocations[str(path)])
+            for name, path in user_databases.items()
+            if str(path) in allocations
+        },
+    }
+
+
+@router.get("/jobs")
+async def get_jobs(
+    analyst_db: AnalystDB = Depends(get_initialized_db),
+) -> list[dict[str, Any]]:
+    """List the queued, running and recently finished jobs of the user."""
+    return [job.to_dict() for job in jobs.jobs(analyst_db.user_id)]
+
+
+def _get_user_job(job_id: str, analyst_db: AnalystDB) -> Job:
+    job = jobs.get(job_id)
+    # other users' jobs are reported as missing
+    if job is None or job.user_id != analyst_db.user_id:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str, analyst_db: AnalystDB = Depends(get_initialized_db)
+) -> dict[str, Any]:
+    """Get the state of a job."""
+    return _get_user_job(job_id, analyst_db).to_dict()
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(
+    job_id: str, analyst_db: AnalystDB = Depends(get_initialized_db)
+) -> dict[str, Any]:
+    """Cancel a queued or running job; finished jobs are left as they are."""
+    job = _get_user_job(job_id, analyst_db)
+    if job.kind == "analysis":
+        # ends the message and event stream of the analysis too
+        await _stop_analysis(analyst_db, job)
+    else:
+        jobs.cancel(job_id)
+    return job.to_dict()
+
+
+@router.get("/diagnostics/jobs")
+async def get_job_diagnostics() -> dict[str, Any]:
+    """Report the job queue depths, the running jobs and the job counters."""
+    return asdict(jobs.stats())
+
+
+@router.get("/diagnostics/sessions")
+async def get_session_diagnostics() -> dict[str, Any]:
+    """Report the session cache counters and the number of resident sessions."""
+    return {"ttl_seconds": session_store.ttl, **asdict(session_store.stats())}
+
+
 app.include_router(router)
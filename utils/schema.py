@@ -192,8 +192,20 @@ class CleansedDataset(BaseModel):
                 - `conversions`: A mapping of conversion types to lists of column reports.
                 - `unchanged_columns`: A list of column names that were not modified.
         """
-        if not self.cleaning_report:
-            return CleaningReport(
+        return CleaningReport.from_column_reports(self.cleaning_report)
+
+
+class CleaningReport(BaseModel):
+    conversions: dict[str, list[CleansedColumnReport]]
+    unchanged_columns: list[str]
+
+    @classmethod
+    def from_column_reports(
+        cls, cleaning_report: list[CleansedColumnReport]
+    ) -> "CleaningReport":
+        """Group per-column cleansing reports by conversion type."""
+        if not cleaning_report:
+            return cls(
                 conversions={},
                 unchanged_columns=[],
             )
@@ -202,33 +214,68 @@ class CleansedDataset(BaseModel):
         conversions: dict[str, list[CleansedColumnReport]] = defaultdict(list)
         unchanged_columns: list[str] = []
 
-        for col_report in self.cleaning_report:
+        for col_report in cleaning_report:
             if col_report.conversion_type:
                 conversions[col_report.conversion_type].append(col_report)
             else:
                 unchanged_columns.append(col_report.new_column_name)
 
-        return CleaningReport(
+        return cls(
             conversions=conversions,
             unchanged_columns=unchanged_columns,
         )
 
 
+class ColumnValueCount(BaseModel):
+    value: Any
+    count: int
+
+
+class ColumnProfile(BaseModel):
+    """Statistics of one dataset column, computed once when it is registered."""
+
+    column: str
+    data_type: str
+    count: int
+    null_count: int
+    distinct_count: int | None = None  # approximate
+    min: Any = None
+    max: Any = None
+    mean: float | None = None
+    std: float | None = None
+    quantiles: dict[str, float | None] = Field(default_factory=dict)
+    top_values: list[ColumnValueCount] = Field(default_factory=list)
+
+    def summary(self) -> dict[str, Any]:
+        """Describe-style summary of the column for LLM prompts."""
+        summary: dict[str, Any] = {
+            "count": self.count - self.null_count,
+            "null_count": self.null_count,
+            "distinct_count": self.distinct_count,
+        }
+        if self.mean is not None:
+            summary.update(mean=self.mean, std=self.std)
+        if self.min is not None:
+            summary["min"] = self.min
+        summary.update(self.quantiles)
+        if self.max is not None:
+            summary["max"] = self.max
+        if self.top_values:
+            summary["top"] = {v.value: v.count for v in self.top_values}
+        return summary
+
+
 class DataDictionaryColumn(BaseModel):
     data_type: str
     column: str
     description: str
 
 
-class CleaningReport(BaseModel):
-    conversions: dict[str, list[CleansedColumnReport]]
-    unchanged_columns: list[str]
-
-
 class DatasetCleansedResponse(BaseModel):
     dataset_name: str
     cleaning_report: Optional[CleaningReport]
     dataset: Optional[AnalystDataset]
+    total_rows: Optional[int] = None
 
 
 class DataDictionary(BaseModel):
@@ -565,12 +612,22 @@ class Tool(BaseModel):
         return f"function: {self.name}{self.signature}\n{self.docstring}\n\n"
 
 
+class ComponentStub(BaseModel):
+    """Placeholder for a chat message component whose payload was not loaded."""
+
+    type: Literal["stub"] = "stub"
+    component_type: str
+    position: int
+    size: int
+
+
 Component = Union[
     RunAnalysisResult,
     RunChartsResult,
     GetBusinessAnalysisResult,
     EnhancedQuestionGeneration,
     RunDatabaseAnalysisResult,
+    ComponentStub,
     str,
 ]
 
@@ -0,0 +1,217 @@
+# Copyright 2025 DataRobot, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+from utils.logging_helper import get_logger
+
+logger = get_logger("SessionStore")
+
+# maximum number of sessions kept in memory before the least recently used is evicted
+SESSION_MAX_ENTRIES = int(os.environ.get("SESSION_MAX_ENTRIES", 1000))
+
+# seconds a session may go unused before it is evicted
+SESSION_TTL_SECONDS = float(os.environ.get("SESSION_TTL_SECONDS", 3600))
+
+S = TypeVar("S")
+T = TypeVar("T")
+
+
+@dataclass
+class SessionStoreStats:
+    hits: int = 0  # lookups that found a resident session
+    misses: int = 0  # lookups that created a new session
+    evictions: int = 0  # sessions dropped for the size bound or the TTL
+    resident_sessions: int = 0
+    max_sessions: int = 0
+
+
+class SessionStore(Generic[S]):
+    """
+    A bounded LRU cache of sessions with a time-to-live.
+
+    Sessions are kept in least recently used order, so expired sessions are
+    always at the front and are dropped on the next access. `on_evict` runs
+    for every dropped session in a background task, so closing a session's
+    databases does not hold up the request that caused the eviction. Sessions
+    obtained with `acquire` are leased until `release`, and an evicted session
+    is only handed to `on_evict` once its last lease has been released. An
+    evicted session is simply recreated by the next request that names it.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = SESSION_MAX_ENTRIES,
+        ttl: float = SESSION_TTL_SECONDS,
+        on_evict: Callable[[S], Awaitable[None]] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_sessions < 1:
+            raise ValueError("max_sessions must be at least 1")
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._on_evict = on_evict
+        self._clock = clock
+        self._sessions: OrderedDict[str, tuple[S, float]] = OrderedDict()
+        self._lock = asyncio.Lock()
+        self._stats = SessionStoreStats()
+        # in-flight requests per session, by id() as sessions need not be hashable
+        self._leases: dict[int, int] = {}
+        # evicted sessions waiting for their leases to be released
+        self._retired: dict[int, S] = {}
+        self._evictions: set[asyncio.Task[None]] = set()
+
+    async def get_or_create(self, session_id: str, factory: Callable[[], S]) -> S:
+        """Return the session for `session_id`, creating it with `factory` on a miss."""
+        return await self._get_or_create(session_id, factory, lease=False)
+
+    async def acquire(self, session_id: str, factory: Callable[[], S]) -> S:
+        """
+        Return the session like `get_or_create`, leased until `release`, so it
+        is not closed while the caller still uses it.
+        """
+        return await self._get_or_create(session_id, factory, lease=True)
+
+    def release(self, session: S) -> None:
+        """Release a lease taken by `acquire`, closing the session if it was evicted."""
+        key = id(session)
+        leases = self._leases.get(key, 0) - 1
+        if leases > 0:
+            self._leases[key] = leases
+            return
+        self._leases.pop(key, None)
+        if key in self._retired:
+            self._evict([self._retired.pop(key)])
+
+    async def drain(self) -> None:
+        """Wait until the sessions evicted so far have been closed."""
+        while self._evictions:
+            await asyncio.gather(*self._evictions)
+
+    async def _get_or_create(
+        self, session_id: str, factory: Callable[[], S], lease: bool
+    ) -> S:
+        async with self._lock:
+            now = self._clock()
+            evicted = self._pop_expired(now)
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                self._stats.hits += 1
+                session = entry[0]
+                self._sessions.move_to_end(session_id)
+            else:
+                self._stats.misses += 1
+                session = factory()
+                while len(self._sessions) >= self.max_sessions:
+                    evicted.append(self._sessions.popitem(last=False)[1][0])
+            self._sessions[session_id] = (session, now)
+            self._stats.evictions += len(evicted)
+            if lease:
+                self._leases[id(session)] = self._leases.get(id(session), 0) + 1
+            self._evict(evicted)
+        return session
+
+    async def clear(self) -> None:
+        """Evict every session and wait for the ones not leased to be closed."""
+        async with self._lock:
+            evicted = [session for session, _ in self._sessions.values()]
+            self._sessions.clear()
+            self._evict(evicted)
+        await self.drain()
+
+    def stats(self) -> SessionStoreStats:
+        """Return a snapshot of the hit/miss/eviction counters."""
+        return SessionStoreStats(
+            hits=self._stats.hits,
+            misses=self._stats.misses,
+            evictions=self._stats.evictions,
+            resident_sessions=len(self._sessions),
+            max_sessions=self.max_sessions,
+        )
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _pop_expired(self, now: float) -> list[S]:
+        expired = []
+        while self._sessions:
+            session_id, (session, last_used) = next(iter(self._sessions.items()))
+            if now - last_used < self.ttl:
+                break
+            del self._sessions[session_id]
+            expired.append(session)
+        return expired
+
+    def _evict(self, sessions: list[S]) -> None:
+        """Close evicted sessions in the background once they are not leased."""
+        if self._on_evict is None:
+            return
+        unleased = []
+        for session in sessions:
+            if self._leases.get(id(session)):
+                self._retired[id(session)] = session
+            else:
+                unleased.append(session)
+        if not unleased:
+            return
+        task = asyncio.create_task(self._close(unleased))
+        self._evictions.add(task)
+        task.add_done_callback(self._evictions.discard)
+
+    async def _close(self, sessions: list[S]) -> None:
+        assert self._on_evict is not None
+        results = await asyncio.gather(
+            *(self._on_evict(session) for session in sessions),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.warning(f"Error closing an evicted session: {result}")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesce concurrent calls for the same key into one in-flight task.
+
+    The first caller for a key starts `factory()`; callers arriving while it
+    runs await the same task, and calls for other keys never wait on it. The
+    task is shielded, so a cancelled caller does not cancel the work the others
+    are waiting for. Once it finishes the key is forgotten, so a failure is
+    retried by the next call.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: dict[Hashable, asyncio.Task[T]] = {}
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        task = self._tasks.get(key)
+        if task is None:
+
+            async def call() -> T:
+                return await factory()
+
+            task = asyncio.create_task(call())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        return await asyncio.shield(task)
+
+    def __len__(self) -> int:
+        return len(self._tasks)